@@ -4,7 +4,11 @@ to build all code development agents.
 """
 from __future__ import annotations
 
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Mapping, Optional
+
+from config.hedging import get_hedged_roles
+from config.profiling import register_agent
+from config.settings import RoleRoute, get_role_routes
 
 # Import the new, renamed agent creation functions
 from .code_planner import create_code_planner_agent
@@ -28,16 +32,36 @@ def get_all_code_agents(
     tester_tools: Optional[Iterable[object]] = None,
     reviewer_tools: Optional[Iterable[object]] = None,
     llm_overrides: dict[str, Any] | None = None,
+    hedge_overrides: dict[str, Any] | None = None,
+    routes: Mapping[str, RoleRoute] | None = None,
 ) -> dict:
     """
     Convenience function to create all code development agents at once.
+
+    Each role's LLM is ``llm_overrides`` with its entry of ``routes`` applied on top
+    (defaults to ``get_role_routes()``); agents are registered with the profiler.
+    When ``hedge_overrides`` is given, agents whose role is listed in
+    ``LLM_HEDGE_AGENTS`` race that configuration against their own when slow.
     
     Returns:
         dict: Dictionary with keys 'planner', 'writer', 'tester', 'reviewer'
     """
-    return {
-        'planner': create_code_planner_agent(tools=planner_tools, llm_overrides=llm_overrides),
-        'writer': create_code_writer_agent(tools=writer_tools, llm_overrides=llm_overrides),
-        'tester': create_code_tester_agent(tools=tester_tools, llm_overrides=llm_overrides),
-        'reviewer': create_code_reviewer_agent(tools=reviewer_tools, llm_overrides=llm_overrides),
-    }
\ No newline at end of file
+    hedged_roles = get_hedged_roles() if hedge_overrides is not None else frozenset()
+    routes = get_role_routes() if routes is None else routes
+
+    def overrides_for(role: str) -> dict[str, Any]:
+        route = routes.get(role, RoleRoute())
+        overrides = route.apply(llm_overrides)
+        if role in hedged_roles:
+            overrides["hedge_with"] = route.apply(hedge_overrides)
+        return overrides
+
+    agents = {
+        'planner': create_code_planner_agent(tools=planner_tools, llm_overrides=overrides_for('planner')),
+        'writer': create_code_writer_agent(tools=writer_tools, llm_overrides=overrides_for('writer')),
+        'tester': create_code_tester_agent(tools=tester_tools, llm_overrides=overrides_for('tester')),
+        'reviewer': create_code_reviewer_agent(tools=reviewer_tools, llm_overrides=overrides_for('reviewer')),
+    }
+    for role, agent in agents.items():
+        register_agent(agent.role, role)
+    return agents
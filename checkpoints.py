@@ -0,0 +1,84 @@
+"""Per-run checkpoints of completed task outputs so retries resume instead of restarting.
+
+Each run gets a directory under ``.cache/checkpoints/<run_id>`` (override the root with
+``CHECKPOINT_DIR``) holding ``run.json`` with the topic and one JSON file per
+completed task. Files are written atomically, so a crash mid-write never leaves a
+truncated checkpoint behind.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = Path(__file__).resolve().parent / ".cache" / "checkpoints"
+_RUN_FILE = "run.json"
+
+
+def new_run_id(topic: str) -> str:
+    digest = hashlib.sha256(topic.encode("utf-8")).hexdigest()[:8]
+    # The random suffix keeps runs of one topic started in the same second apart.
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{digest}-{uuid.uuid4().hex[:6]}"
+
+
+def _write_json(path: Path, payload: Dict) -> None:
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+class CheckpointStore:
+    """Completed task outputs of one pipeline run, ordered by task position."""
+
+    def __init__(self, run_id: str, topic: str, root: Optional[Path] = None) -> None:
+        self.run_id = run_id
+        self.topic = topic
+        self.directory = Path(root or os.getenv("CHECKPOINT_DIR", str(DEFAULT_CHECKPOINT_DIR))) / run_id
+
+    def start(self, *, resume: bool) -> None:
+        """Prepare the run directory, discarding old checkpoints unless resuming the same topic."""
+        run_file = self.directory / _RUN_FILE
+        if resume and run_file.exists():
+            recorded = json.loads(run_file.read_text(encoding="utf-8")).get("topic")
+            if recorded == self.topic:
+                return
+            logger.warning("Run %s was for a different topic; starting it from scratch", self.run_id)
+        self.clear()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_json(run_file, {"run_id": self.run_id, "topic": self.topic, "started_at": time.time()})
+
+    def save(self, position: int, task_name: str, raw: str, *, final: bool = False) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_json(
+            self.directory / f"task-{position:02d}.json",
+            {"position": position, "task": task_name, "raw": raw, "final": final, "saved_at": time.time()},
+        )
+        logger.info("Checkpointed task %d (%s) for run %s", position, task_name, self.run_id)
+
+    def _entries(self) -> List[Dict]:
+        entries: List[Dict] = []
+        while True:
+            path = self.directory / f"task-{len(entries):02d}.json"
+            if not path.exists():
+                return entries
+            entries.append(json.loads(path.read_text(encoding="utf-8")))
+
+    def completed(self) -> List[str]:
+        """Raw outputs of the leading run of completed tasks (stops at the first gap)."""
+        return [entry["raw"] for entry in self._entries()]
+
+    def final_output(self) -> Optional[str]:
+        """The last task's output if every task of the run has completed."""
+        entries = self._entries()
+        return entries[-1]["raw"] if entries and entries[-1].get("final") else None
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
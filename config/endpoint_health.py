@@ -0,0 +1,267 @@
+"""Shared health table for LLM endpoints with a circuit breaker.
+
+Every LLM call records its outcome against its (provider, model, base_url) endpoint in
+SQLite, so all CLI and Streamlit processes see the same picture. Latency and error
+rate are tracked as exponentially weighted moving averages. After
+``LLM_BREAKER_FAILURE_THRESHOLD`` consecutive failures (default: 3) the endpoint's
+circuit opens for ``LLM_BREAKER_COOLDOWN_SECONDS`` (default: 300). Open endpoints are
+skipped, and the rest of the fallback chain is ordered by expected latency.
+
+``LLM_HEALTH_PATH`` (default: ``.cache/endpoint_health.sqlite``) locates the table and
+``LLM_HEALTH_EWMA_ALPHA`` (default: 0.3) sets how quickly the averages move.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from crewai.llm import LLM
+
+from config.profiling import profiling_metadata, profiling_role, role_for_agent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEALTH_PATH = Path(__file__).resolve().parents[1] / ".cache" / "endpoint_health.sqlite"
+
+Endpoint = Tuple[str, str, str]  # (provider, model, base_url)
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS endpoint_health (
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    base_url TEXT NOT NULL,
+    latency_ewma REAL,
+    error_ewma REAL NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    last_failure_at REAL,
+    last_error TEXT,
+    open_until REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (provider, model, base_url)
+);
+"""
+
+
+@dataclass(frozen=True)
+class EndpointHealth:
+    endpoint: Endpoint
+    latency_ewma: Optional[float]
+    error_ewma: float
+    successes: int
+    failures: int
+    consecutive_failures: int
+    last_failure_at: Optional[float]
+    last_error: Optional[str]
+    open_until: Optional[float]
+
+    @property
+    def is_open(self) -> bool:
+        return self.open_until is not None and self.open_until > time.time()
+
+    def expected_latency(self, prior: float) -> float:
+        """Latency inflated by the chance of having to fail over after an error."""
+        latency = self.latency_ewma if self.latency_ewma is not None else prior
+        return latency * (1 + 2 * self.error_ewma)
+
+
+class EndpointHealthStore:
+    """SQLite-backed health table shared across processes."""
+
+    def __init__(self, path: Path, *, alpha: float = 0.3, failure_threshold: int = 3, cooldown: float = 300.0) -> None:
+        self.path = Path(path)
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "EndpointHealthStore":
+        return cls(
+            Path(os.getenv("LLM_HEALTH_PATH", str(DEFAULT_HEALTH_PATH))),
+            alpha=float(os.getenv("LLM_HEALTH_EWMA_ALPHA", "0.3")),
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "3")),
+            cooldown=float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "300")),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; updates take an IMMEDIATE lock so concurrent processes
+            # never lose each other's read-modify-write.
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, endpoint: Endpoint) -> Optional[EndpointHealth]:
+        row = self._connection().execute(
+            "SELECT latency_ewma, error_ewma, successes, failures, consecutive_failures, last_failure_at, "
+            "last_error, open_until FROM endpoint_health WHERE provider = ? AND model = ? AND base_url = ?",
+            endpoint,
+        ).fetchone()
+        return EndpointHealth(endpoint, *row) if row else None
+
+    def _update(self, endpoint: Endpoint, apply: Callable[[Optional[EndpointHealth]], Dict[str, Any]]) -> None:
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            values = apply(self.get(endpoint))
+            values["updated_at"] = time.time()
+            columns = ", ".join(values)
+            placeholders = ", ".join("?" for _ in values)
+            conn.execute(
+                f"INSERT OR REPLACE INTO endpoint_health (provider, model, base_url, {columns}) "
+                f"VALUES (?, ?, ?, {placeholders})",
+                (*endpoint, *values.values()),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning("Could not update endpoint health for %s", endpoint, exc_info=True)
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        def apply(current: Optional[EndpointHealth]) -> Dict[str, Any]:
+            previous = current.latency_ewma if current and current.latency_ewma is not None else latency
+            return {
+                "latency_ewma": (1 - self.alpha) * previous + self.alpha * latency,
+                "error_ewma": (1 - self.alpha) * (current.error_ewma if current else 0.0),
+                "successes": (current.successes if current else 0) + 1,
+                "failures": current.failures if current else 0,
+                "consecutive_failures": 0,
+                "last_failure_at": current.last_failure_at if current else None,
+                "last_error": current.last_error if current else None,
+                "open_until": None,
+            }
+
+        self._update(endpoint, apply)
+
+    def record_failure(self, endpoint: Endpoint, error: BaseException) -> None:
+        def apply(current: Optional[EndpointHealth]) -> Dict[str, Any]:
+            now = time.time()
+            consecutive = (current.consecutive_failures if current else 0) + 1
+            open_until = current.open_until if current else None
+            if consecutive >= self.failure_threshold:
+                open_until = now + self.cooldown
+                logger.warning(
+                    "Circuit opened for %s after %d consecutive failures; skipping it for %.0fs",
+                    "/".join(endpoint),
+                    consecutive,
+                    self.cooldown,
+                )
+            return {
+                "latency_ewma": current.latency_ewma if current else None,
+                "error_ewma": (1 - self.alpha) * (current.error_ewma if current else 0.0) + self.alpha,
+                "successes": current.successes if current else 0,
+                "failures": (current.failures if current else 0) + 1,
+                "consecutive_failures": consecutive,
+                "last_failure_at": now,
+                "last_error": f"{type(error).__name__}: {error}"[:500],
+                "open_until": open_until,
+            }
+
+        self._update(endpoint, apply)
+
+    def rank(self, candidates: Sequence[T], endpoints_of: Callable[[T], Sequence[Endpoint]]) -> List[T]:
+        """Drop candidates with an open circuit and order the rest by expected latency.
+
+        A candidate may use several endpoints (one per routed agent role): it is skipped
+        if any of them is open, and its expected latency is the sum over its endpoints.
+        Unknown endpoints are scored with ``LLM_HEALTH_PRIOR_LATENCY_SECONDS`` (default 30);
+        ties keep the configured order. If every candidate is skipped, the original order
+        is returned so the run still has something to try.
+        """
+        prior = float(os.getenv("LLM_HEALTH_PRIOR_LATENCY_SECONDS", "30"))
+        scored = []
+        for position, candidate in enumerate(candidates):
+            endpoints = list(dict.fromkeys(endpoints_of(candidate)))
+            healths = [self.get(endpoint) for endpoint in endpoints]
+            open_circuits = [health for health in healths if health is not None and health.is_open]
+            label = ", ".join("/".join(endpoint) for endpoint in endpoints)
+            if open_circuits:
+                for health in open_circuits:
+                    logger.info(
+                        "Skipping attempt using %s: circuit open for %s for another %.0fs (last error: %s)",
+                        label,
+                        "/".join(health.endpoint),
+                        health.open_until - time.time(),
+                        health.last_error,
+                    )
+                continue
+            expected = sum(health.expected_latency(prior) if health else prior for health in healths)
+            scored.append((expected, position, candidate, label, healths))
+
+        if not scored:
+            logger.warning("Every LLM attempt uses an endpoint with an open circuit; trying them in configured order")
+            return list(candidates)
+
+        scored.sort(key=lambda item: (item[0], item[1]))
+        for expected, _, _, label, healths in scored:
+            known = [health for health in healths if health is not None]
+            logger.info(
+                "Attempt using %s: expected %.1fs, %s",
+                label,
+                expected,
+                f"{sum(h.successes for h in known)} ok / {sum(h.failures for h in known)} failed" if known else "no history",
+            )
+        return [candidate for _, _, candidate, _, _ in scored]
+
+
+_STORE: Optional[EndpointHealthStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_endpoint_health_store() -> EndpointHealthStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = EndpointHealthStore.from_env()
+    return _STORE
+
+
+class MonitoredLLM(LLM):
+    """CrewAI ``LLM`` that records each call's latency or failure in the health table.
+
+    Calls are also attributed to the calling agent's routing role for ``config.profiling``.
+    """
+
+    health_endpoint: Optional[Endpoint] = None
+
+    def call(self, messages: Any, tools: Any = None, *args: Any, **kwargs: Any) -> Any:
+        with profiling_role(role_for_agent(kwargs.get("from_agent"))):
+            return self._monitored_call(messages, tools, *args, **kwargs)
+
+    def _prepare_completion_params(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        params = super()._prepare_completion_params(*args, **kwargs)
+        metadata = profiling_metadata()
+        if metadata:
+            # LiteLLM keeps metadata for its callbacks; it is not sent to the provider.
+            params["metadata"] = {**(params.get("metadata") or {}), **metadata}
+        return params
+
+    def _monitored_call(self, messages: Any, tools: Any, *args: Any, **kwargs: Any) -> Any:
+        endpoint = self.health_endpoint
+        if endpoint is None:
+            return super().call(messages, tools, *args, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            response = super().call(messages, tools, *args, **kwargs)
+        except Exception as exc:
+            get_endpoint_health_store().record_failure(endpoint, exc)
+            raise
+        get_endpoint_health_store().record_success(endpoint, time.perf_counter() - started)
+        return response
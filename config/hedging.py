@@ -0,0 +1,211 @@
+"""Hedged LLM calls: race a fallback endpoint when the primary is slower than usual.
+
+A ``HedgedLLM`` sends each call to its primary configuration. If no answer arrives
+within the primary's observed latency percentile, the same call is also sent to a
+secondary LLM — the next (model, base_url) pair of the fallback chain — and the first
+successful response wins. A primary that fails outright triggers the secondary
+immediately. LiteLLM's synchronous calls cannot be interrupted, so the losing request
+is abandoned and its result discarded. In streaming runs only the primary streams,
+so a winning hedge's answer arrives in one piece instead of interleaving with the
+primary's tokens.
+
+Abandoned requests keep a worker busy until they return, so at most
+``LLM_HEDGE_MAX_IN_FLIGHT`` requests run on the hedging workers at once. When every
+slot is taken, calls skip hedging: the primary runs on the caller's thread, or a
+running primary is simply awaited.
+
+Configuration (environment variables):
+    LLM_HEDGE_AGENTS               roles to hedge: comma list of planner, writer, tester,
+                                   reviewer, or "all" (default: none)
+    LLM_HEDGE_PERCENTILE           primary latency percentile that triggers a hedge (default: 95)
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS hedge delay until enough samples exist (default: 30)
+    LLM_HEDGE_MIN_DELAY_SECONDS    lower bound on the hedge delay (default: 2)
+    LLM_HEDGE_MIN_SAMPLES          samples needed before the percentile is trusted (default: 8)
+    LLM_HEDGE_MAX_IN_FLIGHT        requests, abandoned ones included, on the hedging
+                                   workers at once (default: 16)
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from config.llm_cache import CachedLLM
+from config.profiling import run_state
+
+logger = logging.getLogger(__name__)
+
+AGENT_ROLES = ("planner", "writer", "tester", "reviewer")
+
+_MAX_IN_FLIGHT = int(os.getenv("LLM_HEDGE_MAX_IN_FLIGHT", "16"))
+# One worker per slot, so an admitted request never queues behind abandoned ones.
+_EXECUTOR = ThreadPoolExecutor(max_workers=_MAX_IN_FLIGHT, thread_name_prefix="llm-hedge")
+_SLOTS = threading.BoundedSemaphore(_MAX_IN_FLIGHT)
+
+
+def get_hedged_roles() -> frozenset[str]:
+    raw = os.getenv("LLM_HEDGE_AGENTS", "").strip().lower()
+    if raw == "all":
+        return frozenset(AGENT_ROLES)
+    return frozenset(item.strip() for item in raw.split(",") if item.strip() in AGENT_ROLES)
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per endpoint."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: Tuple[str, str], seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+
+    def hedge_delay(self, endpoint: Tuple[str, str]) -> float:
+        percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        minimum = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "2"))
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if len(samples) < int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "8")):
+            return float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "30"))
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return max(minimum, samples[index])
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedges_fired: int = 0
+    hedge_wins: int = 0
+    primary_failures: int = 0
+    hedges_skipped: int = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges_fired / self.calls if self.calls else 0.0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        return self.hedge_wins / self.hedges_fired if self.hedges_fired else 0.0
+
+
+_LATENCIES = LatencyTracker()
+_STATS_LOCK = threading.Lock()
+
+
+def _run_stats() -> Optional[Dict[str, HedgeStats]]:
+    # Counters belong to the current pipeline run (see config.profiling.profiling_run).
+    return run_state("hedging", dict)
+
+
+def _bump(label: str, **increments: int) -> None:
+    all_stats = _run_stats()
+    if all_stats is None:
+        return
+    with _STATS_LOCK:
+        stats = all_stats.setdefault(label, HedgeStats())
+        for name, amount in increments.items():
+            setattr(stats, name, getattr(stats, name) + amount)
+
+
+def get_hedge_stats() -> Dict[str, HedgeStats]:
+    """Return the current run's hedge counters per primary model."""
+    all_stats = _run_stats() or {}
+    with _STATS_LOCK:
+        return {label: HedgeStats(**vars(stats)) for label, stats in all_stats.items()}
+
+
+def reset_hedge_stats() -> None:
+    """Clear the current run's hedge counters; observed latencies are kept."""
+    all_stats = _run_stats()
+    with _STATS_LOCK:
+        if all_stats is not None:
+            all_stats.clear()
+
+
+def _submit(function: Callable[[], Any]) -> Optional[Future]:
+    """Run ``function`` on a hedging worker, or return None when every slot is taken."""
+    slots = _SLOTS
+    if not slots.acquire(blocking=False):
+        return None
+    try:
+        # Carry context variables (e.g. CrewAI's current task/agent) into the worker thread.
+        future = _EXECUTOR.submit(contextvars.copy_context().run, function)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+class HedgedLLM(CachedLLM):
+    """LLM that races ``hedge_secondary`` when the primary is slower than its percentile."""
+
+    hedge_secondary: Optional[Any] = None
+
+    def _endpoint(self) -> Tuple[str, str]:
+        return str(self.model), str(getattr(self, "base_url", "") or "")
+
+    def call(self, messages: Any, tools: Any = None, *args: Any, **kwargs: Any) -> Any:
+        secondary = self.hedge_secondary
+        primary_call = super().call
+        if secondary is None:
+            return primary_call(messages, tools, *args, **kwargs)
+
+        label = str(self.model)
+        endpoint = self._endpoint()
+        delay = _LATENCIES.hedge_delay(endpoint)
+        _bump(label, calls=1)
+
+        def timed_primary() -> Any:
+            started = time.perf_counter()
+            result = primary_call(messages, tools, *args, **kwargs)
+            _LATENCIES.record(endpoint, time.perf_counter() - started)
+            return result
+
+        primary = _submit(timed_primary)
+        if primary is None:
+            _bump(label, hedges_skipped=1)
+            logger.info("No free hedging slot; calling %s without a hedge", label)
+            return timed_primary()
+        done, _ = wait([primary], timeout=delay)
+        if done and primary.exception() is None:
+            return primary.result()
+
+        if done:
+            _bump(label, primary_failures=1)
+            logger.warning("Primary %s failed (%s); sending the call to %s", label, primary.exception(), secondary.model)
+        else:
+            logger.info("Primary %s exceeded %.1fs; hedging with %s", label, delay, secondary.model)
+        hedge = _submit(lambda: secondary.call(messages, tools, *args, **kwargs))
+        if hedge is None:
+            _bump(label, hedges_skipped=1)
+            if done:
+                return secondary.call(messages, tools, *args, **kwargs)
+            logger.info("No free hedging slot; waiting for %s", label)
+            return primary.result()
+        _bump(label, hedges_fired=1)
+
+        pending = {hedge} if done else {primary, hedge}
+        last_error: Optional[BaseException] = primary.exception() if done else None
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    continue
+                if future is hedge:
+                    _bump(label, hedge_wins=1)
+                    logger.info("Hedge to %s won over %s", secondary.model, label)
+                for loser in pending:
+                    loser.cancel()
+                return future.result()
+        assert last_error is not None
+        raise last_error
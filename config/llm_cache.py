@@ -0,0 +1,174 @@
+"""Opt-in, content-addressed cache of LLM completions for repeatable runs.
+
+Completions are keyed by a SHA-256 of the model, messages, tool schemas and sampling
+parameters and stored in SQLite, so re-running a topic with unchanged prompts is
+answered locally. ``LLM_CACHE_MODE`` selects the behaviour:
+
+    off        bypass the cache entirely (default)
+    read       serve hits, never write (e.g. replaying a recorded demo)
+    readwrite  serve hits and store new completions
+
+``LLM_CACHE_PATH`` (default: ``.cache/llm_cache.sqlite``) and ``LLM_CACHE_MAX_ENTRIES``
+(default: 10000, least recently used evicted first) configure the store.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.endpoint_health import MonitoredLLM
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_MODES = ("off", "read", "readwrite")
+DEFAULT_LLM_CACHE_PATH = Path(__file__).resolve().parents[1] / ".cache" / "llm_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_accessed ON completions(accessed_at);
+"""
+
+# Sampling attributes of crewai's LLM that change the completion for a given prompt.
+_KEY_ATTRIBUTES = (
+    "model",
+    "temperature",
+    "top_p",
+    "n",
+    "max_tokens",
+    "max_completion_tokens",
+    "stop",
+    "presence_penalty",
+    "frequency_penalty",
+    "seed",
+    "response_format",
+    "reasoning_effort",
+)
+
+
+def get_llm_cache_mode() -> str:
+    mode = os.getenv("LLM_CACHE_MODE", "off").strip().lower()
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"Unknown LLM_CACHE_MODE '{mode}'. Choose one of: {', '.join(LLM_CACHE_MODES)}")
+    return mode
+
+
+class CompletionCache:
+    """SQLite store of completions with least-recently-used eviction."""
+
+    def __init__(self, path: Path, *, max_entries: int = 10000) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(llm: Any, messages: Any, tools: Any) -> str:
+        payload: Dict[str, Any] = {name: getattr(llm, name, None) for name in _KEY_ATTRIBUTES}
+        payload["messages"] = messages
+        payload["tools"] = tools
+        encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, *, touch: bool) -> Optional[str]:
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and touch:
+                with conn:
+                    conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            logger.warning("LLM cache read failed; calling the model", exc_info=True)
+            row = None
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, model, response, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, json.dumps(response), now, now),
+                )
+                overflow = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM completions WHERE key IN "
+                        "(SELECT key FROM completions ORDER BY accessed_at LIMIT ?)",
+                        (overflow,),
+                    )
+        except sqlite3.Error:
+            logger.warning("LLM cache write failed; continuing without caching", exc_info=True)
+
+
+_CACHE: Optional[CompletionCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = CompletionCache(
+                    Path(os.getenv("LLM_CACHE_PATH", str(DEFAULT_LLM_CACHE_PATH))),
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+                )
+    return _CACHE
+
+
+class CachedLLM(MonitoredLLM):
+    """CrewAI ``LLM`` that consults the completion cache around ``call``.
+
+    Cache hits return before the endpoint is contacted, so they are not recorded as
+    endpoint health samples.
+    """
+
+    def call(self, messages: Any, tools: Any = None, *args: Any, **kwargs: Any) -> Any:
+        mode = get_llm_cache_mode()
+        if mode == "off":
+            return super().call(messages, tools, *args, **kwargs)
+
+        cache = get_completion_cache()
+        key = cache.make_key(self, messages, tools)
+        cached = cache.get(key, touch=mode == "readwrite")
+        if cached is not None:
+            logger.info("LLM cache hit for %s (%s)", self.model, key[:12])
+            return cached
+
+        response = super().call(messages, tools, *args, **kwargs)
+        if mode == "readwrite" and isinstance(response, str) and response:
+            cache.set(key, str(self.model), response)
+        return response
@@ -0,0 +1,175 @@
+"""Per-role latency, token and cost profile of LLM calls.
+
+``get_all_code_agents`` registers which routing role (planner, writer, ...) each agent
+plays. While an agent's LLM call runs, ``MonitoredLLM`` puts that role in a context
+variable and copies it into the request's LiteLLM ``metadata``; a LiteLLM success
+callback then adds the call's latency, token usage and reported cost to the role's
+totals. The metadata travels with the request, so streamed calls, whose callbacks run
+on LiteLLM's own threads, are attributed too. The role never enters the LLM's own
+settings, so agents with the same configuration still share one pooled client.
+
+Each pipeline run collects into its own state (``profiling_run``), identified by a run
+id that travels in the same metadata, so concurrent runs in one process, such as two
+Streamlit sessions, never mix or clear each other's totals. ``config.hedging`` keeps
+its per-run counters in the same state. ``crew.py`` logs the totals after every run;
+use them to decide which roles can move to a smaller, faster model (see the routing
+table in ``config.settings``).
+Completions served from the local LLM cache never reach LiteLLM and are not counted.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RoleProfile:
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.completion_tokens / self.total_seconds if self.total_seconds else 0.0
+
+
+T = TypeVar("T")
+
+# Per-run state: run id -> collector name -> collector. ``None`` holds whatever is
+# recorded outside a pipeline run.
+_RUNS: Dict[Optional[str], Dict[str, Any]] = {None: {}}
+_PROFILES_LOCK = threading.Lock()
+_CURRENT_RUN: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("profiled_run", default=None)
+_INSTALLED = False
+# CrewAI agent role text -> routing role, filled in as agents are created.
+_AGENT_ROLES: Dict[str, str] = {}
+_CURRENT_ROLE: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("profiled_role", default=None)
+ROLE_METADATA_KEY = "profiling_role"
+RUN_METADATA_KEY = "profiling_run"
+
+
+def register_agent(agent_role: str, role: str) -> None:
+    """Attribute LLM calls made by the agent whose ``Agent.role`` is ``agent_role`` to ``role``."""
+    with _PROFILES_LOCK:
+        _AGENT_ROLES[agent_role] = role
+
+
+def role_for_agent(agent: Any) -> Optional[str]:
+    with _PROFILES_LOCK:
+        return _AGENT_ROLES.get(getattr(agent, "role", None))
+
+
+def profiling_metadata() -> Dict[str, str]:
+    """LiteLLM metadata identifying the role and run of a call made in this context."""
+    role = _CURRENT_ROLE.get()
+    if not role:
+        return {}
+    run_id = _CURRENT_RUN.get()
+    return {ROLE_METADATA_KEY: role, **({RUN_METADATA_KEY: run_id} if run_id else {})}
+
+
+@contextmanager
+def profiling_run() -> Iterator[str]:
+    """Collect profiles (and hedge counters) for calls made inside the block separately."""
+    run_id = uuid.uuid4().hex
+    with _PROFILES_LOCK:
+        _RUNS[run_id] = {}
+    token = _CURRENT_RUN.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _CURRENT_RUN.reset(token)
+        # Late reports, e.g. from abandoned hedge requests, are dropped from now on.
+        with _PROFILES_LOCK:
+            _RUNS.pop(run_id, None)
+
+
+def run_state(name: str, factory: Callable[[], T], run_id: Optional[str] = None) -> Optional[T]:
+    """The ``name`` collector of ``run_id`` (default: the current run), created on first use.
+
+    Returns ``None`` once that run has finished.
+    """
+    if run_id is None:
+        run_id = _CURRENT_RUN.get()
+    with _PROFILES_LOCK:
+        state = _RUNS.get(run_id)
+        if state is None:
+            return None
+        return state.setdefault(name, factory())
+
+
+@contextmanager
+def profiling_role(role: Optional[str]) -> Iterator[None]:
+    """Attribute LiteLLM calls made inside the block to ``role``."""
+    token = _CURRENT_ROLE.set(role)
+    try:
+        yield
+    finally:
+        _CURRENT_ROLE.reset(token)
+
+
+def _record(kwargs: Dict[str, Any], completion_response: Any, start_time: Any, end_time: Any) -> None:
+    # Streaming responses run this callback on a LiteLLM worker thread without the
+    # caller's context, so the role comes from the request metadata.
+    metadata = (kwargs.get("litellm_params") or {}).get("metadata") or {}
+    role = metadata.get(ROLE_METADATA_KEY)
+    if not role:
+        return
+    profiles = run_state("roles", dict, metadata.get(RUN_METADATA_KEY))
+    if profiles is None:
+        return
+    if kwargs.get("stream") and "complete_streaming_response" not in kwargs:
+        return  # a single chunk; the assembled response is reported once at the end
+    try:
+        seconds = (end_time - start_time).total_seconds()
+    except (TypeError, AttributeError):
+        seconds = 0.0
+    usage = getattr(completion_response, "usage", None)
+    with _PROFILES_LOCK:
+        profile = profiles.setdefault(role, RoleProfile())
+        profile.calls += 1
+        profile.total_seconds += seconds
+        profile.max_seconds = max(profile.max_seconds, seconds)
+        profile.prompt_tokens += int(getattr(usage, "prompt_tokens", 0) or 0)
+        profile.completion_tokens += int(getattr(usage, "completion_tokens", 0) or 0)
+        profile.cost_usd += float(kwargs.get("response_cost") or 0.0)
+
+
+def install_role_profiler() -> None:
+    """Register the profiling callback with LiteLLM once per process."""
+    global _INSTALLED
+    with _PROFILES_LOCK:
+        if _INSTALLED:
+            return
+        import litellm
+
+        litellm.success_callback.append(_record)
+        _INSTALLED = True
+
+
+def get_role_profiles() -> Dict[str, RoleProfile]:
+    """Profiles recorded so far by the current run."""
+    profiles = run_state("roles", dict) or {}
+    with _PROFILES_LOCK:
+        return {role: RoleProfile(**vars(profile)) for role, profile in profiles.items()}
+
+
+def reset_role_profiles() -> None:
+    profiles = run_state("roles", dict)
+    with _PROFILES_LOCK:
+        if profiles is not None:
+            profiles.clear()
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import inspect
 import logging
 import os
+import threading
 from dataclasses import dataclass, field
-from typing import Dict, Any, TYPE_CHECKING
+from typing import Dict, Any, Hashable, Mapping, Optional, TYPE_CHECKING
 
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from crewai.llm import LLM
 
+from config.endpoint_health import MonitoredLLM
+from config.hedging import AGENT_ROLES, HedgedLLM
+from config.llm_cache import CachedLLM, get_llm_cache_mode
+from config.profiling import install_role_profiler
+
 if TYPE_CHECKING:  # pragma: no cover - typing helpers only
     from openai import OpenAI
 
@@ -23,6 +30,20 @@ OPENROUTER_DEFAULT_HEADERS = {
     "X-Title": "Agentic AI Workshop",
 }
 
+logger = logging.getLogger(__name__)
+
+# Process-wide pool of CrewAI LLM clients keyed by their effective configuration, so
+# agents and fallback attempts that resolve to the same settings share one client.
+_LLM_POOL: Dict[Hashable, LLM] = {}
+_LLM_POOL_LOCK = threading.Lock()
+_HTTP_POOL_CONFIGURED = False
+# Newer CrewAI releases route some models to native SDK clients unless told otherwise.
+# The pool, shared HTTP session, cache, hedging and health hooks all sit on LiteLLM.
+_FORCE_LITELLM: Dict[str, Any] = (
+    {"is_litellm": True} if "is_litellm" in inspect.signature(LLM.__new__).parameters else {}
+)
+
+
 def _split_env_list(env_var: str) -> list[str]:
     """Return a sanitized list from a comma-separated environment variable."""
     raw_value = os.getenv(env_var, "")
@@ -52,6 +73,59 @@ class OpenRouterLLMConfig:
     )
 
 
+@dataclass(frozen=True)
+class RoleRoute:
+    """Model and sampling settings for one agent role; ``None`` inherits the attempt's value."""
+
+    model: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+
+    def apply(self, overrides: Mapping[str, Any] | None) -> Dict[str, Any]:
+        """Layer this route over a fallback attempt's overrides.
+
+        The routed model only replaces the primary model: attempts that already name a
+        fallback model keep it, so a failing routed model still falls back.
+        """
+        routed = dict(overrides or {})
+        if self.model and "model" not in routed:
+            routed["model"] = self.model
+        if self.max_tokens is not None:
+            routed["max_tokens"] = self.max_tokens
+        if self.temperature is not None:
+            routed["temperature"] = self.temperature
+        return routed
+
+
+# Per-role routing table. Every role inherits OpenRouterLLMConfig until routed here,
+# through LLM_ROUTE_<ROLE>_MODEL / _MAX_TOKENS / _TEMPERATURE, or through main.py flags.
+ROLE_ROUTES: Dict[str, RoleRoute] = {role: RoleRoute() for role in AGENT_ROLES}
+
+_ROUTE_FIELDS = {"model": str, "max_tokens": int, "temperature": float}
+
+
+def get_role_routes(overrides: Mapping[str, Mapping[str, Any]] | None = None) -> Dict[str, RoleRoute]:
+    """Resolve the routing table: defaults, then environment, then explicit ``overrides``.
+
+    ``overrides`` maps a role to field values, e.g. ``{"planner": {"model": "..."}}``;
+    ``None`` values are ignored.
+    """
+    routes: Dict[str, RoleRoute] = {}
+    for role in AGENT_ROLES:
+        values = dict(vars(ROLE_ROUTES.get(role, RoleRoute())))
+        for name, cast in _ROUTE_FIELDS.items():
+            raw = os.getenv(f"LLM_ROUTE_{role.upper()}_{name.upper()}", "").strip()
+            if raw:
+                values[name] = cast(raw)
+        for name, value in (overrides or {}).get(role, {}).items():
+            if name not in _ROUTE_FIELDS:
+                raise ValueError(f"Unknown route field '{name}' for role '{role}'")
+            if value is not None:
+                values[name] = _ROUTE_FIELDS[name](value)
+        routes[role] = RoleRoute(**values)
+    return routes
+
+
 def get_openrouter_client() -> "OpenAI":
     """Instantiate an OpenAI-compatible client configured for OpenRouter."""
     from openai import OpenAI
@@ -87,8 +161,63 @@ def build_openrouter_chat_llm(**overrides: Any) -> ChatOpenAI:
     )
 
 
+def _freeze(value: Any) -> Hashable:
+    """Turn nested override values into a hashable pool key."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def configure_llm_http_pool() -> None:
+    """Give LiteLLM one shared keep-alive HTTP client with a bounded connection pool.
+
+    Limits come from ``LLM_MAX_CONNECTIONS`` (default 20), ``LLM_MAX_KEEPALIVE_CONNECTIONS``
+    (default 10), ``LLM_KEEPALIVE_EXPIRY_SECONDS`` (default 60) and
+    ``LLM_HTTP_TIMEOUT_SECONDS`` (default 600).
+    """
+    global _HTTP_POOL_CONFIGURED
+    if _HTTP_POOL_CONFIGURED:
+        return
+    with _LLM_POOL_LOCK:
+        if _HTTP_POOL_CONFIGURED:
+            return
+        import httpx
+        import litellm
+
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "60")),
+        )
+        timeout = httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "600")))
+        if litellm.client_session is None:
+            litellm.client_session = httpx.Client(limits=limits, timeout=timeout)
+        if litellm.aclient_session is None:
+            litellm.aclient_session = httpx.AsyncClient(limits=limits, timeout=timeout)
+        _HTTP_POOL_CONFIGURED = True
+        logger.info(
+            "Configured shared LLM HTTP pool (max_connections=%s, keepalive=%s)",
+            limits.max_connections,
+            limits.max_keepalive_connections,
+        )
+
+
+def clear_llm_pool() -> None:
+    """Drop pooled LLM clients, e.g. after rotating the API key in a long-lived process."""
+    with _LLM_POOL_LOCK:
+        _LLM_POOL.clear()
+
+
 def build_crewai_llm(**overrides: Any) -> LLM:
-    """Return a CrewAI LLM instance configured for OpenRouter via LiteLLM."""
+    """Return a CrewAI LLM instance configured for OpenRouter via LiteLLM.
+
+    Instances are pooled by their effective settings: repeated calls with overrides
+    that resolve to the same configuration return the same client. An optional
+    ``hedge_with`` override (another override dict) returns a ``HedgedLLM`` that races
+    that configuration when this one is slow.
+    """
 
     config = OpenRouterLLMConfig()
     if not config.api_key:
@@ -131,7 +260,30 @@ def build_crewai_llm(**overrides: Any) -> LLM:
             )
             llm_kwargs.pop("custom_llm_provider", None)
 
+    if overrides.get("stream"):
+        # Token chunks are published on CrewAI's event bus (see streaming.py).
+        llm_kwargs["stream"] = True
+
     # Allow callers to extend with LiteLLM-specific parameters.
     llm_kwargs.update(overrides.get("litellm_params", {}))
 
-    return LLM(**llm_kwargs)
\ No newline at end of file
+    configure_llm_http_pool()
+    install_role_profiler()
+    hedge_overrides = overrides.get("hedge_with")
+    if hedge_overrides:
+        # The secondary is a plain pooled client; hedges never chain.
+        secondary = build_crewai_llm(**{k: v for k, v in hedge_overrides.items() if k != "hedge_with"})
+        llm_class = HedgedLLM
+    else:
+        secondary = None
+        llm_class = MonitoredLLM if get_llm_cache_mode() == "off" else CachedLLM
+    key = (llm_class.__name__, _freeze(llm_kwargs), _freeze(hedge_overrides or {}))
+    with _LLM_POOL_LOCK:
+        llm = _LLM_POOL.get(key)
+        if llm is None:
+            llm = _LLM_POOL[key] = llm_class(**llm_kwargs, **_FORCE_LITELLM)
+            llm.health_endpoint = (provider_override or "openrouter", str(raw_model), str(base_url))
+            if secondary is not None:
+                llm.hedge_secondary = secondary
+            logger.debug("Created pooled LLM client for %s at %s", model_name, base_url)
+    return llm
@@ -2,15 +2,21 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import Any, Callable, Iterator, Sequence
 
-from crewai import Crew, Process
+from crewai import Crew, Process, Task
+from crewai.tasks.task_output import TaskOutput
 
 # Import the helper function to get all agents
 from agents import get_all_code_agents
 
-from config.settings import OpenRouterLLMConfig
-from tasks import build_code_tasks # Using the corrected tasks function
+from checkpoints import CheckpointStore, new_run_id
+from config.endpoint_health import Endpoint, get_endpoint_health_store
+from config.hedging import get_hedge_stats
+from config.profiling import get_role_profiles, profiling_run
+from config.settings import OpenRouterLLMConfig, RoleRoute, get_role_routes
+from streaming import ATTEMPT_STARTED, EventCallback, PipelineEvent, emit, iterate_events, streaming_to
+from tasks import DEPENDENCY_AUDIT_HEADING, audit_generated_code, build_code_tasks # Using the corrected tasks function
 from tools import (
     get_default_toolkit,
     create_code_syntax_tool,
@@ -21,8 +27,22 @@ from tools import (
 logger = logging.getLogger(__name__)
 
 
-def create_code_development_crew(llm_overrides: dict[str, Any] | None = None) -> Crew:
-    """Instantiate the Code Development Assistant crew with specialized agents and tools."""
+def create_code_development_crew(
+    llm_overrides: dict[str, Any] | None = None,
+    hedge_overrides: dict[str, Any] | None = None,
+    completed_outputs: Sequence[str] | None = None,
+    checkpoints: CheckpointStore | None = None,
+    routes: dict[str, RoleRoute] | None = None,
+) -> Crew:
+    """Instantiate the Code Development Assistant crew with specialized agents and tools.
+
+    ``routes`` assigns a model and sampling settings per agent role (defaults to
+    ``get_role_routes()``). ``hedge_overrides`` names the configuration that hedged
+    agents race when their primary LLM is slow (see ``config.hedging``). ``completed_outputs`` are raw outputs
+    of tasks finished by an earlier attempt: those tasks are skipped and their outputs
+    are fed to the remaining tasks as context. Each task that completes is saved to
+    ``checkpoints``.
+    """
     
     # 1. Define common and specialized toolkits
     default_tools = get_default_toolkit()  # RAG, Web Search, Calculator
@@ -38,7 +58,9 @@ def create_code_development_crew(llm_overrides: dict[str, Any] | None = None) ->
         writer_tools=writer_tools,
         tester_tools=tester_tools,
         reviewer_tools=reviewer_tools,
-        llm_overrides=llm_overrides
+        llm_overrides=llm_overrides,
+        hedge_overrides=hedge_overrides,
+        routes=routes,
     )
     
     # Extract agents from the dictionary
@@ -56,7 +78,15 @@ def create_code_development_crew(llm_overrides: dict[str, Any] | None = None) ->
         code_tester=code_tester,
         code_reviewer=code_reviewer,
     )
-    
+    completed = list(completed_outputs or [])[:len(tasks) - 1]
+    if checkpoints is not None:
+        for position, task in enumerate(tasks[len(completed):], start=len(completed)):
+            task.callback = _checkpointing_callback(
+                task.callback, checkpoints, position, task.name, final=position == len(tasks) - 1
+            )
+    if completed:
+        tasks = _resume_tasks(tasks, completed)
+
     # 4. Instantiate Crew
     return Crew(
         agents=[code_planner, code_writer, code_tester, code_reviewer],
@@ -66,6 +96,53 @@ def create_code_development_crew(llm_overrides: dict[str, Any] | None = None) ->
     )
 
 
+def _checkpointing_callback(
+    callback: Callable[[TaskOutput], Any] | None,
+    checkpoints: CheckpointStore,
+    position: int,
+    task_name: str,
+    *,
+    final: bool,
+) -> Callable[[TaskOutput], None]:
+    """Wrap a task callback so the task's output is checkpointed first."""
+
+    def _save_then_call(output: TaskOutput) -> None:
+        checkpoints.save(position, task_name, output.raw, final=final)
+        if callback is not None:
+            callback(output)
+
+    return _save_then_call
+
+
+def _resume_tasks(tasks: list[Task], completed: Sequence[str]) -> list[Task]:
+    """Attach saved outputs to finished tasks and return the tasks still to run."""
+    for position, raw in enumerate(completed):
+        task = tasks[position]
+        if task.name == "Code Writing":
+            # The writing callback that feeds the reviewer will not fire again; carry
+            # the audit through the context instead.
+            try:
+                report = audit_generated_code(raw)
+            except Exception:  # pragma: no cover - the reviewer can still audit manually
+                logger.exception("Dependency audit for the resumed run failed")
+                report = None
+            if report:
+                raw = raw + DEPENDENCY_AUDIT_HEADING + report
+        task.output = TaskOutput(
+            description=task.description,
+            name=task.name,
+            raw=raw,
+            agent=task.agent.role if task.agent else "",
+        )
+
+    remaining = tasks[len(completed):]
+    for position, task in enumerate(remaining, start=len(completed)):
+        # Sequential runs pass every earlier output as context; keep that for resumed runs.
+        task.context = tasks[:position]
+    logger.info("Resuming crew at task %d/%d (%s)", len(completed) + 1, len(tasks), remaining[0].name)
+    return remaining
+
+
 # The helper functions below (_build_llm_attempts, _sanitize_overrides, _execute_crew)
 # remain largely the same, but we will slightly rename the main runner function 
 # to reflect the new project focus.
@@ -113,6 +190,26 @@ def _build_llm_attempts(config: OpenRouterLLMConfig) -> list[dict[str, Any]]:
     return attempts
 
 
+def _attempt_endpoints(
+    overrides: dict[str, Any], config: OpenRouterLLMConfig, routes: dict[str, RoleRoute]
+) -> list[Endpoint]:
+    """The (provider, model, base_url) endpoint each agent role uses in an attempt.
+
+    Resolved like ``build_crewai_llm``, so they match the endpoints health is recorded under.
+    """
+    endpoints = []
+    for route in routes.values():
+        routed = route.apply(overrides)
+        endpoints.append(
+            (
+                routed.get("provider", "openrouter"),
+                str(routed.get("model", config.model)),
+                str(routed.get("base_url", config.base_url)),
+            )
+        )
+    return endpoints
+
+
 def _sanitize_overrides(overrides: dict[str, Any]) -> dict[str, Any]:
     """Remove verbose or sensitive values before logging overrides."""
 
@@ -124,10 +221,21 @@ def _sanitize_overrides(overrides: dict[str, Any]) -> dict[str, Any]:
 
 
 def _execute_crew(
-    topic: str, overrides: dict[str, Any], config: OpenRouterLLMConfig
+    topic: str,
+    overrides: dict[str, Any],
+    config: OpenRouterLLMConfig,
+    hedge_overrides: dict[str, Any] | None = None,
+    checkpoints: CheckpointStore | None = None,
+    routes: dict[str, RoleRoute] | None = None,
 ) -> str:
     # Changed to use the new code development crew factory
-    crew = create_code_development_crew(llm_overrides=overrides) 
+    crew = create_code_development_crew(
+        llm_overrides=overrides,
+        hedge_overrides=hedge_overrides,
+        completed_outputs=checkpoints.completed() if checkpoints else None,
+        checkpoints=checkpoints,
+        routes=routes,
+    )
     provider_label = overrides.get("provider", "openrouter-liteLLM")
     model_label = overrides.get("model", config.model)
     base_url_label = overrides.get("base_url", config.base_url)
@@ -145,6 +253,8 @@ def _execute_crew(
         task_output = getattr(task, "output", None)
         if task_output:
             logger.info("Task '%s' output:\n%s", task.name, task_output)
+    _log_hedge_stats()
+    _log_role_profiles()
 
     if isinstance(result, str):
         logger.info("Crew completed with final output length=%d characters", len(result))
@@ -161,11 +271,104 @@ def _execute_crew(
     return output_text
 
 
-def run_code_development_pipeline(topic: str) -> str:
-    """Run the code development crew for a given task topic with OpenRouter fallback attempts."""
+def _log_hedge_stats() -> None:
+    for model, stats in get_hedge_stats().items():
+        logger.info(
+            "Hedging for %s: %d calls, %d hedges fired (%.0f%%), %d won by the hedge, %d primary failures, "
+            "%d skipped for lack of a free slot",
+            model,
+            stats.calls,
+            stats.hedges_fired,
+            stats.hedge_rate * 100,
+            stats.hedge_wins,
+            stats.primary_failures,
+            stats.hedges_skipped,
+        )
+
+
+def _log_role_profiles() -> None:
+    for role, profile in get_role_profiles().items():
+        logger.info(
+            "LLM profile for %s: %d calls, mean %.1fs (max %.1fs), %d prompt + %d completion tokens, $%.4f",
+            role,
+            profile.calls,
+            profile.mean_seconds,
+            profile.max_seconds,
+            profile.prompt_tokens,
+            profile.completion_tokens,
+            profile.cost_usd,
+        )
+
+
+def _log_routes(routes: dict[str, RoleRoute], config: OpenRouterLLMConfig) -> None:
+    for role, route in routes.items():
+        logger.info(
+            "Route for %s: model=%s max_tokens=%s temperature=%s",
+            role,
+            route.model or config.model,
+            route.max_tokens if route.max_tokens is not None else config.max_tokens,
+            route.temperature if route.temperature is not None else config.temperature,
+        )
+
+
+def run_code_development_pipeline(
+    topic: str,
+    *,
+    run_id: str | None = None,
+    resume: bool = False,
+    route_overrides: dict[str, dict[str, Any]] | None = None,
+    on_event: EventCallback | None = None,
+) -> str:
+    """Run the code development crew for a given task topic with OpenRouter fallback attempts.
+
+    Each agent role uses its entry of the routing table (see ``get_role_routes``), with
+    ``route_overrides`` taking precedence over the environment.
 
+    Completed tasks are checkpointed under ``run_id``, so a fallback attempt resumes
+    from the first unfinished task instead of rerunning the whole crew. With
+    ``resume=True`` an earlier process's checkpoints for the same ``run_id`` are reused.
+
+    With ``on_event``, agents stream their completions and the callback receives token,
+    tool and task events as they happen (see ``streaming.py``).
+    """
+
+    # Role profiles and hedge counters are collected per run, even with runs in parallel.
+    with profiling_run():
+        if on_event is None:
+            return _run_attempts(topic, run_id, resume, route_overrides, stream=False)
+        with streaming_to(on_event) as tokens_available:
+            return _run_attempts(topic, run_id, resume, route_overrides, stream=tokens_available)
+
+
+def stream_code_development_pipeline(topic: str, **kwargs: Any) -> Iterator[PipelineEvent]:
+    """Run the pipeline in the background, yielding its events; the last one is the result."""
+    return iterate_events(lambda callback: run_code_development_pipeline(topic, on_event=callback, **kwargs))
+
+
+def _run_attempts(
+    topic: str,
+    run_id: str | None,
+    resume: bool,
+    route_overrides: dict[str, dict[str, Any]] | None,
+    *,
+    stream: bool,
+) -> str:
     config = OpenRouterLLMConfig()
-    attempts = _build_llm_attempts(config)
+    routes = get_role_routes(route_overrides)
+    _log_routes(routes, config)
+    # Skip attempts that would hit an open circuit and try the fastest healthy ones first.
+    attempts = get_endpoint_health_store().rank(
+        _build_llm_attempts(config), lambda overrides: _attempt_endpoints(overrides, config, routes)
+    )
+    checkpoints = CheckpointStore(run_id or new_run_id(topic), topic)
+    checkpoints.start(resume=resume)
+    logger.info("Pipeline run id: %s", checkpoints.run_id)
+
+    finished = checkpoints.final_output()
+    if finished is not None:
+        logger.info("Run %s already completed; returning its saved output", checkpoints.run_id)
+        checkpoints.clear()
+        return finished
 
     last_error: Exception | None = None
     total_attempts = len(attempts)
@@ -179,7 +382,12 @@ def run_code_development_pipeline(topic: str) -> str:
                     total_attempts,
                     _sanitize_overrides(overrides),
                 )
-            result = _execute_crew(topic, overrides, config)
+            emit(PipelineEvent(ATTEMPT_STARTED, data={"attempt": index, "total": total_attempts}))
+            # Hedged agents race the next configuration in the chain.
+            hedge_overrides = attempts[index] if index < total_attempts else None
+            # Only the primary streams: chunks from a racing hedge would interleave with its own.
+            crew_overrides = {**overrides, "stream": True} if stream else overrides
+            result = _execute_crew(topic, crew_overrides, config, hedge_overrides, checkpoints, routes)
             if index > 1:
                 logger.info(
                     "Fallback succeeded on attempt %d/%d with overrides: %s",
@@ -187,6 +395,7 @@ def run_code_development_pipeline(topic: str) -> str:
                     total_attempts,
                     _sanitize_overrides(overrides),
                 )
+            checkpoints.clear()
             return result
         except Exception as exc:  # pragma: no cover - runtime resilience path
             last_error = exc
@@ -198,4 +407,8 @@ def run_code_development_pipeline(topic: str) -> str:
             )
 
     assert last_error is not None  # defensive: should be set if all attempts failed
-    raise last_error
\ No newline at end of file
+    logger.error(
+        "All attempts failed; completed tasks are kept. Retry with --run-id %s --resume",
+        checkpoints.run_id,
+    )
+    raise last_error
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import sys
 import os
+import time
 import streamlit as st # Import streamlit early
 
 # --- 1. SECRETS INJECTION (CRITICAL FIX) ---
@@ -25,7 +26,8 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
 # 4. Import Backend (Now safe because os.environ is set)
-from main import run_pipeline 
+from main import stream_pipeline
+from streaming import ATTEMPT_STARTED, RESULT, TASK_COMPLETED, TASK_STARTED, TOKEN, TOOL_STARTED
 
 # Load local .env if present (for local development)
 load_dotenv()
@@ -62,6 +64,18 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Redraw streamed text at most this often; every token would make Streamlit stutter.
+LIVE_REFRESH_SECONDS = 0.25
+
+
+def render_sections(placeholder, sections: list[dict]) -> None:
+    """Show each task's streamed output under its own heading."""
+    placeholder.markdown(
+        "\n\n".join(f"#### {section['heading']}\n\n{section['text']}" for section in sections)
+        or "_Waiting for the first agent..._"
+    )
+
+
 # --- SIDEBAR CONFIGURATION ---
 default_topic = "Develop a secure Python function to sanitize user input for SQL injection."
 
@@ -118,17 +132,52 @@ if run_button:
         st.progress(100, text="Pipeline complete! Reviewing final output...")
 
 
+    with tab_workflow:
+        st.markdown("### Live Tool Activity")
+        activity = st.empty()
+    with tab_result:
+        live_output = st.empty()
+
+    output = None
+    sections: list[dict] = []
+    tool_calls: list[str] = []
     with st.spinner("Agents are collaborating on the task..."):
         try:
-            # 1. Execute the full pipeline
-            output = run_pipeline(topic)
-            
+            # 1. Execute the full pipeline, rendering agent output as it streams in
+            last_refresh = 0.0
+            for event in stream_pipeline(topic):
+                if event.kind == TOKEN:
+                    if not sections or sections[-1]["done"]:
+                        sections.append({"heading": event.agent or "Agent", "text": "", "done": False})
+                    sections[-1]["text"] += event.text
+                    if time.monotonic() - last_refresh < LIVE_REFRESH_SECONDS:
+                        continue
+                elif event.kind == TASK_STARTED:
+                    sections.append({"heading": f"{event.task} ({event.agent})", "text": "", "done": False})
+                elif event.kind == TASK_COMPLETED and sections:
+                    sections[-1].update(text=event.text or sections[-1]["text"], done=True)
+                elif event.kind == ATTEMPT_STARTED and event.data["attempt"] > 1:
+                    # A fallback attempt redoes the unfinished task; drop its partial output.
+                    sections = [section for section in sections if section["done"]]
+                    tool_calls.append(f"Retrying with fallback attempt {event.data['attempt']}/{event.data['total']}")
+                elif event.kind == TOOL_STARTED:
+                    tool_calls.append(f"**{event.agent or 'Agent'}** → `{event.data.get('tool')}`")
+                    activity.markdown("\n".join(f"- {line}" for line in tool_calls))
+                elif event.kind == RESULT:
+                    output = event.text
+                render_sections(live_output, sections)
+                last_refresh = time.monotonic()
+
         except Exception as exc:
             st.error(f"Pipeline execution failed: {exc}")
             output = None # Clear output if failed
             
     # 2. Display the Final Output
     with tab_result:
+        live_output.empty()
+        if sections:
+            with st.expander("Agent transcript", expanded=output is None):
+                render_sections(st.empty(), sections)
         if output:
             st.success("✅ Code Development Complete!")
             st.markdown("### Final Consolidated Output (Reviewed Deliverable)")
@@ -3,19 +3,75 @@ from __future__ import annotations
 
 import argparse
 import logging
+import sys
+from typing import Any, Iterator
 
 from dotenv import load_dotenv
 
-from crew import run_code_development_pipeline # Renamed Import
+from crew import run_code_development_pipeline, stream_code_development_pipeline # Renamed Import
+from config.hedging import AGENT_ROLES
 from config.logging_config import configure_logging
+from streaming import (
+    ATTEMPT_STARTED,
+    RESULT,
+    TASK_STARTED,
+    TOKEN,
+    TOOL_FINISHED,
+    TOOL_STARTED,
+    PipelineEvent,
+)
 
 
-def run_pipeline(topic: str) -> str:
+def run_pipeline(
+    topic: str,
+    *,
+    run_id: str | None = None,
+    resume: bool = False,
+    route_overrides: dict[str, dict[str, Any]] | None = None,
+) -> str:
     """Run the configured crew against the provided coding task topic."""
     load_dotenv()
     configure_logging()
     logging.getLogger(__name__).info("Starting Code Development pipeline for topic: %s", topic)
-    return run_code_development_pipeline(topic) # Renamed Function Call
+    return run_code_development_pipeline(
+        topic, run_id=run_id, resume=resume, route_overrides=route_overrides
+    ) # Renamed Function Call
+
+
+def stream_pipeline(
+    topic: str,
+    *,
+    run_id: str | None = None,
+    resume: bool = False,
+    route_overrides: dict[str, dict[str, Any]] | None = None,
+) -> Iterator[PipelineEvent]:
+    """Like ``run_pipeline``, but yield token, tool and task events while the crew runs."""
+    load_dotenv()
+    configure_logging()
+    logging.getLogger(__name__).info("Streaming Code Development pipeline for topic: %s", topic)
+    return stream_code_development_pipeline(
+        topic, run_id=run_id, resume=resume, route_overrides=route_overrides
+    )
+
+
+def _render_stream(events: Iterator[PipelineEvent]) -> None:
+    """Write streamed events to stdout; print the result only if no tokens arrived."""
+    streamed_tokens = False
+    for event in events:
+        if event.kind == TOKEN:
+            streamed_tokens = True
+            sys.stdout.write(event.text)
+        elif event.kind == TASK_STARTED:
+            sys.stdout.write(f"\n\n=== {event.agent or 'Agent'}: {event.task or 'task'} ===\n")
+        elif event.kind == TOOL_STARTED:
+            sys.stdout.write(f"\n[tool] {event.data.get('tool')} {event.text}\n")
+        elif event.kind == TOOL_FINISHED:
+            sys.stdout.write(f"[tool] {event.data.get('tool')} finished\n")
+        elif event.kind == ATTEMPT_STARTED and event.data.get("attempt", 1) > 1:
+            sys.stdout.write(f"\n\n--- retrying with fallback attempt {event.data['attempt']}/{event.data['total']} ---\n")
+        elif event.kind == RESULT:
+            sys.stdout.write("\n" if streamed_tokens else f"{event.text}\n")
+        sys.stdout.flush()
 
 
 def _parse_args() -> argparse.Namespace:
@@ -26,10 +82,48 @@ def _parse_args() -> argparse.Namespace:
         default="Create a Python function to check if a string is a palindrome.", 
         help="The coding task to guide the crew's planning and implementation.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--run-id",
+        default=None,
+        help="Identifier for task checkpoints; defaults to a new timestamped id.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse completed tasks checkpointed under --run-id by an earlier run.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print agent output token by token, with tool calls, as the crew runs.",
+    )
+    routing = parser.add_argument_group("per-agent routing", "Override LLM_ROUTE_<ROLE>_* for one run.")
+    for role in AGENT_ROLES:
+        routing.add_argument(f"--{role}-model", default=None, help=f"Model for the {role} agent.")
+        routing.add_argument(f"--{role}-max-tokens", type=int, default=None, help=f"max_tokens for the {role} agent.")
+        routing.add_argument(f"--{role}-temperature", type=float, default=None, help=f"Temperature for the {role} agent.")
+    args = parser.parse_args()
+    if args.resume and not args.run_id:
+        parser.error("--resume requires --run-id")
+    return args
+
+
+def _route_overrides(args: argparse.Namespace) -> dict[str, dict[str, Any]]:
+    return {
+        role: {
+            "model": getattr(args, f"{role}_model"),
+            "max_tokens": getattr(args, f"{role}_max_tokens"),
+            "temperature": getattr(args, f"{role}_temperature"),
+        }
+        for role in AGENT_ROLES
+    }
 
 
 if __name__ == "__main__":
     args = _parse_args()
-    output = run_pipeline(args.topic)
-    print(output)
\ No newline at end of file
+    options = {"run_id": args.run_id, "resume": args.resume, "route_overrides": _route_overrides(args)}
+    if args.stream:
+        _render_stream(stream_pipeline(args.topic, **options))
+    else:
+        output = run_pipeline(args.topic, **options)
+        print(output)
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""Compare FAISS index types on the local docstore: recall@k, query latency and size.
+
+Quantized storage modes (``storage=fp16|sq8|pq``) are benchmarked the same way, so the
+report shows both the memory saved relative to raw float32 vectors and the recall cost.
+
+Ground truth comes from an exact flat index over the same vectors. Queries are a
+random sample of stored chunk embeddings unless ``--queries-file`` supplies one
+natural-language query per line, which is then embedded with the store's model.
+
+    python rag/benchmark_index.py --specs flat flat:storage=sq8 hnsw:storage=sq8 ivf-pq --k 4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from tools.rag_tool import DEFAULT_EMBEDDING_MODEL
+from tools.vector_store import (
+    DOCSTORE_FILE,
+    IndexSpec,
+    build_flat_index,
+    build_index,
+    connect_docstore,
+    full_precision_bytes,
+    index_size_bytes,
+)
+
+VECTORSTORE_DIR = Path(__file__).resolve().parent / "vectorstore"
+DEFAULT_SPECS = ("flat", "flat:storage=fp16", "flat:storage=sq8", "ivf-flat", "hnsw", "ivf-pq")
+
+
+@dataclass
+class BenchmarkResult:
+    spec: IndexSpec
+    recall: float
+    p50_ms: float
+    p99_ms: float
+    size_bytes: int
+    full_precision_bytes: int
+    build_seconds: float
+
+    @property
+    def memory_saved(self) -> float:
+        """Fraction of the raw float32 vector memory saved by this index."""
+        if not self.full_precision_bytes:
+            return 0.0
+        return 1.0 - self.size_bytes / self.full_precision_bytes
+
+
+def _load_queries(conn, count: int, queries_file: Path | None, embedding_model: str) -> np.ndarray:
+    if queries_file is not None:
+        from tools.vectorstore_registry import get_shared_embeddings
+
+        lines = [line.strip() for line in queries_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+        vectors = get_shared_embeddings(embedding_model).embed_documents(lines)
+        return np.asarray(vectors, dtype="float32")
+
+    rows = conn.execute("SELECT embedding FROM chunks ORDER BY RANDOM() LIMIT ?", (count,)).fetchall()
+    return np.vstack([np.frombuffer(row[0], dtype="float32") for row in rows])
+
+
+def _search_latencies(index, queries: np.ndarray, k: int) -> tuple[np.ndarray, List[float]]:
+    """Run queries one at a time (as the RAG tool does) and record per-query latency."""
+    results = np.empty((len(queries), k), dtype="int64")
+    latencies: List[float] = []
+    for position, query in enumerate(queries):
+        started = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results[position] = ids[0]
+    return results, latencies
+
+
+def _recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = 0
+    total = 0
+    for expected, actual in zip(truth, found):
+        expected_ids = {int(i) for i in expected if i != -1}
+        hits += len(expected_ids & {int(i) for i in actual if i != -1})
+        total += len(expected_ids)
+    return hits / total if total else 0.0
+
+
+def run_benchmark(
+    specs: Sequence[IndexSpec],
+    *,
+    vectorstore_dir: Path = VECTORSTORE_DIR,
+    k: int = 4,
+    query_count: int = 200,
+    queries_file: Path | None = None,
+    embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+) -> List[BenchmarkResult]:
+    docstore_path = vectorstore_dir / DOCSTORE_FILE
+    if not docstore_path.exists():
+        raise FileNotFoundError(
+            f"No docstore at {docstore_path}. Run 'python rag/build_vector_db.py' first."
+        )
+
+    conn = connect_docstore(docstore_path, read_only=True)
+    try:
+        row = conn.execute("SELECT embedding FROM chunks LIMIT 1").fetchone()
+        if row is None:
+            raise ValueError(f"Docstore at {docstore_path} is empty")
+        dimension = len(row[0]) // 4
+
+        queries = _load_queries(conn, query_count, queries_file, embedding_model)
+        ground_truth, _ = _search_latencies(build_flat_index(conn, dimension), queries, k)
+
+        results: List[BenchmarkResult] = []
+        for requested in specs:
+            started = time.perf_counter()
+            index, spec = build_index(conn, dimension, requested)
+            build_seconds = time.perf_counter() - started
+            found, latencies = _search_latencies(index, queries, k)
+            results.append(
+                BenchmarkResult(
+                    spec=spec,
+                    recall=_recall_at_k(ground_truth, found),
+                    p50_ms=float(np.percentile(latencies, 50)),
+                    p99_ms=float(np.percentile(latencies, 99)),
+                    size_bytes=index_size_bytes(index),
+                    full_precision_bytes=full_precision_bytes(index),
+                    build_seconds=build_seconds,
+                )
+            )
+        return results
+    finally:
+        conn.close()
+
+
+def format_report(results: Sequence[BenchmarkResult], k: int) -> str:
+    header = (
+        f"{'index':<14} {'recall@' + str(k):>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'size MiB':>9} {'saved':>7} {'build s':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result.spec.label:<14} {result.recall:>9.3f} {result.p50_ms:>8.3f} {result.p99_ms:>8.3f} "
+            f"{result.size_bytes / (1024 * 1024):>9.2f} {result.memory_saved:>7.1%} {result.build_seconds:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against the flat baseline.")
+    parser.add_argument("--specs", nargs="+", default=list(DEFAULT_SPECS), help="Index specs to compare.")
+    parser.add_argument("--k", type=int, default=4, help="Number of neighbours per query.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled query vectors.")
+    parser.add_argument("--queries-file", type=Path, default=None, help="Text file with one query per line.")
+    parser.add_argument("--vectorstore", type=Path, default=VECTORSTORE_DIR)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    benchmark = run_benchmark(
+        [IndexSpec.parse(spec) for spec in args.specs],
+        vectorstore_dir=args.vectorstore,
+        k=args.k,
+        query_count=args.queries,
+        queries_file=args.queries_file,
+    )
+    print(format_report(benchmark, args.k))
@@ -1,45 +1,498 @@
-"""Utility script to build the FAISS vector store backing the local RAG tool."""
+"""Utility script to build the FAISS vector store backing the local RAG tool.
+
+The store consists of ``index.faiss`` (vectors only, keyed by docstore row id) and
+``docstore.sqlite`` (chunk text, metadata, the float32 embedding of each chunk and an
+FTS5 BM25 keyword index used for hybrid retrieval).
+The index is always regenerated from the docstore, so no chunk is embedded twice.
+
+The build is incremental: every document under ``rag/documents/`` is hashed, split
+into chunks and each chunk is identified by a content hash. A manifest stored next
+to the FAISS index records which chunks are already embedded, so a rebuild only
+embeds new or changed chunks and deletes the vectors of chunks that disappeared.
+
+The manifest is also the commit record of a build. A build stamps a fresh build id
+into the staged docstore. It then moves the docstore and the index into place and
+atomically replaces the manifest, which carries the build id and the index's SHA-256.
+Readers and later builds only trust a docstore and index that match the manifest.
+
+Large corpora can be ingested with ``--workers N``: chunks are produced lazily,
+embedded in fixed-size batches by a process pool and appended to the index batch
+by batch, printing throughput as it goes.
+"""
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
+import os
+import shutil
 import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple
 
+import faiss
+from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
 from tools.rag_tool import DEFAULT_EMBEDDING_MODEL
+from tools.vector_store import (
+    DOCSTORE_FILE,
+    INDEX_FILE,
+    LEGACY_DOCSTORE_FILE,
+    MANIFEST_FILE,
+    IndexSpec,
+    build_bm25_index,
+    build_index,
+    connect_docstore,
+    encode_vector,
+    file_sha256,
+    index_stamp,
+    full_precision_bytes,
+    index_size_bytes,
+    has_sqlite_docstore,
+    read_manifest,
+    store_matches_manifest,
+    write_build_id,
+)
+from tools.vectorstore_registry import get_shared_embeddings
 
 BASE_DIR = Path(__file__).resolve().parent
 DOCUMENTS_DIR = BASE_DIR / "documents"
 VECTORSTORE_DIR = BASE_DIR / "vectorstore"
-DEFAULT_DOC = DOCUMENTS_DIR / "sample_docs.txt"
+MANIFEST_NAME = MANIFEST_FILE
+MANIFEST_FORMAT = 2
+DOCUMENT_SUFFIXES = {".txt", ".md", ".rst"}
+
+
+@dataclass
+class BuildReport:
+    """Summary of what an (incremental) build changed."""
+
+    added: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    files: int = 0
+    full_rebuild: bool = False
+    index_version: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class _Chunk:
+    chunk_id: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def iter_document_files(source: Path) -> Iterator[Path]:
+    """Yield the document files under ``source`` (or ``source`` itself) in a stable order."""
+    if source.is_file():
+        yield source
+        return
+    for path in sorted(source.rglob("*")):
+        if path.is_file() and path.suffix.lower() in DOCUMENT_SUFFIXES:
+            yield path
+
+
+def _relative_name(path: Path, root: Path) -> str:
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return path.name
+
+
+def _chunk_document(relative_name: str, text: str, splitter: RecursiveCharacterTextSplitter) -> List[_Chunk]:
+    """Split a document and assign each chunk a content-derived identifier."""
+    chunks: List[_Chunk] = []
+    occurrences: Dict[str, int] = {}
+    for chunk_text in splitter.split_text(text):
+        digest = _sha256(f"{relative_name}\0{chunk_text}")
+        # Identical chunks within one file still need distinct ids.
+        occurrence = occurrences.get(digest, 0)
+        occurrences[digest] = occurrence + 1
+        chunk_id = digest if occurrence == 0 else f"{digest}-{occurrence}"
+        chunks.append(
+            _Chunk(
+                chunk_id=chunk_id,
+                text=chunk_text,
+                metadata={"source": relative_name, "chunk_id": chunk_id},
+            )
+        )
+    return chunks
+
+
+def load_manifest(vectorstore_dir: Path = VECTORSTORE_DIR) -> Dict[str, Any] | None:
+    """Return the manifest stored next to the index, or ``None`` if there is none."""
+    return read_manifest(vectorstore_dir)
+
+
+def _manifest_is_compatible(
+    manifest: Dict[str, Any] | None,
+    vectorstore_dir: Path,
+    *,
+    embedding_model: str,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> bool:
+    if not manifest or manifest.get("format") != MANIFEST_FORMAT:
+        return False
+    if not has_sqlite_docstore(vectorstore_dir):
+        return False
+    # A build that crashed before publishing its manifest leaves files the manifest
+    # does not describe; only a fully published build can be updated incrementally.
+    if "build_id" not in manifest or not store_matches_manifest(vectorstore_dir, manifest):
+        return False
+    return (
+        manifest.get("embedding_model") == embedding_model
+        and manifest.get("chunk_size") == chunk_size
+        and manifest.get("chunk_overlap") == chunk_overlap
+    )
+
+
+def _batched(items: Iterable[_Chunk], size: int) -> Iterator[List[_Chunk]]:
+    batch: List[_Chunk] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_WORKER_EMBEDDINGS: Embeddings | None = None
+
+
+def _init_embedding_worker(model_name: str, threads: int) -> None:
+    """Load the embedding model once per worker process and cap its thread count."""
+    global _WORKER_EMBEDDINGS
+    os.environ["RAG_ONNX_THREADS"] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:  # torch is not needed by the onnx backend
+        pass
+    _WORKER_EMBEDDINGS = get_shared_embeddings(model_name)
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    assert _WORKER_EMBEDDINGS is not None, "embedding worker was not initialised"
+    return _WORKER_EMBEDDINGS.embed_documents(texts)
+
 
+def _embed_stream(
+    chunks: Iterable[_Chunk],
+    *,
+    embeddings: Embeddings,
+    embedding_model: str,
+    batch_size: int,
+    workers: int,
+) -> Iterator[Tuple[List[_Chunk], List[List[float]]]]:
+    """Embed ``chunks`` in fixed-size batches, optionally spread over a process pool.
 
-def build_vector_store(doc_path: Path = DEFAULT_DOC, *, chunk_size: int = 600, chunk_overlap: int = 50) -> None:
-    """Build a FAISS index from the supplied document."""
-    if not doc_path.exists():
-        raise FileNotFoundError(f"Document source not found at {doc_path}")
+    At most ``2 * workers`` batches are in flight at any time, so memory stays bounded
+    no matter how large the corpus is. Batches are yielded in input order.
+    """
+    batches = _batched(chunks, batch_size)
+    if workers <= 1:
+        for batch in batches:
+            yield batch, embeddings.embed_documents([chunk.text for chunk in batch])
+        return
+
+    threads_per_worker = max(1, (os.cpu_count() or workers) // workers)
+    in_flight: Deque[Tuple[List[_Chunk], Future]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_embedding_worker,
+        initargs=(embedding_model, threads_per_worker),
+    ) as pool:
+        for batch in batches:
+            in_flight.append((batch, pool.submit(_embed_batch, [chunk.text for chunk in batch])))
+            if len(in_flight) >= workers * 2:
+                done, future = in_flight.popleft()
+                yield done, future.result()
+        while in_flight:
+            done, future = in_flight.popleft()
+            yield done, future.result()
+
+
+def build_vector_store(
+    source: Path = DOCUMENTS_DIR,
+    *,
+    vectorstore_dir: Path = VECTORSTORE_DIR,
+    chunk_size: int = 600,
+    chunk_overlap: int = 50,
+    embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+    rebuild: bool = False,
+    batch_size: int = 64,
+    workers: int = 1,
+    index_spec: IndexSpec | str = "flat",
+) -> BuildReport:
+    """Build or incrementally update the FAISS index from the documents under ``source``.
+
+    Changed documents are chunked lazily and embedded in batches of ``batch_size``;
+    with ``workers > 1`` the batches are embedded by a pool of worker processes and
+    written to the docstore as they complete, so neither text nor vectors pile up in memory.
+    """
+    if not source.exists():
+        raise FileNotFoundError(f"Document source not found at {source}")
+
+    if isinstance(index_spec, str):
+        index_spec = IndexSpec.parse(index_spec)
+
+    started = time.perf_counter()
+    root = source if source.is_dir() else source.parent
+    previous = None if rebuild else load_manifest(vectorstore_dir)
+    incremental = _manifest_is_compatible(
+        previous,
+        vectorstore_dir,
+        embedding_model=embedding_model,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+    previous_files: Dict[str, Any] = previous.get("files", {}) if incremental and previous else {}
+    existing_ids = {
+        chunk_id for entry in previous_files.values() for chunk_id in entry.get("chunks", [])
+    }
 
-    text = doc_path.read_text(encoding="utf-8")
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         separators=["\n\n", "\n", " "],
     )
-    chunks = splitter.split_text(text)
 
-    embeddings = HuggingFaceEmbeddings(model_name=DEFAULT_EMBEDDING_MODEL)
-    vector_store = FAISS.from_texts(chunks, embedding=embeddings)
+    # First pass: hash every file; unchanged files keep the chunk ids from the manifest.
+    manifest_files: Dict[str, Any] = {}
+    changed: List[Tuple[str, Path]] = []
+    for path in iter_document_files(source):
+        relative_name = _relative_name(path, root)
+        file_hash = _sha256(path.read_text(encoding="utf-8"))
+        known = previous_files.get(relative_name)
+        if known and known.get("sha256") == file_hash:
+            manifest_files[relative_name] = {"sha256": file_hash, "chunks": list(known.get("chunks", []))}
+        else:
+            manifest_files[relative_name] = {"sha256": file_hash, "chunks": []}
+            changed.append((relative_name, path))
+
+    seen_ids: set[str] = set()
+
+    def iter_new_chunks() -> Iterator[_Chunk]:
+        for relative_name, path in changed:
+            chunks = _chunk_document(relative_name, path.read_text(encoding="utf-8"), splitter)
+            manifest_files[relative_name]["chunks"] = [chunk.chunk_id for chunk in chunks]
+            for chunk in chunks:
+                # A changed file can still contain chunks that are already embedded.
+                if chunk.chunk_id in existing_ids or chunk.chunk_id in seen_ids:
+                    continue
+                seen_ids.add(chunk.chunk_id)
+                yield chunk
+
+    # When only the index structure changes, the docstore is reused and nothing is re-embedded.
+    same_index = bool(previous) and previous.get("index_request") == index_spec.to_dict()
+    if incremental and same_index and not changed and manifest_files.keys() == previous_files.keys():
+        unchanged = sum(len(entry["chunks"]) for entry in manifest_files.values())
+        print(f"Vector store at {vectorstore_dir} is up to date ({unchanged} chunks).")
+        return BuildReport(
+            unchanged=unchanged,
+            files=len(manifest_files),
+            index_version=int(previous.get("index_version", 0)),
+            seconds=time.perf_counter() - started,
+        )
+
+    vectorstore_dir.mkdir(parents=True, exist_ok=True)
+    docstore_path = vectorstore_dir / DOCSTORE_FILE
+    staging_docstore = vectorstore_dir / f"{DOCSTORE_FILE}.tmp"
+    staging_index = vectorstore_dir / f"{INDEX_FILE}.tmp"
+    staging_docstore.unlink(missing_ok=True)
+    # Changes are applied to a staging copy so readers never see a half-updated store.
+    if incremental:
+        shutil.copyfile(docstore_path, staging_docstore)
+    conn = connect_docstore(staging_docstore)
+
+    # Backends load their model on the first embed call, so an index-only rebuild never does.
+    embeddings = get_shared_embeddings(embedding_model)
+    added = 0
+    last_report = time.perf_counter()
+    try:
+        for batch, vectors in _embed_stream(
+            iter_new_chunks(),
+            embeddings=embeddings,
+            embedding_model=embedding_model,
+            batch_size=batch_size,
+            workers=workers,
+        ):
+            conn.executemany(
+                "INSERT INTO chunks (chunk_id, source, text, metadata, embedding) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        chunk.chunk_id,
+                        chunk.metadata["source"],
+                        chunk.text,
+                        json.dumps(chunk.metadata),
+                        encode_vector(vector),
+                    )
+                    for chunk, vector in zip(batch, vectors)
+                ],
+            )
+            conn.commit()
+
+            added += len(batch)
+            now = time.perf_counter()
+            if now - last_report >= 5.0:
+                last_report = now
+                rate = added / max(now - started, 1e-9)
+                print(f"  embedded {added} chunks ({rate:.1f} chunks/s)")
+
+        desired_ids = {chunk_id for entry in manifest_files.values() for chunk_id in entry["chunks"]}
+        if not desired_ids:
+            raise ValueError(f"No document chunks found under {source}")
 
-    VECTORSTORE_DIR.mkdir(parents=True, exist_ok=True)
-    vector_store.save_local(str(VECTORSTORE_DIR))
-    print(f"Vector store saved to {VECTORSTORE_DIR}")
+        to_remove = sorted(existing_ids - desired_ids)
+        report = BuildReport(
+            added=added,
+            removed=len(to_remove),
+            unchanged=len(desired_ids) - added,
+            files=len(manifest_files),
+            full_rebuild=not incremental,
+        )
+
+        if to_remove:
+            conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in to_remove])
+            conn.commit()
+
+        row = conn.execute("SELECT embedding FROM chunks LIMIT 1").fetchone()
+        dimension = len(row[0]) // 4
+        index, effective_spec = build_index(conn, dimension, index_spec)
+        faiss.write_index(index, str(staging_index))
+        index_bytes = index_size_bytes(index)
+        raw_bytes = full_precision_bytes(index)
+        has_bm25 = build_bm25_index(conn)
+        build_id = uuid.uuid4().hex
+        write_build_id(conn, build_id)
+        conn.execute("VACUUM")
+        conn.close()
+        index_sha256 = file_sha256(staging_index)
+        staged_index_stamp = index_stamp(staging_index)
+    except BaseException:
+        conn.close()
+        staging_docstore.unlink(missing_ok=True)
+        staging_index.unlink(missing_ok=True)
+        raise
+
+    os.replace(staging_docstore, docstore_path)
+    os.replace(staging_index, vectorstore_dir / INDEX_FILE)
+    (vectorstore_dir / LEGACY_DOCSTORE_FILE).unlink(missing_ok=True)
+
+    report.index_version = (int(previous.get("index_version", 0)) if previous else 0) + 1
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "build_id": build_id,
+        "index_sha256": index_sha256,
+        "index_stamp": staged_index_stamp,
+        "index_version": report.index_version,
+        "embedding_model": embedding_model,
+        "dimension": dimension,
+        "index_request": index_spec.to_dict(),
+        "index": effective_spec.to_dict(),
+        "bm25": has_bm25,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "files": manifest_files,
+    }
+    # Publishing the manifest commits the build; until then readers reject the new files.
+    staging_manifest = vectorstore_dir / f"{MANIFEST_NAME}.tmp"
+    staging_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(staging_manifest, vectorstore_dir / MANIFEST_NAME)
+
+    report.seconds = time.perf_counter() - started
+    mode = "Full rebuild" if report.full_rebuild else "Incremental update"
+    rate = report.added / max(report.seconds, 1e-9)
+    print(
+        f"{mode} of {vectorstore_dir}: {report.added} chunks embedded, {report.removed} removed, "
+        f"{report.unchanged} unchanged across {report.files} files in {report.seconds:.1f}s "
+        f"({rate:.1f} chunks/s); index type {effective_spec.label}"
+    )
+    if effective_spec.codec != "fp32" and raw_bytes:
+        print(
+            f"Quantized index is {index_bytes / (1024 * 1024):.2f} MiB vs "
+            f"{raw_bytes / (1024 * 1024):.2f} MiB of float32 vectors "
+            f"({1 - index_bytes / raw_bytes:.0%} saved). "
+            "Run rag/benchmark_index.py to measure the recall cost."
+        )
+    return report
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the FAISS vector store for the local RAG tool.")
+    parser.add_argument(
+        "--source",
+        type=Path,
+        default=DOCUMENTS_DIR,
+        help="Directory (or single file) with the documents to index.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=600)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Ignore the manifest and re-embed every chunk.",
+    )
+    parser.add_argument(
+        "--index",
+        default="flat",
+        help=(
+            "Index structure: flat, ivf-flat, hnsw or ivf-pq, optionally with options, "
+            "e.g. 'ivf-pq:nlist=256,pq_m=16,nprobe=12' or 'hnsw:hnsw_m=32,ef_search=96'. "
+            "Add storage=fp16, sq8 or pq to quantize the stored vectors, e.g. 'flat:storage=sq8'."
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=64,
+        help="Number of chunks embedded per batch.",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Hash the published index and docstore against the manifest instead of building.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Embedding worker processes; values above 1 stream batches through a process pool.",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    build_vector_store()
+    args = _parse_args()
+    if args.verify:
+        consistent = store_matches_manifest(VECTORSTORE_DIR, read_manifest(VECTORSTORE_DIR), verify=True)
+        print(f"Vector store at {VECTORSTORE_DIR} {'matches' if consistent else 'does NOT match'} its manifest.")
+        raise SystemExit(0 if consistent else 1)
+    build_vector_store(
+        args.source,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        rebuild=args.rebuild,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        index_spec=args.index,
+    )
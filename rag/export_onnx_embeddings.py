@@ -0,0 +1,156 @@
+"""Export the RAG embedding model to ONNX (fp32 + dynamic int8) and verify it.
+
+The exported model is used by the ``onnx`` embedding backend
+(``RAG_EMBEDDING_BACKEND=onnx``), which avoids importing torch at query time. After the
+export, a sample of document chunks is embedded with both the original
+sentence-transformers model and the ONNX model; the export fails if any pair falls
+below the cosine-similarity tolerance, so an existing index stays searchable.
+
+Exporting needs the full build environment (torch, transformers, onnx, onnxruntime):
+
+    python rag/export_onnx_embeddings.py --tolerance 0.99
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from tools.embeddings import (
+    DEFAULT_ONNX_MODEL_DIR,
+    ONNX_EXPORT_METADATA_FILE,
+    ONNX_MODEL_FILE,
+    ONNX_QUANTIZED_MODEL_FILE,
+    LazyHuggingFaceEmbeddings,
+    OnnxEmbeddings,
+)
+from tools.rag_tool import DEFAULT_EMBEDDING_MODEL
+
+DOCUMENTS_DIR = Path(__file__).resolve().parent / "documents"
+
+
+def export_model(model_name: str, output_dir: Path, *, opset: int = 17) -> Path:
+    """Export the transformer encoder of ``model_name`` to ONNX with dynamic batch/sequence axes."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    model_path = output_dir / ONNX_MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    # save_pretrained writes tokenizer.json for fast tokenizers.
+    tokenizer.save_pretrained(str(output_dir))
+    return model_path
+
+
+def quantize_model(model_path: Path) -> Path:
+    """Write a dynamically int8-quantized copy of ``model_path`` next to it."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = model_path.with_name(ONNX_QUANTIZED_MODEL_FILE)
+    quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def _sample_texts(limit: int) -> List[str]:
+    texts: List[str] = []
+    for path in sorted(DOCUMENTS_DIR.glob("*.txt")):
+        for paragraph in path.read_text(encoding="utf-8").split("\n\n"):
+            if paragraph.strip():
+                texts.append(paragraph.strip())
+    texts.extend(["pytest fixture scope", "SQL injection parameterized queries"])
+    return texts[:limit]
+
+
+def _min_cosine(reference: List[List[float]], candidate: List[List[float]]) -> float:
+    ref = np.asarray(reference, dtype="float32")
+    cand = np.asarray(candidate, dtype="float32")
+    ref /= np.linalg.norm(ref, axis=1, keepdims=True)
+    cand /= np.linalg.norm(cand, axis=1, keepdims=True)
+    return float((ref * cand).sum(axis=1).min())
+
+
+def verify(model_name: str, output_dir: Path, *, quantized: bool, samples: int) -> dict:
+    texts = _sample_texts(samples)
+    reference = LazyHuggingFaceEmbeddings(model_name).embed_documents(texts)
+
+    onnx_embeddings = OnnxEmbeddings(output_dir, quantized=quantized)
+    started = time.perf_counter()
+    onnx_embeddings.embed_query("warm-up")
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    candidate = onnx_embeddings.embed_documents(texts)
+    per_text_ms = (time.perf_counter() - started) * 1000 / max(len(texts), 1)
+    return {
+        "min_cosine": _min_cosine(reference, candidate),
+        "load_seconds": load_seconds,
+        "ms_per_text": per_text_ms,
+        "samples": len(texts),
+    }
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export the RAG embedding model to ONNX.")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL)
+    parser.add_argument("--output", type=Path, default=DEFAULT_ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 quantized copy.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.99,
+        help="Minimum cosine similarity between original and ONNX embeddings.",
+    )
+    parser.add_argument("--samples", type=int, default=64)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    model_file = export_model(args.model, args.output)
+    print(f"Exported {args.model} to {model_file}")
+
+    metadata = {"model_name": args.model, "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    checks = {"fp32": verify(args.model, args.output, quantized=False, samples=args.samples)}
+    if not args.no_quantize:
+        print(f"Wrote int8 model to {quantize_model(model_file)}")
+        checks["int8"] = verify(args.model, args.output, quantized=True, samples=args.samples)
+    metadata["verification"] = checks
+    (args.output / ONNX_EXPORT_METADATA_FILE).write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+
+    failed = False
+    for variant, result in checks.items():
+        status = "ok" if result["min_cosine"] >= args.tolerance else "BELOW TOLERANCE"
+        failed = failed or status != "ok"
+        print(
+            f"{variant}: min cosine {result['min_cosine']:.4f} over {result['samples']} texts, "
+            f"{result['ms_per_text']:.2f} ms/text, load {result['load_seconds']:.2f}s [{status}]"
+        )
+    if failed:
+        sys.exit(1)
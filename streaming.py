@@ -0,0 +1,194 @@
+"""Forward LLM tokens and tool activity from a running crew to a caller-supplied sink.
+
+``run_code_development_pipeline(..., on_event=callback)`` streams :class:`PipelineEvent`
+objects to ``callback`` while the crew runs; ``iterate_events`` turns that into a
+generator fed from a background thread, which is what ``main.py --stream`` and the
+Streamlit app consume.
+
+Events come from CrewAI's event bus: LLM stream chunks (agents are built with
+``stream=True`` while a sink is active), tool usage and task boundaries. The bus is
+process-wide, so the active sink travels in a context variable; a bus that dispatches
+handlers on its own threads falls back to the only active sink.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event kinds, in the order a run usually produces them.
+ATTEMPT_STARTED = "attempt_started"
+TASK_STARTED = "task_started"
+TOKEN = "token"
+TOOL_STARTED = "tool_started"
+TOOL_FINISHED = "tool_finished"
+TASK_COMPLETED = "task_completed"
+RESULT = "result"
+
+
+@dataclass(frozen=True)
+class PipelineEvent:
+    kind: str
+    text: str = ""
+    agent: Optional[str] = None
+    task: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+EventCallback = Callable[[PipelineEvent], None]
+
+_SINK: contextvars.ContextVar[Optional[EventCallback]] = contextvars.ContextVar("pipeline_event_sink", default=None)
+_ACTIVE_SINKS: List[EventCallback] = []
+_LOCK = threading.Lock()
+_BRIDGE_INSTALLED: Optional[bool] = None
+
+
+def emit(event: PipelineEvent) -> None:
+    """Deliver ``event`` to the current sink; sink errors never interrupt the crew."""
+    sink = _SINK.get()
+    if sink is None:
+        with _LOCK:
+            sink = _ACTIVE_SINKS[0] if len(_ACTIVE_SINKS) == 1 else None
+    if sink is None:
+        return
+    try:
+        sink(event)
+    except Exception:  # pragma: no cover - defensive: a broken UI must not fail the run
+        logger.exception("Pipeline event sink failed on %s event", event.kind)
+
+
+def _task_name(task: Any) -> Optional[str]:
+    return getattr(task, "name", None) or getattr(task, "description", None)
+
+
+def _install_bridge() -> bool:
+    """Subscribe to CrewAI's event bus once per process; False if it is unavailable."""
+    global _BRIDGE_INSTALLED
+    with _LOCK:
+        if _BRIDGE_INSTALLED is not None:
+            return _BRIDGE_INSTALLED
+        try:
+            from crewai.events import (
+                LLMStreamChunkEvent,
+                TaskCompletedEvent,
+                TaskStartedEvent,
+                ToolUsageFinishedEvent,
+                ToolUsageStartedEvent,
+                crewai_event_bus,
+            )
+        except ImportError:
+            try:
+                from crewai.utilities.events import (
+                    LLMStreamChunkEvent,
+                    TaskCompletedEvent,
+                    TaskStartedEvent,
+                    ToolUsageFinishedEvent,
+                    ToolUsageStartedEvent,
+                    crewai_event_bus,
+                )
+            except ImportError:
+                logger.warning("This CrewAI version has no event bus; streaming only reports the final result")
+                _BRIDGE_INSTALLED = False
+                return False
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def _on_chunk(source: Any, event: Any) -> None:
+            emit(PipelineEvent(TOKEN, text=event.chunk, agent=getattr(event, "agent_role", None)))
+
+        @crewai_event_bus.on(ToolUsageStartedEvent)
+        def _on_tool_started(source: Any, event: Any) -> None:
+            emit(
+                PipelineEvent(
+                    TOOL_STARTED,
+                    text=str(getattr(event, "tool_args", "")),
+                    agent=getattr(event, "agent_role", None),
+                    data={"tool": event.tool_name},
+                )
+            )
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def _on_tool_finished(source: Any, event: Any) -> None:
+            emit(
+                PipelineEvent(
+                    TOOL_FINISHED,
+                    text=str(getattr(event, "output", "")),
+                    agent=getattr(event, "agent_role", None),
+                    data={"tool": event.tool_name},
+                )
+            )
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def _on_task_started(source: Any, event: Any) -> None:
+            task = getattr(event, "task", None) or source
+            agent = getattr(task, "agent", None)
+            emit(PipelineEvent(TASK_STARTED, agent=getattr(agent, "role", None), task=_task_name(task)))
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def _on_task_completed(source: Any, event: Any) -> None:
+            output = getattr(event, "output", None)
+            emit(
+                PipelineEvent(
+                    TASK_COMPLETED,
+                    text=str(getattr(output, "raw", "") or ""),
+                    agent=getattr(output, "agent", None),
+                    task=getattr(output, "name", None) or _task_name(getattr(event, "task", None) or source),
+                )
+            )
+
+        _BRIDGE_INSTALLED = True
+        return True
+
+
+@contextmanager
+def streaming_to(callback: EventCallback) -> Iterator[bool]:
+    """Route crew events to ``callback`` for the duration of the block.
+
+    Yields whether token-level events are available.
+    """
+    available = _install_bridge()
+    token = _SINK.set(callback)
+    with _LOCK:
+        _ACTIVE_SINKS.append(callback)
+    try:
+        yield available
+    finally:
+        with _LOCK:
+            _ACTIVE_SINKS.remove(callback)
+        _SINK.reset(token)
+
+
+_DONE = object()
+
+
+def iterate_events(run: Callable[[EventCallback], str]) -> Iterator[PipelineEvent]:
+    """Run ``run(callback)`` on a background thread and yield its events as they arrive.
+
+    The last event is a ``result`` event carrying the return value; an exception from
+    ``run`` is re-raised to the consumer after the events that preceded it.
+    """
+    events: "queue.Queue[Any]" = queue.Queue()
+    outcome: Dict[str, Any] = {}
+
+    def worker() -> None:
+        try:
+            outcome["result"] = run(events.put)
+        except BaseException as exc:  # re-raised in the consumer's thread
+            outcome["error"] = exc
+        finally:
+            events.put(_DONE)
+
+    threading.Thread(target=worker, name="pipeline-stream", daemon=True).start()
+    while True:
+        item = events.get()
+        if item is _DONE:
+            break
+        yield item
+    if "error" in outcome:
+        raise outcome["error"]
+    yield PipelineEvent(RESULT, text=outcome["result"])
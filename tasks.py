@@ -1,7 +1,8 @@
 """Task definitions for the Agentic AI Workshop crew."""
 from __future__ import annotations
 
-from typing import List
+import logging
+from typing import Any, Callable, List
 
 from crewai import Task
 
@@ -14,6 +15,14 @@ from tools import (
     create_code_testing_tool,
     create_dependency_audit_tool,
 )
+from tools.dependency_extractor import extract_dependencies
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCY_AUDIT_HEADING = (
+    "\n\n**Automated Dependency Audit** (extracted from the Code Writer output; "
+    "these packages are already audited, do not re-run dependency_audit_tool for them):\n\n"
+)
 
 
 # ============================================================================
@@ -197,7 +206,7 @@ def create_code_planning_task(agent) -> Task:
     )
 
 
-def create_code_writing_task(agent, tools=None) -> Task:
+def create_code_writing_task(agent, tools=None, callback: Callable[[Any], None] | None = None) -> Task:
     """Implement the planned code according to specifications."""
     # ADDED: create_code_syntax_tool()
     tools = list(tools) if tools is not None else [
@@ -236,6 +245,7 @@ def create_code_writing_task(agent, tools=None) -> Task:
         agent=agent,
         tools=tools,
         name="Code Writing",
+        callback=callback,
     )
 
 
@@ -330,6 +340,40 @@ def create_code_review_task(agent, tools=None) -> Task:
     )
 
 
+def audit_generated_code(text: str) -> str | None:
+    """Audit the dependencies referenced by generated code; ``None`` if there are none.
+
+    The dependencies are extracted statically and audited in one batched tool call.
+    """
+    dependencies = extract_dependencies(text)
+    if not dependencies:
+        return None
+    return create_dependency_audit_tool()._run(", ".join(dependencies))
+
+
+def attach_dependency_audit(review_task: Task) -> Callable[[Any], None]:
+    """Build a writing-task callback that audits the generated code's dependencies.
+
+    The report is appended to ``review_task``'s description so the reviewer starts
+    with it instead of spending iterations compiling the list by hand.
+    """
+
+    def _audit_generated_code(output: Any) -> None:
+        text = getattr(output, "raw", None) or str(output)
+        try:
+            report = audit_generated_code(text)
+        except Exception:  # pragma: no cover - the review can still audit manually
+            logger.exception("Automatic dependency audit failed; the reviewer will audit manually")
+            return
+        if report is None:
+            return
+        # Description is interpolated at kickoff; replace any earlier report on retries.
+        description = review_task.description.split(DEPENDENCY_AUDIT_HEADING)[0]
+        review_task.description = description + DEPENDENCY_AUDIT_HEADING + report
+
+    return _audit_generated_code
+
+
 # ============================================================================
 # CONVENIENCE BUILDERS (These functions remain conceptually the same)
 # ============================================================================
@@ -360,11 +404,14 @@ def build_code_tasks(
     """Build the complete code development task pipeline."""
     # NOTE: The agents will receive the correct tools when the `create_code_*_task` 
     # functions override the `tools=None` default with the explicit tool lists defined above.
+    review_task = create_code_review_task(code_reviewer)
     return [
         create_code_planning_task(code_planner),
-        create_code_writing_task(code_writer, tools=code_tools),
+        create_code_writing_task(
+            code_writer, tools=code_tools, callback=attach_dependency_audit(review_task)
+        ),
         create_code_testing_task(code_tester, tools=code_tools),
-        create_code_review_task(code_reviewer),
+        review_task,
     ]
 
 
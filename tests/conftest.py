@@ -0,0 +1,5 @@
+"""Shared pytest configuration."""
+import os
+
+# Keep LiteLLM from fetching its model price map over the network on import.
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
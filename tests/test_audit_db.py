@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from packaging.version import Version
+
+from tools.audit_db import AuditDatabase, version_key
+
+VERSIONS = [
+    "1.0.dev1",
+    "1.0a1.dev1",
+    "1.0a1",
+    "1.0b2",
+    "1.0rc1",
+    "1.0",
+    "1.0.post1.dev1",
+    "1.0.post1",
+    "1.0.1",
+    "1.2",
+    "1.10",
+    "2.0",
+    "1!0.1",
+]
+
+
+def test_version_key_orders_like_packaging():
+    expected = sorted(VERSIONS, key=Version)
+    assert sorted(VERSIONS, key=version_key) == expected
+    assert version_key("1.0") == version_key("1.0.0")
+
+
+@pytest.fixture
+def database(tmp_path):
+    advisories = [
+        {
+            "id": "OSV-RANGE",
+            "summary": "Range advisory",
+            "affected": [
+                {
+                    "package": {"ecosystem": "PyPI", "name": "Demo_Pkg"},
+                    "ranges": [{"type": "ECOSYSTEM", "events": [{"introduced": "1.0"}, {"fixed": "1.4"}]}],
+                }
+            ],
+        },
+        {
+            "id": "OSV-LAST",
+            "summary": "Last-affected advisory",
+            "affected": [
+                {
+                    "package": {"ecosystem": "PyPI", "name": "demo-pkg"},
+                    "ranges": [{"type": "ECOSYSTEM", "events": [{"introduced": "0"}, {"last_affected": "0.9"}]}],
+                }
+            ],
+        },
+        {
+            "id": "OSV-LIST",
+            "summary": "Explicit versions",
+            "affected": [{"package": {"ecosystem": "PyPI", "name": "listed"}, "versions": ["2.0", "2.1"]}],
+        },
+    ]
+    osv = tmp_path / "osv.json"
+    osv.write_text(json.dumps(advisories), encoding="utf-8")
+    licenses = tmp_path / "licenses.json"
+    licenses.write_text(json.dumps({"demo-pkg": "MIT", "license-only": "GPL-3.0"}), encoding="utf-8")
+
+    db = AuditDatabase(tmp_path / "audit.sqlite")
+    assert db.import_osv(osv) == 3
+    db.import_licenses(licenses)
+    return db
+
+
+def _ids(result):
+    return sorted(finding.identifier for finding in result.findings if finding.kind == "vulnerability")
+
+
+@pytest.mark.parametrize(
+    "requirement, expected",
+    [
+        ("demo-pkg==1.2", ["OSV-RANGE"]),
+        ("demo-pkg==1.4", []),
+        ("demo-pkg==0.5", ["OSV-LAST"]),
+        ("demo-pkg==0.9.1", []),
+        ("demo-pkg>=1.4", []),
+        ("demo-pkg<=0.9", ["OSV-LAST"]),
+        # Strict bounds are widened to the enclosing interval, so 1.0 itself still counts.
+        ("demo-pkg<1.0", ["OSV-LAST", "OSV-RANGE"]),
+        ("demo-pkg~=1.3", ["OSV-RANGE"]),
+        ("demo-pkg", ["OSV-LAST", "OSV-RANGE"]),
+        ("listed==2.1", ["OSV-LIST"]),
+        ("listed==2.2", []),
+    ],
+)
+def test_interval_queries(database, requirement, expected):
+    assert _ids(database.audit(requirement)) == expected
+
+
+def test_only_packages_seen_by_the_osv_import_are_covered(database):
+    assert database.covers("Demo.Pkg")
+    assert not database.covers("license-only")
+    assert database.audit("license-only==1.0") is None
+    assert database.audit("unknown==1.0") is None
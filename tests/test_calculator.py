@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from tools.calculator import (
+    MAX_EXPRESSION_LENGTH,
+    CalculatorTool,
+    compile_expression,
+    evaluate_batch,
+)
+
+
+def test_evaluates_assignments_and_functions():
+    assert CalculatorTool()._run("x = 2; y = 3; x * y + sqrt(16)") == "10.0"
+    assert CalculatorTool()._run("1 < 2 <= 2") == "True"
+
+
+def test_batch_mode_evaluates_element_wise():
+    assert evaluate_batch("n * 2 + 1", {"n": [1, 2, 3]}).tolist() == [3.0, 5.0, 7.0]
+    assert CalculatorTool()._run("n = [1, 4]; sqrt(n)") == "[1.0, 2.0]"
+
+
+def test_compiled_expressions_are_cached():
+    assert compile_expression("1 + 2") is compile_expression("1 + 2")
+
+
+@pytest.mark.parametrize(
+    "expression, message",
+    [
+        ("2 ** 5000", "Exponent exceeds"),
+        ("1e200 * 1", "magnitude exceeds"),
+        ("__import__('os')", "Unsupported expression"),
+        ("(1).real", "Unsupported expression"),
+        ("pi = 3; pi", "reserved name"),
+        ("x = 1", "must end with a value"),
+        ("unknown + 1", "Missing values"),
+        ("hypot(1)", "takes 2-2 arguments"),
+        ("1" + " + 1" * (MAX_EXPRESSION_LENGTH // 4), "longer than"),
+        ("+".join(["1"] * 300), "syntax nodes"),
+    ],
+)
+def test_guards_reject_unsafe_or_oversized_input(expression, message):
+    with pytest.raises(ValueError, match=message):
+        CalculatorTool()._run(expression)
+
+
+def test_overflow_raises_instead_of_returning_inf():
+    with pytest.raises(ValueError):
+        CalculatorTool()._run("exp(1000)")
+
+
+def test_time_budget_is_enforced():
+    with pytest.raises(TimeoutError):
+        compile_expression("x * 2 + 1").evaluate({"x": np.ones(10)}, timeout=-1)
@@ -0,0 +1,75 @@
+import pytest
+
+import crew
+from checkpoints import CheckpointStore, new_run_id
+from config.endpoint_health import EndpointHealthStore
+from config.settings import clear_llm_pool
+
+
+@pytest.fixture
+def store(tmp_path):
+    checkpoints = CheckpointStore("run-1", "build a CLI", root=tmp_path)
+    checkpoints.start(resume=False)
+    return checkpoints
+
+
+def test_completed_stops_at_the_first_gap(store):
+    store.save(0, "Code Planning", "plan")
+    store.save(2, "Code Testing", "tests")
+    assert store.completed() == ["plan"]
+    assert store.final_output() is None
+
+    store.save(1, "Code Writing", "code")
+    store.save(3, "Code Review", "review", final=True)
+    assert store.completed() == ["plan", "code", "tests", "review"]
+    assert store.final_output() == "review"
+
+
+def test_resume_keeps_checkpoints_only_for_the_same_topic(store, tmp_path):
+    store.save(0, "Code Planning", "plan")
+
+    CheckpointStore("run-1", "build a CLI", root=tmp_path).start(resume=True)
+    assert store.completed() == ["plan"]
+
+    CheckpointStore("run-1", "another topic", root=tmp_path).start(resume=True)
+    assert store.completed() == []
+
+
+def test_restarting_without_resume_discards_checkpoints(store, tmp_path):
+    store.save(0, "Code Planning", "plan")
+    CheckpointStore("run-1", "build a CLI", root=tmp_path).start(resume=False)
+    assert store.completed() == []
+
+
+def test_fallback_attempt_resumes_from_the_failed_attempts_checkpoints(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(crew, "get_endpoint_health_store", lambda: EndpointHealthStore(tmp_path / "health.sqlite"))
+    seen = []
+
+    def fake_execute_crew(topic, overrides, config, hedge_overrides, checkpoints, routes):
+        seen.append(checkpoints.completed())
+        if len(seen) == 1:
+            checkpoints.save(0, "Code Planning", "plan")
+            raise RuntimeError("provider error")
+        return "done"
+
+    monkeypatch.setattr(crew, "_execute_crew", fake_execute_crew)
+    assert crew.run_code_development_pipeline("topic", run_id="run-2") == "done"
+    assert seen == [[], ["plan"]]
+    # A successful run removes its checkpoints.
+    assert not (tmp_path / "run-2").exists()
+
+
+def test_resumed_crew_skips_finished_tasks_and_keeps_their_context(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    clear_llm_pool()
+    resumed = crew.create_code_development_crew(completed_outputs=["plan"])
+    clear_llm_pool()
+
+    assert [task.name for task in resumed.tasks] == ["Code Writing", "Code Testing", "Code Review"]
+    assert [(task.name, task.output.raw) for task in resumed.tasks[0].context] == [("Code Planning", "plan")]
+
+
+def test_run_ids_for_the_same_topic_are_unique():
+    assert len({new_run_id("build a CLI") for _ in range(50)}) == 50
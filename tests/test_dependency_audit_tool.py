@@ -0,0 +1,23 @@
+import time
+
+from tools import dependency_audit_tool
+from tools.dependency_audit_tool import DependencyAuditTool
+
+
+class SlowSearch:
+    def _run(self, query):
+        time.sleep(0.3)
+        return f"results for {query}"
+
+
+def test_timeout_reports_queued_lookups_instead_of_failing(monkeypatch):
+    monkeypatch.setattr(dependency_audit_tool, "get_audit_database", lambda: None)
+    tool = DependencyAuditTool(max_workers=2, timeout_seconds=0.1)
+    tool._search_tool = SlowSearch()
+    dependencies = [f"package{number}==1.0" for number in range(8)]
+
+    report = tool._run(", ".join(dependencies))
+
+    for dependency in dependencies:
+        assert f"**{dependency}** (web search)" in report
+    assert report.count("timed out or was skipped") == 8
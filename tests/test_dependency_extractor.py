@@ -0,0 +1,36 @@
+from tools.dependency_extractor import _requirement_lines, extract_dependencies
+
+
+def test_python_imports_skip_stdlib_and_map_distributions():
+    text = "```python\nimport os\nimport sklearn\nfrom bs4 import BeautifulSoup\n\ndef f():\n    import yaml\n```"
+    assert extract_dependencies(text) == ["scikit-learn", "beautifulsoup4", "PyYAML"]
+
+
+def test_project_local_modules_are_not_dependencies():
+    text = "Create `app/models.py`.\n```python\nfrom app.models import User\nimport requests\n```"
+    assert extract_dependencies(text) == ["requests"]
+
+
+def test_pinned_requirement_wins_over_bare_import():
+    text = "```python\nimport requests\n```\n```requirements\nrequests==2.31.0\n```"
+    assert extract_dependencies(text) == ["requests==2.31.0"]
+
+
+def test_pip_install_lines_are_collected():
+    text = "Run `pip install flask>=3.0 -r requirements.txt --upgrade`."
+    assert extract_dependencies(text) == ["flask>=3.0"]
+
+
+def test_program_output_in_plain_blocks_is_ignored():
+    text = "```\nTrue\n```\n```text\nracecar\n```\n```\nFalse\nTrue\n```"
+    assert extract_dependencies(text) == []
+
+
+def test_plain_block_of_versioned_requirements_is_accepted():
+    text = "```\nrequests==2.31.0\nflask>=3.0\n```"
+    assert extract_dependencies(text) == ["requests==2.31.0", "flask>=3.0"]
+
+
+def test_strict_requirement_lines_are_all_or_nothing():
+    assert _requirement_lines("requests==2.31.0\nracecar", strict=True) == []
+    assert _requirement_lines("requests==2.31.0\nracecar") == ["requests==2.31.0", "racecar"]
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from config import endpoint_health
+from config.endpoint_health import EndpointHealthStore
+from config.settings import OpenRouterLLMConfig, get_role_routes
+from crew import _attempt_endpoints
+
+PRIMARY = ("openrouter", "primary", "https://example.test/v1")
+FALLBACK = ("openrouter", "fallback", "https://example.test/v1")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EndpointHealthStore(tmp_path / "health.sqlite", failure_threshold=2, cooldown=60)
+
+
+def test_circuit_opens_at_threshold_and_a_success_closes_it(store):
+    store.record_failure(PRIMARY, RuntimeError("boom"))
+    assert not store.get(PRIMARY).is_open
+
+    store.record_failure(PRIMARY, RuntimeError("boom"))
+    health = store.get(PRIMARY)
+    assert health.is_open
+    assert health.consecutive_failures == 2
+    assert health.last_error == "RuntimeError: boom"
+
+    store.record_success(PRIMARY, 1.0)
+    health = store.get(PRIMARY)
+    assert not health.is_open
+    assert health.consecutive_failures == 0
+    assert (health.successes, health.failures) == (1, 2)
+
+
+def test_circuit_half_opens_after_cooldown(store, monkeypatch):
+    store.record_failure(PRIMARY, RuntimeError("boom"))
+    store.record_failure(PRIMARY, RuntimeError("boom"))
+    later = time.time() + 61
+    monkeypatch.setattr(endpoint_health.time, "time", lambda: later)
+    assert not store.get(PRIMARY).is_open
+    assert store.rank([PRIMARY], lambda endpoint: [endpoint]) == [PRIMARY]
+
+    # The trial call fails: the circuit opens again straight away.
+    store.record_failure(PRIMARY, RuntimeError("still down"))
+    assert store.get(PRIMARY).is_open
+
+
+def test_rank_skips_open_circuits_and_orders_by_latency(store):
+    slow = ("openrouter", "slow", "https://example.test/v1")
+    store.record_success(slow, 20.0)
+    store.record_success(FALLBACK, 2.0)
+    store.record_failure(PRIMARY, RuntimeError("boom"))
+    store.record_failure(PRIMARY, RuntimeError("boom"))
+
+    assert store.rank([PRIMARY, slow, FALLBACK], lambda endpoint: [endpoint]) == [FALLBACK, slow]
+    # With nothing healthy left, the configured order is kept.
+    assert store.rank([PRIMARY], lambda endpoint: [endpoint]) == [PRIMARY]
+
+
+def test_attempts_are_ranked_on_the_routed_endpoints(store, monkeypatch):
+    monkeypatch.setenv("LLM_ROUTE_PLANNER_MODEL", "planner-model")
+    config = OpenRouterLLMConfig()
+    routes = get_role_routes()
+    primary, fallback = {}, {"model": "fallback"}
+
+    endpoints = _attempt_endpoints(primary, config, routes)
+    assert ("openrouter", "planner-model", config.base_url) in endpoints
+    assert ("openrouter", config.model, config.base_url) in endpoints
+    # A fallback attempt names its model, so the planner falls back too.
+    assert set(_attempt_endpoints(fallback, config, routes)) == {("openrouter", "fallback", config.base_url)}
+
+    planner = ("openrouter", "planner-model", config.base_url)
+    store.record_failure(planner, RuntimeError("boom"))
+    store.record_failure(planner, RuntimeError("boom"))
+    ranked = store.rank([primary, fallback], lambda overrides: _attempt_endpoints(overrides, config, routes))
+    assert ranked == [fallback]
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+from crewai.llm import LLM
+
+from config import hedging
+from config.endpoint_health import EndpointHealthStore
+from config.settings import build_crewai_llm, clear_llm_pool
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    monkeypatch.setenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "0.05")
+    monkeypatch.setenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0")
+    clear_llm_pool()
+    hedging.reset_hedge_stats()
+    yield
+    clear_llm_pool()
+    hedging.reset_hedge_stats()
+
+
+@pytest.fixture
+def hedged_llm(monkeypatch):
+    def fake_call(self, messages, tools=None, *args, **kwargs):
+        if "slow" in str(self.model):
+            time.sleep(0.5)
+        return str(self.model)
+
+    monkeypatch.setattr(LLM, "call", fake_call)
+    llm = build_crewai_llm(model="slow-primary", hedge_with={"model": "fast-secondary"})
+    llm.health_endpoint = llm.hedge_secondary.health_endpoint = None
+    return llm
+
+
+def test_slow_primary_is_hedged(hedged_llm):
+    assert "fast-secondary" in hedged_llm.call("hi")
+    stats = hedging.get_hedge_stats()["openrouter/slow-primary"]
+    assert (stats.calls, stats.hedges_fired, stats.hedge_wins) == (1, 1, 1)
+
+
+def test_hedge_is_skipped_when_every_slot_is_busy(hedged_llm, monkeypatch):
+    # One slot: the primary takes it, so the hedge cannot start.
+    monkeypatch.setattr(hedging, "_SLOTS", threading.BoundedSemaphore(1))
+    assert "slow-primary" in hedged_llm.call("hi")
+    stats = hedging.get_hedge_stats()["openrouter/slow-primary"]
+    assert (stats.hedges_fired, stats.hedges_skipped) == (0, 1)
+
+
+def test_primary_runs_inline_without_a_free_slot(hedged_llm, monkeypatch):
+    monkeypatch.setattr(hedging, "_SLOTS", threading.BoundedSemaphore(1))
+    hedging._SLOTS.acquire()
+    caller = threading.current_thread().name
+    threads = []
+    original = LLM.call
+
+    def recording_call(self, *args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(LLM, "call", recording_call)
+    assert "slow-primary" in hedged_llm.call("hi")
+    assert threads == [caller]
+
+
+def test_streaming_runs_do_not_stream_the_hedge(monkeypatch, tmp_path):
+    import crew
+
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(crew, "get_endpoint_health_store", lambda: EndpointHealthStore(tmp_path / "health.sqlite"))
+    calls = []
+
+    def fake_execute_crew(topic, overrides, config, hedge_overrides, checkpoints, routes):
+        calls.append((overrides, hedge_overrides))
+        return "done"
+
+    monkeypatch.setattr(crew, "_execute_crew", fake_execute_crew)
+    crew.run_code_development_pipeline("topic", on_event=lambda event: None)
+    (overrides, hedge_overrides), = calls
+    assert overrides["stream"] is True
+    assert hedge_overrides is not None
+    assert "stream" not in hedge_overrides
+
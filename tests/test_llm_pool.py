@@ -0,0 +1,27 @@
+import pytest
+
+from config.endpoint_health import MonitoredLLM
+from config.settings import build_crewai_llm, clear_llm_pool
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    clear_llm_pool()
+    yield
+    clear_llm_pool()
+
+
+def test_identical_settings_share_one_client():
+    first = build_crewai_llm(model="mistralai/mistral-7b-instruct")
+    second = build_crewai_llm(model="mistralai/mistral-7b-instruct")
+    assert first is second
+    assert build_crewai_llm(model="mistralai/mistral-7b-instruct", temperature=0.9) is not first
+
+
+def test_pooled_clients_go_through_litellm_hooks():
+    llm = build_crewai_llm()
+    # Newer CrewAI would otherwise hand back a native client that bypasses our call hooks.
+    assert isinstance(llm, MonitoredLLM)
+    assert llm.health_endpoint == ("openrouter", "mistralai/mistral-7b-instruct", "https://openrouter.ai/api/v1")
@@ -0,0 +1,110 @@
+import datetime
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from crewai.llm import LLM
+
+from agents import get_all_code_agents
+from config import endpoint_health, profiling
+from config.endpoint_health import MonitoredLLM
+from config.settings import clear_llm_pool
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    clear_llm_pool()
+    profiling.reset_role_profiles()
+    yield
+    clear_llm_pool()
+    profiling.reset_role_profiles()
+
+
+def _fake_litellm_call(self, messages, tools=None, *args, **kwargs):
+    """Stand-in for LLM.call that reports usage the way LiteLLM's success callback does."""
+    params = self._prepare_completion_params(messages)
+    start = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+    profiling._record(
+        {"response_cost": 0.01, "litellm_params": {"metadata": params.get("metadata")}},
+        SimpleNamespace(usage=usage),
+        start,
+        start + datetime.timedelta(seconds=2),
+    )
+    return "ok"
+
+
+def test_agents_with_the_same_route_share_one_client():
+    agents = get_all_code_agents()
+    assert len({id(agent.llm) for agent in agents.values()}) == 1
+
+
+def test_calls_are_attributed_to_the_calling_agents_role(monkeypatch):
+    monkeypatch.setattr(LLM, "call", _fake_litellm_call)
+    agents = get_all_code_agents()
+    shared = agents["writer"].llm
+    shared.health_endpoint = None  # keep the test out of the endpoint health table
+
+    shared.call("hi", from_agent=agents["writer"])
+    shared.call("hi", from_agent=agents["writer"])
+    shared.call("hi", from_agent=agents["reviewer"])
+    shared.call("hi")  # no agent: not attributed
+
+    profiles = profiling.get_role_profiles()
+    assert set(profiles) == {"writer", "reviewer"}
+    assert profiles["writer"].calls == 2
+    assert profiles["writer"].prompt_tokens == 20
+    assert profiles["writer"].mean_seconds == pytest.approx(2.0)
+    assert profiles["reviewer"].cost_usd == pytest.approx(0.01)
+
+
+def test_concurrent_pipeline_runs_keep_separate_statistics(monkeypatch, tmp_path):
+    import crew
+    from config import hedging
+
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(crew, "get_endpoint_health_store", lambda: endpoint_health.EndpointHealthStore(tmp_path / "h.db"))
+    llm = MonitoredLLM(model="openrouter/test-model", is_litellm=True)
+    both_started = threading.Barrier(2)
+    seen = {}
+
+    def fake_execute_crew(topic, *args, **kwargs):
+        calls = 1 if topic == "one" else 3
+        both_started.wait(5)
+        for _ in range(calls):
+            with profiling.profiling_role("writer"):
+                _fake_litellm_call(llm, "hi")
+            hedging._bump("model", calls=1)
+        both_started.wait(5)
+        seen[topic] = (profiling.get_role_profiles()["writer"].calls, hedging.get_hedge_stats()["model"].calls)
+        return "done"
+
+    monkeypatch.setattr(crew, "_execute_crew", fake_execute_crew)
+    runs = [threading.Thread(target=crew.run_code_development_pipeline, args=(topic,)) for topic in ("one", "two")]
+    for run in runs:
+        run.start()
+    for run in runs:
+        run.join()
+
+    assert seen == {"one": (1, 1), "two": (3, 3)}
+    # Nothing leaks into the process-wide totals once the runs have finished.
+    assert profiling.get_role_profiles() == {}
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_litellm_calls_are_attributed_with_and_without_streaming(stream):
+    profiling.install_role_profiler()
+    llm = MonitoredLLM(model="openai/gpt-4o-mini", api_key="test-key", stream=stream, mock_response="hello", is_litellm=True)
+    llm.health_endpoint = None
+    agent = get_all_code_agents()["planner"]
+
+    assert llm.call("hi", from_agent=agent) == "hello"
+    # Streamed responses report usage from a LiteLLM worker thread.
+    deadline = time.monotonic() + 5
+    while "planner" not in profiling.get_role_profiles() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.2)
+    assert profiling.get_role_profiles()["planner"].calls == 1
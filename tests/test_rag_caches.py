@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tools import lru_cache as lru_cache_module
+from tools import rag_tool
+from tools.lru_cache import LRUCache
+from tools.rag_tool import LocalRAGTool, reciprocal_rank_fusion
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (3, 1, 1, 2)
+
+
+def test_lru_expires_entries_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(lru_cache_module.time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl_seconds=10)
+    cache.set("a", 1)
+    now[0] += 10
+    assert cache.get("a") == 1
+    now[0] += 0.5
+    assert cache.get("a") is None
+    assert cache.stats().expirations == 1
+    assert len(cache) == 0
+
+
+def test_lru_rejects_empty_capacity():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_rrf_rewards_items_ranked_well_in_several_lists():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60)
+    assert [item for item, _ in fused] == [1, 3, 2, 4]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+    assert fused[-1][1] == pytest.approx(1 / 63)
+
+
+def test_query_embeddings_are_cached_per_backend(monkeypatch):
+    rag_tool.clear_rag_caches()
+    embedded = []
+
+    def embed_documents(texts):
+        embedded.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    store = SimpleNamespace(embedding_function=SimpleNamespace(embed_documents=embed_documents))
+    tool = LocalRAGTool()
+
+    monkeypatch.setenv("RAG_EMBEDDING_BACKEND", "huggingface")
+    tool._embed_queries(store, ["pytest fixtures"])
+    tool._embed_queries(store, ["pytest fixtures"])
+    monkeypatch.setenv("RAG_EMBEDDING_BACKEND", "onnx")
+    tool._embed_queries(store, ["pytest fixtures"])
+    assert embedded == ["pytest fixtures", "pytest fixtures"]
+    rag_tool.clear_rag_caches()
@@ -0,0 +1,55 @@
+import multiprocessing
+
+import pytest
+
+from tools import web_search
+from tools.search_backends import RecordingSearchBackend, ReplaySearchBackend
+from tools.web_search import DuckDuckGoSearchTool
+
+
+class EchoBackend:
+    def search(self, backend, query, max_results):
+        return [{"title": query, "body": "x" * 2000}]
+
+
+def _record(cassette, worker):
+    recorder = RecordingSearchBackend(EchoBackend(), cassette)
+    for number in range(25):
+        recorder.search("text", f"query {worker}-{number}", 5)
+
+
+def test_concurrent_recorders_produce_a_readable_cassette(tmp_path):
+    cassette = tmp_path / "cassette.jsonl.gz"
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_record, args=(cassette, worker)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert all(process.exitcode == 0 for process in workers)
+
+    replay = ReplaySearchBackend(cassette, latency_ms=0)
+    assert len(replay._entries) == 100
+    assert replay.search("text", "query 3-24", 5)[0]["title"] == "query 3-24"
+
+
+class RecordingCache:
+    def __init__(self):
+        self.writes = []
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        self.writes.append(key)
+
+
+@pytest.mark.parametrize("mode, cached", [("fixture", False), ("record", False), ("replay", False), ("live", True)])
+def test_only_live_results_are_cached(monkeypatch, mode, cached):
+    cache = RecordingCache()
+    monkeypatch.setenv("SEARCH_BACKEND_MODE", mode)
+    monkeypatch.setattr(web_search, "get_search_cache", lambda: cache)
+    monkeypatch.setattr(web_search, "get_search_backend", lambda: EchoBackend())
+
+    DuckDuckGoSearchTool()._run("pytest fixtures")
+    assert bool(cache.writes) is cached
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from tools.singleflight import SingleFlight, get_singleflight_stats
+
+
+def _run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    group = SingleFlight("test-share")
+    release = threading.Event()
+    executions = []
+    results = []
+
+    def work():
+        executions.append(1)
+        release.wait(5)
+        return "value"
+
+    threads = _run_concurrently(5, lambda: results.append(group.do("key", work)))
+    while group.stats().calls < 5:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 5
+    assert len(executions) == 1
+    stats = group.stats()
+    assert (stats.executions, stats.coalesced, stats.in_flight) == (1, 4, 0)
+    assert get_singleflight_stats()["test-share"] == stats
+
+
+def test_followers_receive_the_leaders_exception():
+    group = SingleFlight("test-error")
+    release = threading.Event()
+    errors = []
+
+    def work():
+        release.wait(5)
+        raise RuntimeError("backend down")
+
+    def call():
+        try:
+            group.do("key", work)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    threads = _run_concurrently(3, call)
+    while group.stats().calls < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == ["backend down"] * 3
+
+
+def test_nothing_is_cached_after_a_call_finishes():
+    group = SingleFlight("test-no-cache")
+    values = iter([1, 2])
+    assert group.do("key", lambda: next(values)) == 1
+    assert group.do("key", lambda: next(values)) == 2
+    assert group.stats().in_flight == 0
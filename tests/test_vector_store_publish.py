@@ -0,0 +1,102 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+import rag.build_vector_db as builder
+import tools.vector_store as vector_store_module
+import tools.vectorstore_registry as registry_module
+from tools.vector_store import DOCSTORE_FILE, INDEX_FILE, InconsistentVectorStoreError, read_manifest, store_matches_manifest
+from tools.vectorstore_registry import VectorStoreRegistry
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic 8-dimensional embeddings; no model download needed."""
+
+    def embed_documents(self, texts):
+        return [[byte / 255 for byte in hashlib.sha256(text.encode()).digest()[:8]] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch):
+    monkeypatch.setattr(builder, "get_shared_embeddings", lambda model: HashEmbeddings())
+    monkeypatch.setattr(registry_module, "create_embeddings", lambda model, backend=None: HashEmbeddings())
+
+
+def _build(tmp_path, name, text):
+    docs = tmp_path / f"{name}-docs"
+    docs.mkdir()
+    (docs / "guide.txt").write_text(text, encoding="utf-8")
+    store = tmp_path / name
+    builder.build_vector_store(docs, vectorstore_dir=store, chunk_size=40, chunk_overlap=0)
+    return docs, store
+
+
+def test_published_store_matches_its_manifest(tmp_path):
+    _, store = _build(tmp_path, "store", "Use pytest fixtures.\n\nPrefer small functions.")
+    manifest = read_manifest(store)
+    assert manifest["build_id"] and manifest["index_sha256"]
+    assert store_matches_manifest(store, manifest)
+    assert not (store / "manifest.json.tmp").exists()
+
+    results = VectorStoreRegistry().get(store, "test-model").similarity_search("pytest", k=1)
+    assert results and results[0].page_content
+
+
+def test_files_without_their_manifest_are_rejected(tmp_path, monkeypatch):
+    docs, store = _build(tmp_path, "store", "Use pytest fixtures.\n\nPrefer small functions.")
+    _, other = _build(tmp_path, "other", "Completely different text.\n\nAnother paragraph here.")
+    registry = VectorStoreRegistry()
+    previous = registry.get(store, "test-model")
+
+    # Simulate a build that crashed after moving its data files but before the manifest.
+    for name in (DOCSTORE_FILE, INDEX_FILE):
+        shutil.copyfile(other / name, store / name)
+    assert not store_matches_manifest(store, read_manifest(store))
+
+    # A reader that already has the previous build keeps serving it ...
+    assert registry.get(store, "test-model") is previous
+    # ... and a fresh reader refuses to pair the files.
+    monkeypatch.setattr(registry_module, "LOAD_RETRY_DELAY_SECONDS", 0)
+    with pytest.raises(InconsistentVectorStoreError):
+        VectorStoreRegistry().get(store, "test-model")
+
+    # The next build does not trust the stale manifest and rebuilds from scratch.
+    report = builder.build_vector_store(docs, vectorstore_dir=store, chunk_size=40, chunk_overlap=0)
+    assert report.full_rebuild
+    assert store_matches_manifest(store, read_manifest(store))
+
+
+def test_incremental_build_keeps_unchanged_chunks(tmp_path):
+    docs, store = _build(tmp_path, "store", "Use pytest fixtures.\n\nPrefer small functions.")
+    (docs / "extra.txt").write_text("Log every exception.", encoding="utf-8")
+    report = builder.build_vector_store(docs, vectorstore_dir=store, chunk_size=40, chunk_overlap=0)
+    assert not report.full_rebuild
+    assert report.added == 1 and report.unchanged >= 2
+
+
+def test_loading_checks_the_index_stamp_without_hashing(tmp_path, monkeypatch):
+    _, store = _build(tmp_path, "store", "Use pytest fixtures.\n\nPrefer small functions.")
+    manifest = read_manifest(store)
+
+    def no_hashing(path):
+        raise AssertionError("the index should not be hashed on load")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(vector_store_module, "file_sha256", no_hashing)
+        assert store_matches_manifest(store, manifest)
+        assert VectorStoreRegistry().get(store, "test-model") is not None
+
+    # A copy with fresh timestamps falls back to the full hash and is still accepted.
+    index = store / INDEX_FILE
+    os.utime(index, ns=(0, 0))
+    assert store_matches_manifest(store, manifest)
+    assert store_matches_manifest(store, manifest, verify=True)
+    with index.open("ab") as handle:
+        handle.write(b"\0")
+    assert not store_matches_manifest(store, manifest)
@@ -0,0 +1,461 @@
+"""Offline vulnerability and license database for dependency audits.
+
+Advisories are imported from an OSV dump (a directory of ``*.json`` files or the
+``all.zip`` published per ecosystem) and license metadata from a JSON mapping of
+``{"package": "MIT"}`` or ``{"package": {"license": "MIT", "version": "1.0"}}``.
+Affected ranges are stored as intervals over an order-preserving version key, so an
+audit is an indexed range query instead of a web search.
+
+    python -m tools.audit_db --osv ~/Downloads/PyPI-all.zip --licenses licenses.json
+
+The database lives at ``DEPENDENCY_AUDIT_DB`` (default: ``.cache/dependency_audit.sqlite``).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIT_DB_PATH = Path(__file__).resolve().parents[1] / ".cache" / "dependency_audit.sqlite"
+OSV_ECOSYSTEM = "PyPI"
+COPYLEFT_MARKERS = ("AGPL", "GPL", "SSPL")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS advisories (
+    id TEXT PRIMARY KEY,
+    summary TEXT,
+    severity TEXT,
+    aliases TEXT,
+    reference_url TEXT
+);
+CREATE TABLE IF NOT EXISTS affected_ranges (
+    advisory_id TEXT NOT NULL,
+    package TEXT NOT NULL,
+    introduced TEXT,
+    introduced_key TEXT NOT NULL,
+    fixed TEXT,
+    fixed_key TEXT,
+    last_affected_key TEXT
+);
+CREATE INDEX IF NOT EXISTS affected_ranges_interval ON affected_ranges(package, introduced_key, fixed_key);
+CREATE TABLE IF NOT EXISTS affected_versions (
+    advisory_id TEXT NOT NULL,
+    package TEXT NOT NULL,
+    version_key TEXT NOT NULL,
+    PRIMARY KEY (package, version_key, advisory_id)
+) WITHOUT ROWID;
+-- Every package the OSV import saw, so "no advisories" can be told apart from "no data".
+CREATE TABLE IF NOT EXISTS osv_packages (
+    package TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS licenses (
+    package TEXT PRIMARY KEY,
+    license TEXT NOT NULL,
+    version TEXT
+);
+"""
+
+# Sentinels below and above every encoded version; OSV uses introduced "0" for "every version".
+_MIN_KEY = ""
+_MAX_KEY = "\uffff"
+
+
+def version_key(version: str | Version) -> str:
+    """Encode a PEP 440 version as a string whose lexicographic order matches version order.
+
+    Mirrors ``packaging``'s comparison key: release segments padded to six components,
+    dev-only releases before pre-releases before finals before post-releases. Local
+    version labels are ignored.
+    """
+    parsed = version if isinstance(version, Version) else Version(version)
+    release = (list(parsed.release) + [0] * 6)[:6]
+    parts = [f"{parsed.epoch:04d}"] + [f"{segment:08d}" for segment in release]
+
+    if parsed.pre is None and parsed.post is None and parsed.dev is not None:
+        pre = "0" + "0" * 8
+    elif parsed.pre is None:
+        pre = "9" + "0" * 8
+    else:
+        pre = {"a": "1", "b": "2", "rc": "3"}[parsed.pre[0]] + f"{parsed.pre[1]:08d}"
+    post = "0" + "0" * 8 if parsed.post is None else "1" + f"{parsed.post:08d}"
+    dev = "9" + "0" * 8 if parsed.dev is None else "1" + f"{parsed.dev:08d}"
+    return ".".join(parts) + f"-{pre}{post}{dev}"
+
+
+@dataclass
+class AuditFinding:
+    """One advisory or license issue affecting a requirement."""
+
+    kind: str  # "vulnerability" | "license"
+    identifier: str
+    summary: str
+    severity: str = "unknown"
+    aliases: List[str] = field(default_factory=list)
+    fixed_in: Optional[str] = None
+    reference: Optional[str] = None
+
+
+@dataclass
+class DependencyAuditResult:
+    """Structured outcome of auditing one requirement string."""
+
+    requirement: str
+    package: str
+    specifier: str = ""
+    license: Optional[str] = None
+    findings: List[AuditFinding] = field(default_factory=list)
+    source: str = "offline"
+    note: Optional[str] = None
+
+    @property
+    def vulnerable(self) -> bool:
+        return any(finding.kind == "vulnerability" for finding in self.findings)
+
+    def to_markdown(self) -> str:
+        lines = [f"Audit Results for **{self.requirement}** (offline database):"]
+        lines.append(f"License: {self.license or 'unknown'}")
+        if self.note:
+            lines.append(self.note)
+        if not self.findings:
+            lines.append("No known vulnerabilities for this version range.")
+        for finding in self.findings:
+            details = [finding.severity]
+            if finding.aliases:
+                details.append(", ".join(finding.aliases))
+            if finding.fixed_in:
+                details.append(f"fixed in {finding.fixed_in}")
+            line = f"- [{finding.kind}] {finding.identifier} ({'; '.join(details)}): {finding.summary}"
+            if finding.reference:
+                line += f" <{finding.reference}>"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def parse_requirement(text: str) -> Optional[Requirement]:
+    try:
+        return Requirement(text.strip())
+    except InvalidRequirement:
+        return None
+
+
+def _specifier_bounds(requirement: Requirement) -> Tuple[str, Optional[str], bool]:
+    """Return ``(lower_key, upper_key, exact)`` bounding the versions a specifier admits.
+
+    The bounds are conservative: exclusions (``!=``) and strict inequalities are widened
+    to the enclosing interval, so range audits may report advisories for versions the
+    specifier actually excludes.
+    """
+    lower, upper = _MIN_KEY, None
+    for spec in requirement.specifier:
+        operator, raw = spec.operator, spec.version
+        if operator in {"==", "==="} and "*" not in raw:
+            try:
+                key = version_key(raw)
+            except InvalidVersion:
+                continue
+            return key, key, True
+        try:
+            if operator == "~=":
+                base = Version(raw)
+                prefix = list(base.release[:-1]) or [base.release[0]]
+                prefix[-1] += 1
+                lower = max(lower, version_key(base))
+                ceiling = version_key(".".join(map(str, prefix)) + ".dev0")
+                upper = ceiling if upper is None else min(upper, ceiling)
+            elif operator == "==" and raw.endswith(".*"):
+                base = Version(raw[:-2])
+                prefix = list(base.release)
+                lower = max(lower, version_key(".".join(map(str, prefix)) + ".dev0"))
+                prefix[-1] += 1
+                ceiling = version_key(".".join(map(str, prefix)) + ".dev0")
+                upper = ceiling if upper is None else min(upper, ceiling)
+            elif operator in {">=", ">"}:
+                lower = max(lower, version_key(raw))
+            elif operator in {"<=", "<"}:
+                key = version_key(raw)
+                upper = key if upper is None else min(upper, key)
+        except InvalidVersion:
+            continue
+    return lower, upper, False
+
+
+class AuditDatabase:
+    """SQLite store of OSV advisories and license metadata with interval lookups."""
+
+    def __init__(self, path: Path | str = DEFAULT_AUDIT_DB_PATH, *, read_only: bool = False) -> None:
+        self.path = Path(path)
+        self.read_only = read_only
+        self._local = threading.local()
+        if not read_only:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connection() as conn:
+                conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            else:
+                conn = sqlite3.connect(str(self.path))
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------ import
+    def import_osv(self, source: Path) -> int:
+        """Load OSV advisories for the PyPI ecosystem; returns the number imported."""
+        count = 0
+        conn = self._connection()
+        with conn:
+            for advisory in _iter_osv_documents(source):
+                if self._insert_advisory(conn, advisory):
+                    count += 1
+        _logger.info("Imported %d OSV advisories from %s", count, source)
+        return count
+
+    def _insert_advisory(self, conn: sqlite3.Connection, advisory: Dict[str, Any]) -> bool:
+        advisory_id = advisory.get("id")
+        affected = [
+            item
+            for item in advisory.get("affected", [])
+            if item.get("package", {}).get("ecosystem") == OSV_ECOSYSTEM
+        ]
+        packages = {canonicalize_name(item["package"]["name"]) for item in affected if item["package"].get("name")}
+        conn.executemany("INSERT OR IGNORE INTO osv_packages (package) VALUES (?)", [(name,) for name in packages])
+        if not advisory_id or not affected or advisory.get("withdrawn"):
+            return False
+
+        references = advisory.get("references") or []
+        conn.execute("DELETE FROM affected_ranges WHERE advisory_id = ?", (advisory_id,))
+        conn.execute("DELETE FROM affected_versions WHERE advisory_id = ?", (advisory_id,))
+        conn.execute(
+            "INSERT OR REPLACE INTO advisories (id, summary, severity, aliases, reference_url) VALUES (?, ?, ?, ?, ?)",
+            (
+                advisory_id,
+                advisory.get("summary") or (advisory.get("details") or "")[:200],
+                _osv_severity(advisory),
+                json.dumps(advisory.get("aliases") or []),
+                references[0].get("url") if references else None,
+            ),
+        )
+
+        for item in affected:
+            package = canonicalize_name(item["package"]["name"])
+            for start, start_key, fixed, fixed_key, last_key in _osv_intervals(item.get("ranges") or []):
+                conn.execute(
+                    "INSERT INTO affected_ranges (advisory_id, package, introduced, introduced_key, fixed, fixed_key, "
+                    "last_affected_key) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (advisory_id, package, start, start_key, fixed, fixed_key, last_key),
+                )
+            for raw in item.get("versions") or []:
+                try:
+                    key = version_key(raw)
+                except InvalidVersion:
+                    continue
+                conn.execute(
+                    "INSERT OR IGNORE INTO affected_versions (advisory_id, package, version_key) VALUES (?, ?, ?)",
+                    (advisory_id, package, key),
+                )
+        return True
+
+    def import_licenses(self, source: Path) -> int:
+        data = json.loads(Path(source).read_text(encoding="utf-8"))
+        rows = []
+        for name, value in data.items():
+            if isinstance(value, str):
+                rows.append((canonicalize_name(name), value, None))
+            elif isinstance(value, dict) and value.get("license"):
+                rows.append((canonicalize_name(name), value["license"], value.get("version")))
+        conn = self._connection()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO licenses (package, license, version) VALUES (?, ?, ?)", rows)
+        _logger.info("Imported %d license records from %s", len(rows), source)
+        return len(rows)
+
+    # ------------------------------------------------------------------- query
+    def covers(self, package: str) -> bool:
+        """Whether the OSV import saw ``package``; a license record alone says nothing about advisories."""
+        try:
+            row = self._connection().execute(
+                "SELECT 1 FROM osv_packages WHERE package = ?", (canonicalize_name(package),)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # Databases built before osv_packages existed; rerun the OSV import to use them.
+            _logger.warning("Audit database %s predates osv_packages; re-import OSV data", self.path)
+            return False
+        return row is not None
+
+    def audit(self, requirement_text: str) -> Optional[DependencyAuditResult]:
+        """Audit one requirement; ``None`` when it cannot be parsed or the package is unknown."""
+        requirement = parse_requirement(requirement_text)
+        if requirement is None or not self.covers(requirement.name):
+            return None
+
+        package = canonicalize_name(requirement.name)
+        lower, upper, exact = _specifier_bounds(requirement)
+        conn = self._connection()
+
+        # Interval overlap: advisory [introduced, fixed) intersects [lower, upper].
+        query = (
+            "SELECT DISTINCT r.advisory_id, r.fixed FROM affected_ranges r "
+            "WHERE r.package = ? AND r.introduced_key <= ? "
+            "AND (r.fixed_key IS NULL OR r.fixed_key > ?) "
+            "AND (r.last_affected_key IS NULL OR r.last_affected_key >= ?)"
+        )
+        upper_bound = upper if upper is not None else _MAX_KEY
+        hits: Dict[str, Optional[str]] = {}
+        for advisory_id, fixed in conn.execute(query, (package, upper_bound, lower, lower)):
+            hits.setdefault(advisory_id, fixed)
+        for (advisory_id,) in conn.execute(
+            "SELECT advisory_id FROM affected_versions WHERE package = ? AND version_key >= ? AND version_key <= ?",
+            (package, lower, upper_bound),
+        ):
+            hits.setdefault(advisory_id, None)
+
+        findings = [self._finding(advisory_id, fixed) for advisory_id, fixed in sorted(hits.items())]
+        license_row = conn.execute("SELECT license FROM licenses WHERE package = ?", (package,)).fetchone()
+        license_name = license_row[0] if license_row else None
+        if license_name and any(marker in license_name.upper() for marker in COPYLEFT_MARKERS):
+            findings.append(
+                AuditFinding(
+                    kind="license",
+                    identifier=license_name,
+                    summary="Copyleft license; check compatibility with the project license.",
+                    severity="review",
+                )
+            )
+
+        note = None
+        if not exact:
+            note = (
+                "Unpinned requirement: findings cover every version the specifier allows."
+                if str(requirement.specifier) == ""
+                else "Version range: findings cover any version the specifier may resolve to."
+            )
+        return DependencyAuditResult(
+            requirement=requirement_text.strip(),
+            package=package,
+            specifier=str(requirement.specifier),
+            license=license_name,
+            findings=findings,
+            note=note,
+        )
+
+    def _finding(self, advisory_id: str, fixed: Optional[str]) -> AuditFinding:
+        row = self._connection().execute(
+            "SELECT summary, severity, aliases, reference_url FROM advisories WHERE id = ?", (advisory_id,)
+        ).fetchone()
+        summary, severity, aliases, reference = row if row else ("", "unknown", "[]", None)
+        return AuditFinding(
+            kind="vulnerability",
+            identifier=advisory_id,
+            summary=summary or "",
+            severity=severity or "unknown",
+            aliases=json.loads(aliases or "[]"),
+            fixed_in=fixed,
+            reference=reference,
+        )
+
+
+def _iter_osv_documents(source: Path) -> Iterator[Dict[str, Any]]:
+    source = Path(source)
+    if source.is_dir():
+        for path in sorted(source.rglob("*.json")):
+            yield json.loads(path.read_text(encoding="utf-8"))
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in archive.namelist():
+                if name.endswith(".json"):
+                    yield json.loads(archive.read(name))
+    else:
+        payload = json.loads(source.read_text(encoding="utf-8"))
+        yield from payload if isinstance(payload, list) else [payload]
+
+
+def _osv_severity(advisory: Dict[str, Any]) -> str:
+    specific = (advisory.get("database_specific") or {}).get("severity")
+    if specific:
+        return str(specific).lower()
+    for entry in advisory.get("severity") or []:
+        if entry.get("score"):
+            return f"{entry.get('type', 'score')}: {entry['score']}"
+    return "unknown"
+
+
+def _osv_intervals(
+    ranges: Iterable[Dict[str, Any]],
+) -> Iterator[Tuple[Optional[str], str, Optional[str], Optional[str], Optional[str]]]:
+    """Turn OSV range events into ``(introduced, introduced_key, fixed, fixed_key, last_affected_key)``."""
+    for version_range in ranges:
+        if version_range.get("type") not in {"ECOSYSTEM", "SEMVER"}:
+            continue
+        start: Optional[str] = None
+        start_key: Optional[str] = None
+        for event in version_range.get("events") or []:
+            try:
+                if "introduced" in event:
+                    start = event["introduced"]
+                    start_key = _MIN_KEY if start == "0" else version_key(start)
+                elif "fixed" in event and start_key is not None:
+                    yield start, start_key, event["fixed"], version_key(event["fixed"]), None
+                    start_key = None
+                elif "last_affected" in event and start_key is not None:
+                    yield start, start_key, None, None, version_key(event["last_affected"])
+                    start_key = None
+            except InvalidVersion:
+                _logger.debug("Skipping unparsable OSV event %s", event)
+                start_key = None
+        if start_key is not None:
+            yield start, start_key, None, None, None
+
+
+_DATABASE: Optional[AuditDatabase] = None
+_DATABASE_LOCK = threading.Lock()
+
+
+def get_audit_database() -> Optional[AuditDatabase]:
+    """Return the shared read-only audit database, or ``None`` if it has not been built."""
+    global _DATABASE
+    if _DATABASE is None:
+        path = Path(os.getenv("DEPENDENCY_AUDIT_DB", str(DEFAULT_AUDIT_DB_PATH)))
+        if not path.exists():
+            return None
+        with _DATABASE_LOCK:
+            if _DATABASE is None:
+                _DATABASE = AuditDatabase(path, read_only=True)
+    return _DATABASE
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the offline dependency audit database.")
+    parser.add_argument("--osv", type=Path, help="OSV dump: directory of JSON files, all.zip or a JSON file.")
+    parser.add_argument("--licenses", type=Path, help="JSON mapping of package name to license.")
+    parser.add_argument(
+        "--db", type=Path, default=Path(os.getenv("DEPENDENCY_AUDIT_DB", str(DEFAULT_AUDIT_DB_PATH)))
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = _parse_args()
+    database = AuditDatabase(args.db)
+    if args.osv:
+        print(f"Imported {database.import_osv(args.osv)} advisories into {args.db}")
+    if args.licenses:
+        print(f"Imported {database.import_licenses(args.licenses)} license records into {args.db}")
@@ -1,12 +1,36 @@
-"""Deterministic calculator tool for quick quantitative reasoning."""
+"""Deterministic calculator tool for quick quantitative reasoning.
+
+Expressions are parsed once, validated against a whitelist and compiled into a tree of
+closures; compiled expressions are cached, so repeated checks skip parsing entirely.
+Evaluation runs on NumPy, which gives a batch mode for free: assign a list to a
+variable (``x = [1, 2, 3]; x**2 + 1``) or call :func:`evaluate_batch` with arrays.
+
+Guards keep a single call from pinning a worker: expression length and node count are
+capped, exponents above ``MAX_EXPONENT`` and operands beyond ``MAX_MAGNITUDE`` are
+rejected, floating-point overflow raises instead of producing ``inf``, and evaluation
+stops once its time budget is spent.
+"""
 from __future__ import annotations
 
 import ast
 import logging
+import math
 import operator
-from typing import Any, Dict
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Mapping, Optional, Tuple
 
+import numpy as np
 from crewai.tools import BaseTool
+from pydantic import Field
+
+MAX_EXPRESSION_LENGTH = 2000
+MAX_NODES = 400
+MAX_EXPONENT = 1024
+MAX_MAGNITUDE = 1e100
+MAX_BATCH_SIZE = 1_000_000
+DEFAULT_TIMEOUT_SECONDS = 1.0
 
 _ALLOWED_OPERATORS: Dict[type[ast.AST], Any] = {
     ast.Add: operator.add,
@@ -16,37 +40,253 @@ _ALLOWED_OPERATORS: Dict[type[ast.AST], Any] = {
     ast.Mod: operator.mod,
     ast.Pow: operator.pow,
     ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_COMPARISONS: Dict[type[ast.AST], Any] = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+# name -> (callable, minimum arity, maximum arity)
+_FUNCTIONS: Dict[str, Tuple[Callable[..., Any], int, int]] = {
+    "abs": (np.abs, 1, 1),
+    "sqrt": (np.sqrt, 1, 1),
+    "exp": (np.exp, 1, 1),
+    "log": (np.log, 1, 1),
+    "log10": (np.log10, 1, 1),
+    "log2": (np.log2, 1, 1),
+    "sin": (np.sin, 1, 1),
+    "cos": (np.cos, 1, 1),
+    "tan": (np.tan, 1, 1),
+    "asin": (np.arcsin, 1, 1),
+    "acos": (np.arccos, 1, 1),
+    "atan": (np.arctan, 1, 1),
+    "sinh": (np.sinh, 1, 1),
+    "cosh": (np.cosh, 1, 1),
+    "tanh": (np.tanh, 1, 1),
+    "floor": (np.floor, 1, 1),
+    "ceil": (np.ceil, 1, 1),
+    "round": (np.round, 1, 1),
+    "hypot": (np.hypot, 2, 2),
+    "min": (lambda *args: np.minimum.reduce(np.broadcast_arrays(*args)), 1, 16),
+    "max": (lambda *args: np.maximum.reduce(np.broadcast_arrays(*args)), 1, 16),
 }
 
+_CONSTANTS: Dict[str, float] = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+class _Context:
+    __slots__ = ("names", "deadline")
+
+    def __init__(self, names: Dict[str, Any], deadline: float) -> None:
+        self.names = names
+        self.deadline = deadline
+
+    def tick(self) -> None:
+        if time.monotonic() > self.deadline:
+            raise TimeoutError("Calculator evaluation exceeded its time budget")
+
+
+_Evaluator = Callable[[_Context], Any]
+
+
+def _check_magnitude(value: Any) -> Any:
+    if np.any(np.abs(value) > MAX_MAGNITUDE):
+        raise ValueError(f"Operand magnitude exceeds {MAX_MAGNITUDE:g}")
+    return value
+
+
+def _power(base: Any, exponent: Any) -> Any:
+    if np.any(np.abs(exponent) > MAX_EXPONENT):
+        raise ValueError(f"Exponent exceeds the limit of {MAX_EXPONENT}")
+    return np.power(base, exponent)
+
+
+def _as_array(values: Any) -> np.ndarray:
+    array = np.asarray(values, dtype="float64")
+    if array.size > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch size exceeds {MAX_BATCH_SIZE} values")
+    return _check_magnitude(array)
+
+
+def _compile_node(node: ast.AST) -> _Evaluator:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = _check_magnitude(np.float64(node.value))
+        return lambda ctx: value
+
+    if isinstance(node, ast.Name):
+        if node.id in _CONSTANTS:
+            constant = np.float64(_CONSTANTS[node.id])
+            return lambda ctx: constant
+        name = node.id
+
+        def load(ctx: _Context) -> Any:
+            try:
+                return ctx.names[name]
+            except KeyError:
+                raise ValueError(f"Unknown variable '{name}'") from None
+
+        return load
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        elements = [_compile_node(element) for element in node.elts]
+        return lambda ctx: _as_array([element(ctx) for element in elements])
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _ALLOWED_OPERATORS:
+        unary = _ALLOWED_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda ctx: unary(operand(ctx))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _ALLOWED_OPERATORS:
+        binary = _power if isinstance(node.op, ast.Pow) else _ALLOWED_OPERATORS[type(node.op)]
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+
+        def apply(ctx: _Context) -> Any:
+            ctx.tick()
+            return _check_magnitude(binary(left(ctx), right(ctx)))
+
+        return apply
+
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        operands = [_compile_node(node.left), *(_compile_node(item) for item in node.comparators)]
+        comparisons = [_COMPARISONS[type(op)] for op in node.ops]
+
+        def compare(ctx: _Context) -> Any:
+            values = [operand(ctx) for operand in operands]
+            result = np.bool_(True)
+            for position, comparison in enumerate(comparisons):
+                result = np.logical_and(result, comparison(values[position], values[position + 1]))
+            return result
+
+        return compare
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+        and not node.keywords
+    ):
+        function, min_args, max_args = _FUNCTIONS[node.func.id]
+        if not min_args <= len(node.args) <= max_args:
+            raise ValueError(f"{node.func.id}() takes {min_args}-{max_args} arguments, got {len(node.args)}")
+        arguments = [_compile_node(argument) for argument in node.args]
+
+        def call(ctx: _Context) -> Any:
+            ctx.tick()
+            return _check_magnitude(function(*(argument(ctx) for argument in arguments)))
+
+        return call
+
+    raise ValueError(f"Unsupported expression: {ast.dump(node, include_attributes=False)}")
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """A validated expression: optional ``name = value`` assignments followed by a result."""
+
+    source: str
+    assignments: Tuple[Tuple[str, _Evaluator], ...]
+    result: _Evaluator
+    free_variables: FrozenSet[str]
+
+    def evaluate(self, variables: Optional[Mapping[str, Any]] = None, *, timeout: float = DEFAULT_TIMEOUT_SECONDS) -> Any:
+        names = {name: _as_array(value) for name, value in (variables or {}).items()}
+        missing = self.free_variables - names.keys()
+        if missing:
+            raise ValueError(f"Missing values for variables: {', '.join(sorted(missing))}")
+        context = _Context(names, time.monotonic() + timeout)
+        with np.errstate(all="raise"):
+            for name, evaluator in self.assignments:
+                names[name] = evaluator(context)
+            return self.result(context)
+
+
+@lru_cache(maxsize=512)
+def compile_expression(source: str) -> CompiledExpression:
+    """Parse and validate ``source`` once; repeated expressions come from the cache."""
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    module = ast.parse(source.strip(), mode="exec")
+    if sum(1 for _ in ast.walk(module)) > MAX_NODES:
+        raise ValueError(f"Expression has more than {MAX_NODES} syntax nodes")
+    if not module.body or not isinstance(module.body[-1], ast.Expr):
+        raise ValueError("Expression must end with a value to compute")
+
+    assignments = []
+    assigned: set[str] = set()
+    referenced: set[str] = set()
+    for statement in module.body[:-1]:
+        if not (
+            isinstance(statement, ast.Assign)
+            and len(statement.targets) == 1
+            and isinstance(statement.targets[0], ast.Name)
+        ):
+            raise ValueError("Only 'name = expression' statements may precede the result")
+        name = statement.targets[0].id
+        if name in _CONSTANTS or name in _FUNCTIONS:
+            raise ValueError(f"Cannot assign to reserved name '{name}'")
+        referenced |= {item.id for item in ast.walk(statement.value) if isinstance(item, ast.Name)} - assigned
+        assignments.append((name, _compile_node(statement.value)))
+        assigned.add(name)
+
+    result_node = module.body[-1].value
+    referenced |= {item.id for item in ast.walk(result_node) if isinstance(item, ast.Name)} - assigned
+    return CompiledExpression(
+        source=source,
+        assignments=tuple(assignments),
+        result=_compile_node(result_node),
+        free_variables=frozenset(referenced - _CONSTANTS.keys() - _FUNCTIONS.keys()),
+    )
+
+
+def evaluate_batch(
+    expression: str,
+    variables: Mapping[str, Any],
+    *,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+) -> np.ndarray:
+    """Evaluate ``expression`` element-wise over array-valued ``variables``."""
+    return np.asarray(compile_expression(expression).evaluate(variables, timeout=timeout))
+
+
+def format_result(result: Any) -> str:
+    array = np.asarray(result)
+    if array.dtype == np.bool_:
+        return str(array.tolist())
+    if array.ndim == 0:
+        return str(float(array))
+    return str(array.astype("float64").tolist())
+
 
 class CalculatorTool(BaseTool):
     name: str = "deterministic_calculator"
     description: str = (
         "Perform precise arithmetic on simple expressions. "
-        "Supports addition, subtraction, multiplication, division, modulus, and powers."
+        "Supports addition, subtraction, multiplication, division, modulus, powers, comparisons "
+        "and math functions (sqrt, log, exp, sin, cos, abs, min, max, ...). "
+        "Define variables with 'x = 2; y = 3; x * y'. Assign a list to evaluate over many "
+        "values at once, e.g. 'n = [10, 100, 1000]; n * log2(n)'."
     )
+    timeout_seconds: float = Field(default=DEFAULT_TIMEOUT_SECONDS, gt=0)
 
     _logger = logging.getLogger(__name__)
 
     def _run(self, query: str) -> str:
         try:
-            expression = ast.parse(query, mode="eval").body
-            result = self._eval(expression)
-            self._logger.info("Calculator evaluated '%s' -> %s", query, result)
-            return str(result)
+            result = compile_expression(query).evaluate(timeout=self.timeout_seconds)
+            formatted = format_result(result)
+            self._logger.info("Calculator evaluated '%s' -> %s", query, formatted)
+            return formatted
         except Exception as exc:  # pragma: no cover - defensive layer
             self._logger.exception("Calculator failed for expression '%s'", query)
             raise ValueError(f"Failed to evaluate expression '{query}': {exc}") from exc
 
-    def _eval(self, node: ast.AST) -> float:
-        if isinstance(node, ast.Num):  # type: ignore[attr-defined]
-            return float(node.n)
-        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
-            return float(node.value)
-        if isinstance(node, ast.UnaryOp) and type(node.op) in _ALLOWED_OPERATORS:
-            return _ALLOWED_OPERATORS[type(node.op)](self._eval(node.operand))
-        if isinstance(node, ast.BinOp) and type(node.op) in _ALLOWED_OPERATORS:
-            left = self._eval(node.left)
-            right = self._eval(node.right)
-            return _ALLOWED_OPERATORS[type(node.op)](left, right)
-        raise ValueError(f"Unsupported expression: {ast.dump(node, include_attributes=False)}")
+    def evaluate_batch(self, expression: str, **variables: Any) -> np.ndarray:
+        """Evaluate ``expression`` over array-valued keyword ``variables``."""
+        return evaluate_batch(expression, variables, timeout=self.timeout_seconds)
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, List, Optional
 
 from crewai.tools import BaseTool
 from pydantic import Field, PrivateAttr # Added PrivateAttr
 
+from .audit_db import get_audit_database
 # Import the base search tool definition to use its functionality
 from .web_search import DuckDuckGoSearchTool, create_web_search_tool
 
 _logger = logging.getLogger(__name__)
 
+# Process-wide cap on in-flight audit searches, shared by every tool instance so
+# parallel reviewers cannot multiply the load on the search backend.
+_MAX_CONCURRENT_LOOKUPS = int(os.getenv("DEPENDENCY_AUDIT_MAX_CONCURRENCY", "4"))
+_LOOKUP_SLOTS = threading.BoundedSemaphore(_MAX_CONCURRENT_LOOKUPS)
+
 
 class DependencyAuditTool(BaseTool):
     """
@@ -22,32 +32,99 @@ class DependencyAuditTool(BaseTool):
     description: str = (
         "Performs a security and compliance check on a list of dependencies. "
         "Provide a comma-separated list of libraries and versions (e.g., 'numpy==1.24.1, requests==2.28.1'). "
-        "Use this to find known CVEs or license conflicts."
+        "Use this to find known CVEs or license conflicts. Packages found in the offline "
+        "advisory database are answered from it; others fall back to web search."
     )
     
+    max_workers: int = Field(
+        default=_MAX_CONCURRENT_LOOKUPS,
+        ge=1,
+        description="Worker threads used to audit dependencies concurrently.",
+    )
+    timeout_seconds: float = Field(
+        default_factory=lambda: float(os.getenv("DEPENDENCY_AUDIT_TIMEOUT_SECONDS", "20")),
+        gt=0,
+        description="Lookups still running after this many seconds are reported as timed out.",
+    )
+
     # FIX: Use PrivateAttr for internal attributes that are not CrewAI tool inputs
     _search_tool: DuckDuckGoSearchTool = PrivateAttr(
         default_factory=lambda: create_web_search_tool(max_results=3),
     )
 
     def _run(self, dependency_list: str) -> str:
-        results = []
         dependencies = [dep.strip() for dep in dependency_list.split(',') if dep.strip()]
         
         if not dependencies:
             return "No dependencies provided for audit."
 
-        # Audit each dependency with a focused query
-        for dep in dependencies:
-            focused_query = f"security vulnerability and license for {dep}"
+        started = time.perf_counter()
+        reports: List[Optional[str]] = [None] * len(dependencies)
+
+        # Answer from the offline advisory database first; it needs no network.
+        database = get_audit_database()
+        if database is not None:
+            for position, dep in enumerate(dependencies):
+                result = database.audit(dep)
+                if result is not None:
+                    reports[position] = result.to_markdown()
+
+        pending = [position for position, report in enumerate(reports) if report is None]
+        if pending:
+            web_reports = self._web_audit([dependencies[position] for position in pending])
+            for position, report in zip(pending, web_reports):
+                reports[position] = report
+
+        _logger.info(
+            "DependencyAuditTool audited %d dependencies (%d offline, %d via web search) in %.2fs",
+            len(dependencies),
+            len(dependencies) - len(pending),
+            len(pending),
+            time.perf_counter() - started,
+        )
+        return "--- Dependency Audit Report ---\n\n" + "\n\n".join(reports)
+
+    def _web_audit(self, dependencies: List[str]) -> List[str]:
+        """Search the web for dependencies the offline database does not cover."""
+        # Audit every dependency concurrently; the report keeps the input order.
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(dependencies)),
+            thread_name_prefix="dependency-audit",
+        )
+        try:
+            futures = [executor.submit(self._audit_one, dep) for dep in dependencies]
+            wait(futures, timeout=self.timeout_seconds)
+        finally:
+            # Do not block the reviewer on stragglers; queued lookups are dropped.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results = []
+        for dep, future in zip(dependencies, futures):
+            # Lookups still queued at the deadline were cancelled by the shutdown above.
+            if not future.done() or future.cancelled():
+                _logger.warning(
+                    "DependencyAuditTool lookup for %s %s after %.1fs",
+                    dep,
+                    "was skipped" if future.cancelled() else "timed out",
+                    self.timeout_seconds,
+                )
+                search_results = (
+                    f"Lookup timed out or was skipped after {self.timeout_seconds:.0f}s; "
+                    "audit this dependency manually."
+                )
+            elif future.exception() is not None:
+                _logger.warning("DependencyAuditTool lookup for %s failed: %s", dep, future.exception())
+                search_results = f"Lookup failed: {future.exception()}"
+            else:
+                search_results = future.result()
+            results.append(f"Audit Results for **{dep}** (web search):\n{search_results}")
+        return results
+
+    def _audit_one(self, dep: str) -> str:
+        focused_query = f"security vulnerability and license for {dep}"
+        with _LOOKUP_SLOTS:
             _logger.info("DependencyAuditTool executing search for: %s", dep)
-            
-            # Use the underlying search tool
-            # Access the private attribute using dot notation
-            search_results = self._search_tool._run(focused_query)
-            results.append(f"Audit Results for **{dep}**:\n{search_results}")
-            
-        return "--- Dependency Audit Report ---\n\n" + "\n\n".join(results)
+            return self._search_tool._run(focused_query)
 
 
 def create_dependency_audit_tool() -> DependencyAuditTool:
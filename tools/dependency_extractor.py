@@ -0,0 +1,151 @@
+"""Extract third-party dependencies from generated code for a single batched audit.
+
+The Code Writer's output is Markdown with fenced code blocks. Python blocks are parsed
+with ``ast`` to collect every import, including ones nested in functions; requirements
+blocks and ``pip install`` lines contribute pinned requirements. Untagged or plain-text
+blocks are read as requirements only when every line carries a version specifier, so
+sample program output (``True``, ``racecar``) is never mistaken for a package. Imports are mapped to distribution names via a
+bundled table (``sklearn`` -> ``scikit-learn``), standard-library and project-local
+modules are skipped, and pinned requirements win over bare imports of the same package.
+"""
+from __future__ import annotations
+
+import ast
+import logging
+import re
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+from packaging.utils import canonicalize_name
+
+from .audit_db import parse_requirement
+
+_logger = logging.getLogger(__name__)
+
+_FENCE_PATTERN = re.compile(r"```[ \t]*([\w.+-]*)[^\n]*\n(.*?)```", re.DOTALL)
+_IMPORT_LINE_PATTERN = re.compile(r"^\s*(?:from\s+([A-Za-z_]\w*)[\w.]*\s+import|import\s+([A-Za-z_]\w*))", re.MULTILINE)
+_PIP_INSTALL_PATTERN = re.compile(r"pip3?\s+install\s+([^\n`#&|;]+)")
+# "app/models.py" marks "app" as a project package rather than a dependency.
+_LOCAL_MODULE_PATTERN = re.compile(r"\b([A-Za-z_]\w*)(?:/[\w/]*)?\.py\b")
+
+_PYTHON_LANGUAGES = {"python", "py", "python3"}
+_REQUIREMENTS_LANGUAGES = {"requirements", "requirements.txt", "pip"}
+# Untagged or plain-text blocks count only if every line is a versioned requirement.
+_PLAIN_LANGUAGES = {"", "text", "txt", "ini"}
+
+# Import names whose distribution on PyPI is named differently.
+IMPORT_TO_DISTRIBUTION: Dict[str, str] = {
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "Crypto": "pycryptodome",
+    "dateutil": "python-dateutil",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "fitz": "PyMuPDF",
+    "gi": "PyGObject",
+    "google": "google-api-core",
+    "jose": "python-jose",
+    "jwt": "PyJWT",
+    "magic": "python-magic",
+    "MySQLdb": "mysqlclient",
+    "OpenSSL": "pyOpenSSL",
+    "PIL": "Pillow",
+    "psycopg2": "psycopg2-binary",
+    "serial": "pyserial",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "telegram": "python-telegram-bot",
+    "win32api": "pywin32",
+    "yaml": "PyYAML",
+    "zmq": "pyzmq",
+}
+
+_STDLIB_MODULES = frozenset(getattr(sys, "stdlib_module_names", ())) | {"__future__"}
+
+
+def iter_code_blocks(text: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(language, code)`` for every fenced code block in ``text``."""
+    for match in _FENCE_PATTERN.finditer(text):
+        yield match.group(1).lower(), match.group(2)
+
+
+def _python_imports(code: str) -> List[str]:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        # Generated snippets are often fragments; fall back to a line scan.
+        return [first or second for first, second in _IMPORT_LINE_PATTERN.findall(code)]
+
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.append(node.module.split(".")[0])
+    return names
+
+
+def _requirement_lines(code: str, *, strict: bool = False) -> List[str]:
+    """Requirement lines of ``code``; with ``strict``, all-or-nothing and versioned only."""
+    lines = []
+    for raw in code.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        parsed = parse_requirement(line)
+        if parsed is not None and (not strict or str(parsed.specifier)):
+            lines.append(line)
+        elif strict:
+            return []
+    return lines
+
+
+def _pip_install_requirements(text: str) -> List[str]:
+    requirements = []
+    for match in _PIP_INSTALL_PATTERN.finditer(text):
+        for token in match.group(1).split():
+            token = token.strip("'\"")
+            if not token or token.startswith("-") or token.endswith(".txt") or "/" in token:
+                continue
+            if parse_requirement(token) is not None:
+                requirements.append(token)
+    return requirements
+
+
+def distribution_for_import(module: str) -> str:
+    return IMPORT_TO_DISTRIBUTION.get(module, module)
+
+
+def extract_dependencies(text: str) -> List[str]:
+    """Return the third-party requirements referenced by ``text``, in first-seen order.
+
+    Pinned requirements (``requests==2.31.0``) are returned as written; packages that
+    are only imported are returned as bare distribution names.
+    """
+    local_modules = set(_LOCAL_MODULE_PATTERN.findall(text))
+    requirements: Dict[str, str] = {}
+
+    def add(requirement: str, *, pinned: bool) -> None:
+        parsed = parse_requirement(requirement)
+        if parsed is None:
+            return
+        key = canonicalize_name(parsed.name)
+        if key not in requirements or (pinned and str(parsed.specifier)):
+            requirements[key] = requirement
+
+    for requirement in _pip_install_requirements(text):
+        add(requirement, pinned=True)
+
+    for language, code in iter_code_blocks(text):
+        if language in _PYTHON_LANGUAGES:
+            for module in _python_imports(code):
+                if module in _STDLIB_MODULES or module in local_modules:
+                    continue
+                add(distribution_for_import(module), pinned=False)
+        elif language in _REQUIREMENTS_LANGUAGES or language in _PLAIN_LANGUAGES:
+            for requirement in _requirement_lines(code, strict=language in _PLAIN_LANGUAGES):
+                add(requirement, pinned=True)
+
+    dependencies = list(requirements.values())
+    _logger.info("Extracted %d dependencies from generated code", len(dependencies))
+    return dependencies
@@ -0,0 +1,198 @@
+"""Pluggable embedding backends for the local RAG pipeline.
+
+``huggingface`` (the default) wraps LangChain's ``HuggingFaceEmbeddings`` and therefore
+torch and sentence-transformers. ``onnx`` runs an exported, optionally int8-quantized
+copy of the same model on onnxruntime and needs neither; export it once with
+``python rag/export_onnx_embeddings.py``. Both backends import their heavy dependencies
+only when the first text is embedded.
+
+Select the backend with ``RAG_EMBEDDING_BACKEND=huggingface|onnx``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+_logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("huggingface", "onnx")
+DEFAULT_ONNX_MODEL_DIR = Path(__file__).resolve().parents[1] / "rag" / "models" / "all-MiniLM-L6-v2-onnx"
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_int8.onnx"
+ONNX_TOKENIZER_FILE = "tokenizer.json"
+ONNX_EXPORT_METADATA_FILE = "export.json"
+
+
+def get_embedding_backend() -> str:
+    """Return the configured embedding backend name."""
+    backend = os.getenv("RAG_EMBEDDING_BACKEND", "huggingface").strip().lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown RAG_EMBEDDING_BACKEND '{backend}'. Choose one of: {', '.join(EMBEDDING_BACKENDS)}"
+        )
+    return backend
+
+
+class LazyHuggingFaceEmbeddings(Embeddings):
+    """``HuggingFaceEmbeddings`` that is constructed (and imports torch) on first use."""
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+        self._delegate: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+
+    def _model(self) -> Embeddings:
+        if self._delegate is None:
+            with self._lock:
+                if self._delegate is None:
+                    started = time.perf_counter()
+                    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+                    self._delegate = HuggingFaceEmbeddings(model_name=self.model_name)
+                    _logger.info(
+                        "Loaded HuggingFace embedding model %s in %.2fs",
+                        self.model_name,
+                        time.perf_counter() - started,
+                    )
+        return self._delegate
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._model().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._model().embed_query(text)
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformers style embeddings (mean pooling + L2 norm) on onnxruntime."""
+
+    def __init__(
+        self,
+        model_dir: Path | str = DEFAULT_ONNX_MODEL_DIR,
+        *,
+        quantized: bool = True,
+        max_length: int = 256,
+        intra_op_threads: Optional[int] = None,
+        batch_size: int = 32,
+        expected_model: Optional[str] = None,
+    ) -> None:
+        self.model_dir = Path(model_dir)
+        self.expected_model = expected_model
+        self.quantized = quantized
+        self.max_length = max_length
+        self.intra_op_threads = intra_op_threads
+        self.batch_size = batch_size
+        self._session: Any = None
+        self._tokenizer: Any = None
+        self._input_names: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _model_path(self) -> Path:
+        quantized_path = self.model_dir / ONNX_QUANTIZED_MODEL_FILE
+        if self.quantized and quantized_path.exists():
+            return quantized_path
+        return self.model_dir / ONNX_MODEL_FILE
+
+    def _load(self) -> None:
+        if self._session is not None:
+            return
+        with self._lock:
+            if self._session is not None:
+                return
+            try:
+                import onnxruntime as ort
+                from tokenizers import Tokenizer
+            except ImportError as exc:  # pragma: no cover - optional dependency
+                raise ImportError(
+                    "The onnx embedding backend needs 'onnxruntime' and 'tokenizers'. "
+                    "Install them with 'pip install onnxruntime tokenizers'."
+                ) from exc
+
+            model_path = self._model_path()
+            if not model_path.exists():
+                raise FileNotFoundError(
+                    f"ONNX embedding model not found at {model_path}. "
+                    "Run 'python rag/export_onnx_embeddings.py' first."
+                )
+
+            self._check_source_model()
+            started = time.perf_counter()
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = self.intra_op_threads or int(
+                os.getenv("RAG_ONNX_THREADS", str(os.cpu_count() or 1))
+            )
+            session = ort.InferenceSession(
+                str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+            )
+
+            tokenizer = Tokenizer.from_file(str(self.model_dir / ONNX_TOKENIZER_FILE))
+            tokenizer.enable_truncation(max_length=self.max_length)
+            pad_id = tokenizer.token_to_id("[PAD]") or 0
+            tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+
+            self._input_names = {item.name for item in session.get_inputs()}
+            self._tokenizer = tokenizer
+            self._session = session
+            _logger.info(
+                "Loaded ONNX embedding model %s with %d intra-op threads in %.2fs",
+                model_path,
+                options.intra_op_num_threads,
+                time.perf_counter() - started,
+            )
+
+    def _check_source_model(self) -> None:
+        metadata_path = self.model_dir / ONNX_EXPORT_METADATA_FILE
+        if not self.expected_model or not metadata_path.exists():
+            return
+        exported_from = json.loads(metadata_path.read_text(encoding="utf-8")).get("model_name")
+        if exported_from and exported_from != self.expected_model:
+            _logger.warning(
+                "ONNX model in %s was exported from %s but %s was requested; vectors will not match the index",
+                self.model_dir,
+                exported_from,
+                self.expected_model,
+            )
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.asarray([encoding.ids for encoding in encodings], dtype="int64")
+        attention_mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype="int64")
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.asarray([encoding.type_ids for encoding in encodings], dtype="int64")
+
+        token_embeddings = self._session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype("float32")
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype("float32").tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._load()
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[start : start + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def create_embeddings(model_name: str, backend: Optional[str] = None) -> Embeddings:
+    """Instantiate the embedding backend for ``model_name`` without loading the model yet."""
+    backend = backend or get_embedding_backend()
+    if backend == "onnx":
+        model_dir = Path(os.getenv("RAG_ONNX_MODEL_DIR", str(DEFAULT_ONNX_MODEL_DIR)))
+        quantized = os.getenv("RAG_ONNX_QUANTIZED", "true").strip().lower() not in {"0", "false", "no"}
+        return OnnxEmbeddings(model_dir, quantized=quantized, expected_model=model_name)
+    return LazyHuggingFaceEmbeddings(model_name)
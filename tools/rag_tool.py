@@ -2,40 +2,87 @@
 from __future__ import annotations
 
 import logging
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from langchain_core.documents import Document
 from crewai.tools import BaseTool
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from pydantic import Field, PrivateAttr
 
+from .embeddings import get_embedding_backend
+from .lru_cache import CacheStats, LRUCache
+from .singleflight import SingleFlight
+from .vector_store import VectorStoreLike
+from .vectorstore_registry import get_shared_vectorstore_entry
+
 DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 DEFAULT_VECTORSTORE_DIR = Path(__file__).resolve().parents[1] / "rag" / "vectorstore"
 
+# Process-wide caches shared by every LocalRAGTool instance. Entries are keyed by the
+# embedding backend and model, and results also by the index version, so switching
+# backends or rebuilding the vector store invalidates them automatically.
+_QUERY_EMBEDDING_CACHE: LRUCache[List[float]] = LRUCache(
+    maxsize=int(os.getenv("RAG_QUERY_EMBEDDING_CACHE_SIZE", "1024")),
+)
+_RESULT_CACHE: LRUCache[str] = LRUCache(
+    maxsize=int(os.getenv("RAG_RESULT_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("RAG_RESULT_CACHE_TTL_SECONDS", "3600")),
+)
+# Concurrent identical queries that miss the result cache share one retrieval.
+_RESULT_FLIGHTS: SingleFlight[str] = SingleFlight("local_rag")
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so near-identical questions share cache entries."""
+    return " ".join(query.lower().split())
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], *, k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists with RRF: each list contributes ``1 / (k + rank)`` per id."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+def get_rag_cache_stats() -> Dict[str, CacheStats]:
+    """Return hit/miss counters for the query-embedding and result caches."""
+    return {
+        "query_embeddings": _QUERY_EMBEDDING_CACHE.stats(),
+        "results": _RESULT_CACHE.stats(),
+    }
+
+
+def clear_rag_caches() -> None:
+    """Empty the query-embedding and result caches."""
+    _QUERY_EMBEDDING_CACHE.clear()
+    _RESULT_CACHE.clear()
+
 
 class LocalRAGTool(BaseTool):
     name: str = "local_rag_search"
     description: str = (
         "Access the local FAISS vector store built from workshop materials. "
-        "Use this to retrieve background information, code snippets, and deployment tips."
+        "Use this to retrieve background information, code snippets, and deployment tips. "
+        "Exact identifiers and keywords (e.g. 'pytest fixture scope') are matched as well."
     )
     vectorstore_path: Path = Field(default_factory=lambda: DEFAULT_VECTORSTORE_DIR)
     top_k: int = 4
     embedding_model: str = DEFAULT_EMBEDDING_MODEL
+    hybrid: bool = True
+    rrf_k: int = 60
 
-    _vectorstore: Optional[FAISS] = PrivateAttr(default=None)
+    _vectorstore: Optional[VectorStoreLike] = PrivateAttr(default=None)
+    _index_version: Optional[str] = PrivateAttr(default=None)
     _logger = logging.getLogger(__name__)
 
     def __init__(self, **data) -> None:
         super().__init__(**data)
         self.vectorstore_path = Path(self.vectorstore_path)
 
-    def _load_vectorstore(self) -> FAISS:
-        if self._vectorstore is not None:
-            return self._vectorstore
-
+    def _load_vectorstore(self) -> VectorStoreLike:
         if not self.vectorstore_path.exists():
             self._logger.error(
                 "Vector store missing at %s. Did you run rag/build_vector_db.py?",
@@ -45,29 +92,112 @@ class LocalRAGTool(BaseTool):
                 f"Vector store not found at {self.vectorstore_path}. Run 'python rag/build_vector_db.py' first."
             )
 
-        embeddings = HuggingFaceEmbeddings(model_name=self.embedding_model)
-        self._vectorstore = FAISS.load_local(
-            folder_path=str(self.vectorstore_path),
-            embeddings=embeddings,
-            allow_dangerous_deserialization=True,
-        )
-        self._logger.info(
-            "Loaded FAISS vector store from %s using embedding model %s",
-            self.vectorstore_path,
-            self.embedding_model,
-        )
-        return self._vectorstore
+        # Every tool instance in the process shares one loaded index and model; the
+        # registry reloads it when the index on disk has been rebuilt.
+        entry = get_shared_vectorstore_entry(self.vectorstore_path, self.embedding_model)
+        if entry.store is not self._vectorstore:
+            index_spec = getattr(entry.store, "index_spec", None)
+            self._logger.info(
+                "Using vector store from %s (index version %s, index type %s) with embedding model %s",
+                self.vectorstore_path,
+                entry.index_version,
+                index_spec.kind if index_spec else "legacy",
+                self.embedding_model,
+            )
+        self._vectorstore = entry.store
+        self._index_version = entry.index_version
+        return entry.store
 
-    def _run(self, query: str) -> str:
+    def _embed_queries(self, store: VectorStoreLike, normalized_queries: Sequence[str]) -> List[List[float]]:
+        """Return one embedding per query, computing all cache misses in a single forward pass."""
+        embeddings: Dict[str, List[float]] = {}
+        misses: List[str] = []
+        backend = get_embedding_backend()
+        for query in normalized_queries:
+            cached = _QUERY_EMBEDDING_CACHE.get((backend, self.embedding_model, query))
+            if cached is None:
+                misses.append(query)
+            else:
+                embeddings[query] = cached
+
+        if misses:
+            for query, embedding in zip(misses, store.embedding_function.embed_documents(misses)):
+                _QUERY_EMBEDDING_CACHE.set((backend, self.embedding_model, query), embedding)
+                embeddings[query] = embedding
+        return [embeddings[query] for query in normalized_queries]
+
+    def batch_search(self, queries: Sequence[str], k: Optional[int] = None) -> List[List[Document]]:
+        """Retrieve the top ``k`` chunks for every query in one embedding pass and one index search.
+
+        Results are returned in the same order as ``queries``. Duplicate queries (after
+        normalisation) are embedded and searched once.
+        """
+        k = k or self.top_k
         store = self._load_vectorstore()
-        docs = store.similarity_search(query, k=self.top_k)
-        if not docs:
-            return "No relevant documents found in the local knowledge base."
+        normalized = [normalize_query(query) for query in queries]
+        unique = list(dict.fromkeys(normalized))
+        if not unique:
+            return []
+        embeddings = self._embed_queries(store, unique)
+
+        if not hasattr(store, "search_ids_by_vectors"):
+            # Legacy pickle stores only support one query vector at a time.
+            by_query = {
+                query: store.similarity_search_by_vector(embedding, k=k)
+                for query, embedding in zip(unique, embeddings)
+            }
+            return [by_query[query] for query in normalized]
+
+        hybrid = self.hybrid and getattr(store, "has_keyword_index", False)
+        # Hybrid retrieval fuses the dense and BM25 rankings over a wider candidate pool.
+        pool = max(k * 4, 20) if hybrid else k
+        vector_hits = store.search_ids_by_vectors(embeddings, pool)
+
+        by_query: Dict[str, List[Document]] = {}
+        for query, hits in zip(unique, vector_hits):
+            if hybrid:
+                keyword_hits = store.search_ids_by_keywords(query, pool)
+                ranked = reciprocal_rank_fusion(
+                    [[row_id for row_id, _ in hits], [row_id for row_id, _ in keyword_hits]],
+                    k=self.rrf_k,
+                )[:k]
+            else:
+                ranked = hits[:k]
+            by_query[query] = store.fetch_documents(
+                [row_id for row_id, _ in ranked], [score for _, score in ranked]
+            )
+        return [by_query[query] for query in normalized]
 
-        formatted = self._format_docs(docs)
-        self._logger.info(
-            "Local RAG served %d snippets for query '%s'", len(docs), query
+    def _run(self, query: str) -> str:
+        self._load_vectorstore()
+        normalized = normalize_query(query)
+        cache_key = (
+            str(self.vectorstore_path),
+            get_embedding_backend(),
+            normalized,
+            self.top_k,
+            self.hybrid,
+            self._index_version,
         )
+
+        cached = _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            self._logger.info("Local RAG cache hit for query '%s'", query)
+            return cached
+
+        return _RESULT_FLIGHTS.do(cache_key, lambda: self._retrieve_and_cache(query, cache_key))
+
+    def _retrieve_and_cache(self, query: str, cache_key: tuple) -> str:
+        docs = self.batch_search([query], k=self.top_k)[0]
+        if not docs:
+            formatted = "No relevant documents found in the local knowledge base."
+        else:
+            formatted = self._format_docs(docs)
+            self._logger.info(
+                "Local RAG served %d snippets for query '%s'", len(docs), query
+            )
+
+        _RESULT_CACHE.set(cache_key, formatted)
         return formatted
 
     @staticmethod
@@ -0,0 +1,208 @@
+"""Pluggable backends behind ``DuckDuckGoSearchTool`` for offline, repeatable runs.
+
+``SEARCH_BACKEND_MODE`` selects one of:
+
+    live     query DuckDuckGo through the pooled client (default)
+    record   query DuckDuckGo and append every response to the cassette
+    replay   answer only from the cassette, sleeping the recorded (or a fixed) latency
+    fixture  rank paragraphs of a local text corpus by keyword overlap; no network
+
+The cassette (``SEARCH_CASSETTE_PATH``, default ``.cache/search_cassette.jsonl.gz``) is
+gzip-compressed JSON lines keyed like the search cache, so normalized duplicates
+replay the same response. ``SEARCH_REPLAY_LATENCY_MS`` overrides the recorded latency
+("0" disables the sleep). ``SEARCH_FIXTURE_DIR`` points at ``*.txt``/``*.md`` files
+(default: ``rag/documents``).
+
+Recorders append under an exclusive lock on ``<cassette>.lock``, so several processes
+can record into one cassette. The lock needs ``fcntl``; on Windows, record from a
+single process at a time.
+
+The persistent search cache is bypassed in every mode but ``live``: record mode sends
+every query to DuckDuckGo so the cassette captures it, and replay or fixture answers
+never reach the cache that later live runs read.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+from .search_cache import DEFAULT_CACHE_DIR, SearchCache
+
+_logger = logging.getLogger(__name__)
+
+SEARCH_BACKEND_MODES = ("live", "record", "replay", "fixture")
+DEFAULT_CASSETTE_PATH = DEFAULT_CACHE_DIR / "search_cassette.jsonl.gz"
+DEFAULT_FIXTURE_DIR = Path(__file__).resolve().parents[1] / "rag" / "documents"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class SearchBackend(Protocol):
+    def search(self, backend: str, query: str, max_results: int) -> list[dict[str, Any]]:
+        ...
+
+
+def _open_cassette(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+@contextmanager
+def _cassette_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock shared by every process recording into ``path``."""
+    if fcntl is None:  # pragma: no cover - Windows
+        yield
+        return
+    with path.with_name(path.name + ".lock").open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class RecordingSearchBackend:
+    """Forward searches to ``delegate`` and append each response to a cassette."""
+
+    def __init__(self, delegate: SearchBackend, cassette_path: Path) -> None:
+        self.delegate = delegate
+        self.cassette_path = Path(cassette_path)
+        self.cassette_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def search(self, backend: str, query: str, max_results: int) -> list[dict[str, Any]]:
+        started = time.perf_counter()
+        results = self.delegate.search(backend, query, max_results)
+        entry = {
+            "key": SearchCache.make_key(backend, query, max_results),
+            "backend": backend,
+            "query": query,
+            "max_results": max_results,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "results": results,
+        }
+        # Appending gzip members keeps the file readable as one stream; the file lock
+        # keeps other processes' members from interleaving with this one.
+        with self._lock, _cassette_lock(self.cassette_path), _open_cassette(self.cassette_path, "a") as handle:
+            handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        return results
+
+
+class ReplaySearchBackend:
+    """Serve searches from a recorded cassette with simulated latency."""
+
+    def __init__(self, cassette_path: Path, *, latency_ms: Optional[float] = None) -> None:
+        self.cassette_path = Path(cassette_path)
+        self.latency_ms = latency_ms
+        if not self.cassette_path.exists():
+            raise FileNotFoundError(
+                f"No search cassette at {self.cassette_path}. Record one with SEARCH_BACKEND_MODE=record."
+            )
+        self._entries: Dict[str, Tuple[float, list[dict[str, Any]]]] = {}
+        with _open_cassette(self.cassette_path, "r") as handle:
+            for line in handle:
+                if line.strip():
+                    entry = json.loads(line)
+                    # Later recordings of the same query win.
+                    self._entries[entry["key"]] = (entry.get("latency_ms", 0.0), entry["results"])
+        _logger.info("Loaded %d recorded searches from %s", len(self._entries), self.cassette_path)
+
+    def search(self, backend: str, query: str, max_results: int) -> list[dict[str, Any]]:
+        entry = self._entries.get(SearchCache.make_key(backend, query, max_results))
+        if entry is None:
+            raise LookupError(f"Query not in search cassette {self.cassette_path}: '{query}'")
+        recorded_latency, results = entry
+        latency = recorded_latency if self.latency_ms is None else self.latency_ms
+        if latency > 0:
+            time.sleep(latency / 1000)
+        return [dict(item) for item in results]
+
+
+class FixtureSearchBackend:
+    """Rank paragraphs of a local corpus by query-term overlap."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self._paragraphs: List[Tuple[str, str, frozenset[str]]] = []
+        for path in sorted([*self.directory.glob("*.txt"), *self.directory.glob("*.md")]):
+            for paragraph in path.read_text(encoding="utf-8").split("\n\n"):
+                text = paragraph.strip()
+                if text:
+                    self._paragraphs.append((path.name, text, frozenset(_TOKEN_PATTERN.findall(text.lower()))))
+        if not self._paragraphs:
+            raise FileNotFoundError(f"No *.txt or *.md fixture documents found in {self.directory}")
+
+    def search(self, backend: str, query: str, max_results: int) -> list[dict[str, Any]]:
+        terms = set(_TOKEN_PATTERN.findall(query.lower()))
+        scored = [
+            (len(terms & tokens), position)
+            for position, (_, _, tokens) in enumerate(self._paragraphs)
+            if terms & tokens
+        ]
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        results = []
+        for _, position in scored[:max_results]:
+            name, text, _ = self._paragraphs[position]
+            results.append(
+                {
+                    "title": text.splitlines()[0][:80],
+                    "href": f"fixture://{name}#{position}",
+                    "body": text[:500],
+                }
+            )
+        return results
+
+
+def get_search_backend_mode() -> str:
+    mode = os.getenv("SEARCH_BACKEND_MODE", "live").strip().lower()
+    if mode not in SEARCH_BACKEND_MODES:
+        raise ValueError(
+            f"Unknown SEARCH_BACKEND_MODE '{mode}'. Choose one of: {', '.join(SEARCH_BACKEND_MODES)}"
+        )
+    return mode
+
+
+def _create_backend(mode: str) -> SearchBackend:
+    cassette = Path(os.getenv("SEARCH_CASSETTE_PATH", str(DEFAULT_CASSETTE_PATH)))
+    if mode == "replay":
+        latency = os.getenv("SEARCH_REPLAY_LATENCY_MS")
+        return ReplaySearchBackend(cassette, latency_ms=float(latency) if latency is not None else None)
+    if mode == "fixture":
+        return FixtureSearchBackend(Path(os.getenv("SEARCH_FIXTURE_DIR", str(DEFAULT_FIXTURE_DIR))))
+
+    from .search_client import get_search_client
+
+    if mode == "record":
+        return RecordingSearchBackend(get_search_client(), cassette)
+    return get_search_client()
+
+
+_BACKENDS: Dict[str, SearchBackend] = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def get_search_backend() -> SearchBackend:
+    """Return the process-wide backend for the configured ``SEARCH_BACKEND_MODE``."""
+    mode = get_search_backend_mode()
+    backend = _BACKENDS.get(mode)
+    if backend is None:
+        with _BACKENDS_LOCK:
+            backend = _BACKENDS.get(mode)
+            if backend is None:
+                backend = _BACKENDS[mode] = _create_backend(mode)
+                _logger.info("Using '%s' search backend", mode)
+    return backend
@@ -0,0 +1,171 @@
+"""Persistent SQLite cache for web search results shared by all search-backed tools.
+
+Entries are keyed by (backend, normalized query, max_results) and expire after a TTL.
+With stale-while-revalidate enabled, an expired entry younger than ``ttl + stale``
+is still served while the caller refreshes it in the background. The database uses
+WAL mode and short transactions so Streamlit sessions and CLI runs in separate
+processes can share it.
+
+Configuration (environment variables):
+    SEARCH_CACHE_ENABLED        "false" disables the cache (default: true)
+    SEARCH_CACHE_PATH           database file (default: .cache/search_cache.sqlite)
+    SEARCH_CACHE_TTL_SECONDS    freshness window (default: 86400)
+    SEARCH_CACHE_STALE_SECONDS  extra window in which stale hits are served (default: 0)
+    SEARCH_CACHE_MAX_ENTRIES    oldest entries are evicted beyond this size (default: 5000)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_cache_created ON search_cache(created_at);
+"""
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() not in {"0", "false", "no", "off"}
+
+
+@dataclass
+class SearchCacheConfig:
+    """Settings for the persistent search cache, read from the environment at runtime."""
+
+    enabled: bool = field(default_factory=lambda: _env_flag("SEARCH_CACHE_ENABLED", True))
+    path: Path = field(
+        default_factory=lambda: Path(
+            os.getenv("SEARCH_CACHE_PATH", str(DEFAULT_CACHE_DIR / "search_cache.sqlite"))
+        )
+    )
+    ttl_seconds: float = field(default_factory=lambda: float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400")))
+    stale_seconds: float = field(default_factory=lambda: float(os.getenv("SEARCH_CACHE_STALE_SECONDS", "0")))
+    max_entries: int = field(default_factory=lambda: int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")))
+
+
+class CacheLookup(NamedTuple):
+    value: Any
+    is_stale: bool
+
+
+def normalize_search_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """SQLite-backed TTL cache with size-based eviction."""
+
+    def __init__(self, config: SearchCacheConfig | None = None) -> None:
+        self.config = config or SearchCacheConfig()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.config.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.config.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(backend: str, query: str, max_results: int) -> str:
+        payload = json.dumps([backend, normalize_search_query(query), max_results])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, attribute: str) -> None:
+        with self._stats_lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def get(self, key: str) -> Optional[CacheLookup]:
+        """Return the cached value and whether it is stale, or ``None`` on a miss."""
+        try:
+            row = self._connection().execute(
+                "SELECT value, created_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            _logger.warning("Search cache read failed; treating as a miss", exc_info=True)
+            row = None
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        age = time.time() - row[1]
+        if age <= self.config.ttl_seconds:
+            self._count("hits")
+            return CacheLookup(json.loads(row[0]), is_stale=False)
+        if age <= self.config.ttl_seconds + self.config.stale_seconds:
+            self._count("stale_hits")
+            return CacheLookup(json.loads(row[0]), is_stale=True)
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        horizon = now - (self.config.ttl_seconds + self.config.stale_seconds)
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), now),
+                )
+                conn.execute("DELETE FROM search_cache WHERE created_at < ?", (horizon,))
+                overflow = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0] - self.config.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM search_cache WHERE key IN "
+                        "(SELECT key FROM search_cache ORDER BY created_at LIMIT ?)",
+                        (overflow,),
+                    )
+        except sqlite3.Error:
+            _logger.warning("Search cache write failed; continuing without caching", exc_info=True)
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM search_cache")
+
+
+_CACHE: Optional[SearchCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Return the process-wide search cache, or ``None`` when caching is disabled."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                config = SearchCacheConfig()
+                if not config.enabled:
+                    return None
+                _CACHE = SearchCache(config)
+    return _CACHE
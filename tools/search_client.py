@@ -0,0 +1,205 @@
+"""Process-wide DuckDuckGo client with token-bucket pacing and jittered retries.
+
+Every search in the process draws a token from one shared bucket before it hits the
+network, so concurrent agents and Streamlit sessions cannot burst past the backend's
+throttle. ``DDGS`` sessions are kept per thread and reused instead of being opened
+and closed per query. Rate-limit and timeout responses are retried with exponential
+backoff and full jitter.
+
+Configuration (environment variables):
+    SEARCH_RATE_PER_SECOND       sustained searches per second (default: 1.0)
+    SEARCH_RATE_BURST            bucket capacity (default: 3)
+    SEARCH_QUEUE_TIMEOUT_SECONDS longest a search waits for a token (default: 60)
+    SEARCH_MAX_RETRIES           retries after a throttled or timed-out call (default: 3)
+    SEARCH_BACKOFF_BASE_SECONDS  first backoff ceiling, doubled per retry (default: 1.0)
+    SEARCH_BACKOFF_MAX_SECONDS   backoff ceiling cap (default: 30)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from ddgs import DDGS
+from ddgs.exceptions import RatelimitException, TimeoutException
+
+_logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is available."""
+
+    def __init__(self, rate_per_second: float, capacity: float) -> None:
+        if rate_per_second <= 0 or capacity < 1:
+            raise ValueError("rate_per_second must be positive and capacity at least 1")
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """Take one token and return the seconds spent waiting for it."""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - started
+                delay = (1 - self._tokens) / self.rate
+            if timeout is not None and now - started + delay > timeout:
+                raise TimeoutError(f"No search capacity available within {timeout:.0f}s")
+            time.sleep(delay)
+
+
+@dataclass(frozen=True)
+class SearchClientStats:
+    """Point-in-time counters for the pooled search client."""
+
+    requests: int
+    retries: int
+    throttled: int
+    failures: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+    @property
+    def mean_wait_ms(self) -> float:
+        return self.total_wait_seconds * 1000 / self.requests if self.requests else 0.0
+
+
+class PooledSearchClient:
+    """Rate-limited DuckDuckGo client that reuses one ``DDGS`` session per thread."""
+
+    def __init__(
+        self,
+        *,
+        rate_per_second: float = 1.0,
+        burst: float = 3,
+        queue_timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+    ) -> None:
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._throttled = 0
+        self._failures = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @classmethod
+    def from_env(cls) -> "PooledSearchClient":
+        return cls(
+            rate_per_second=float(os.getenv("SEARCH_RATE_PER_SECOND", "1.0")),
+            burst=float(os.getenv("SEARCH_RATE_BURST", "3")),
+            queue_timeout=float(os.getenv("SEARCH_QUEUE_TIMEOUT_SECONDS", "60")),
+            max_retries=int(os.getenv("SEARCH_MAX_RETRIES", "3")),
+            backoff_base=float(os.getenv("SEARCH_BACKOFF_BASE_SECONDS", "1.0")),
+            backoff_max=float(os.getenv("SEARCH_BACKOFF_MAX_SECONDS", "30")),
+        )
+
+    def _session(self) -> DDGS:
+        session: Optional[DDGS] = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = DDGS()
+        return session
+
+    def _reset_session(self) -> None:
+        session = getattr(self._local, "session", None)
+        self._local.session = None
+        if session is not None:
+            try:
+                session.__exit__(None, None, None)
+            except Exception:  # pragma: no cover - closing is best effort
+                pass
+
+    def _record_wait(self, waited: float) -> None:
+        with self._stats_lock:
+            self._requests += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+    def search(self, backend: str, query: str, max_results: int) -> list[dict[str, Any]]:
+        for attempt in range(self.max_retries + 1):
+            waited = self.bucket.acquire(timeout=self.queue_timeout)
+            self._record_wait(waited)
+            if waited > 1:
+                _logger.info("Search for '%s' waited %.2fs for rate-limit capacity", query, waited)
+            try:
+                session = self._session()
+                if backend == "news":
+                    iterator = session.news(query, max_results=max_results)
+                elif backend == "images":
+                    iterator = session.images(query, max_results=max_results)
+                else:
+                    iterator = session.text(query, max_results=max_results)
+                return list(iterator)
+            except (RatelimitException, TimeoutException) as exc:
+                with self._stats_lock:
+                    self._throttled += isinstance(exc, RatelimitException)
+                    if attempt == self.max_retries:
+                        self._failures += 1
+                        raise
+                    self._retries += 1
+                self._reset_session()
+                # Full jitter keeps retrying sessions from re-synchronising.
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+                _logger.warning(
+                    "Search for '%s' was throttled (%s); retry %d/%d in %.2fs",
+                    query,
+                    type(exc).__name__,
+                    attempt + 1,
+                    self.max_retries,
+                    delay,
+                )
+                time.sleep(delay)
+            except Exception:
+                with self._stats_lock:
+                    self._failures += 1
+                self._reset_session()
+                raise
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def stats(self) -> SearchClientStats:
+        with self._stats_lock:
+            return SearchClientStats(
+                requests=self._requests,
+                retries=self._retries,
+                throttled=self._throttled,
+                failures=self._failures,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+            )
+
+
+_CLIENT: Optional[PooledSearchClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_search_client() -> PooledSearchClient:
+    """Return the process-wide search client, creating it from the environment on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = PooledSearchClient.from_env()
+    return _CLIENT
+
+
+def get_search_client_stats() -> SearchClientStats:
+    return get_search_client().stats()
@@ -0,0 +1,96 @@
+"""Coalesce concurrent identical calls so only one of them does the work.
+
+``SingleFlight.do(key, fn)`` runs ``fn`` for the first caller of ``key``; callers that
+arrive while it is in flight block until it finishes and share its result (or its
+exception). Nothing is cached afterwards — pair it with a cache for that.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass(frozen=True)
+class SingleFlightStats:
+    """Point-in-time counters for a coalescing group."""
+
+    calls: int
+    executions: int
+    coalesced: int
+    in_flight: int
+
+    @property
+    def coalesced_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+
+class _Call(Generic[V]):
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[V] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[V]):
+    """A named group of in-flight calls keyed by request identity."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call[V]] = {}
+        self._executions = 0
+        self._coalesced = 0
+        with _GROUPS_LOCK:
+            _GROUPS[name] = self
+
+    def do(self, key: Hashable, fn: Callable[[], V]) -> V:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executions += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value  # type: ignore[return-value]
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(
+                calls=self._executions + self._coalesced,
+                executions=self._executions,
+                coalesced=self._coalesced,
+                in_flight=len(self._calls),
+            )
+
+
+_GROUPS: Dict[str, SingleFlight] = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def get_singleflight_stats() -> Dict[str, SingleFlightStats]:
+    """Return counters for every coalescing group created in this process."""
+    with _GROUPS_LOCK:
+        groups = dict(_GROUPS)
+    return {name: group.stats() for name, group in groups.items()}
@@ -0,0 +1,487 @@
+"""On-disk vector store: a memory-mapped FAISS index plus an SQLite docstore.
+
+The FAISS index holds only vectors, keyed by the SQLite row id of each chunk. Chunk
+text and metadata stay in ``docstore.sqlite`` and are read only for the top-k hits,
+so processes that open the same store share index pages through the OS cache and
+nothing is unpickled at load time.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+_logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+MANIFEST_FILE = "manifest.json"
+INDEX_TYPES = ("flat", "ivf-flat", "hnsw", "ivf-pq")
+STORAGE_TYPES = ("fp32", "fp16", "sq8", "pq")
+
+DOCSTORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    embedding BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_source ON chunks(source);
+CREATE TABLE IF NOT EXISTS build_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# BM25 keyword index over the chunk text, kept as an external-content FTS5 table so
+# the text itself is stored only once.
+BM25_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    text,
+    content='chunks',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+"""
+_QUERY_TOKEN = re.compile(r"\w+")
+
+
+class VectorStoreLike(Protocol):
+    """The subset of the LangChain vector store API used by the RAG tool."""
+
+    embedding_function: Embeddings
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        ...
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Describes which FAISS index structure to build over the docstore vectors.
+
+    ``flat`` is exact search; ``ivf-flat``, ``hnsw`` and ``ivf-pq`` trade recall for
+    query speed (and, for PQ, memory). ``storage`` selects how vectors are encoded:
+    full ``fp32``, half-precision ``fp16``, 8-bit scalar quantization ``sq8`` or
+    product quantization ``pq`` with ``pq_m`` sub-quantizers. Parsed from strings such
+    as ``"ivf-pq:nlist=256,pq_m=16,nprobe=12"`` or ``"flat:storage=sq8"``.
+    """
+
+    kind: str = "flat"
+    storage: str = "fp32"
+    nlist: Optional[int] = None
+    nprobe: int = 8
+    hnsw_m: int = 32
+    ef_search: int = 64
+    pq_m: int = 16
+    train_size: int = 50_000
+
+    def __post_init__(self) -> None:
+        if self.kind not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{self.kind}'. Choose one of: {', '.join(INDEX_TYPES)}")
+        if self.storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown storage '{self.storage}'. Choose one of: {', '.join(STORAGE_TYPES)}")
+        if self.kind == "ivf-pq" and self.storage not in ("fp32", "pq"):
+            raise ValueError("ivf-pq always stores product-quantized codes; drop the storage option")
+        if self.kind == "hnsw" and self.storage == "fp16":
+            raise ValueError("FAISS has no fp16 HNSW index; use storage=sq8 or storage=pq")
+
+    @classmethod
+    def parse(cls, text: str) -> "IndexSpec":
+        kind, _, options = text.strip().partition(":")
+        values: Dict[str, Any] = {}
+        for option in filter(None, (item.strip() for item in options.split(","))):
+            name, _, raw = option.partition("=")
+            name = name.strip()
+            if name not in cls.__dataclass_fields__ or name == "kind":
+                raise ValueError(f"Unknown index option '{name}' in '{text}'")
+            values[name] = raw.strip().lower() if name == "storage" else int(raw)
+        return cls(kind=kind.strip().lower() or "flat", **values)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any] | None) -> "IndexSpec":
+        if not data:
+            return cls()
+        known = {key: value for key, value in data.items() if key in cls.__dataclass_fields__}
+        return cls(**known)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def is_ivf(self) -> bool:
+        return self.kind.startswith("ivf")
+
+    @property
+    def codec(self) -> str:
+        """Effective vector encoding (ivf-pq implies product quantization)."""
+        return "pq" if self.kind == "ivf-pq" else self.storage
+
+    @property
+    def label(self) -> str:
+        return self.kind if self.storage == "fp32" or self.kind == "ivf-pq" else f"{self.kind}/{self.storage}"
+
+    def resolve(self, ntotal: int) -> "IndexSpec":
+        """Fill in corpus-dependent defaults such as the number of IVF lists."""
+        if not self.is_ivf or self.nlist is not None:
+            return self
+        # ~4*sqrt(n) lists, but never more than FAISS can train with 39 points per list.
+        nlist = max(1, min(int(4 * math.sqrt(max(ntotal, 1))), ntotal // 39 or 1))
+        return replace(self, nlist=nlist)
+
+    def factory_string(self) -> str:
+        codes = {"fp32": "Flat", "fp16": "SQfp16", "sq8": "SQ8", "pq": f"PQ{self.pq_m}"}[self.codec]
+        if self.kind == "flat":
+            return f"IDMap2,{codes}"
+        if self.kind == "hnsw":
+            suffix = "" if self.codec == "fp32" else f"_{codes}"
+            return f"IDMap2,HNSW{self.hnsw_m}{suffix}"
+        return f"IVF{self.nlist},{codes}"
+
+    def min_training_points(self) -> int:
+        points = (self.nlist or 1) if self.is_ivf else 0
+        if self.codec == "pq":
+            # Each PQ sub-quantizer learns 256 centroids.
+            points = max(points, 256)
+        elif self.codec == "sq8":
+            points = max(points, 1)
+        return points
+
+    def search_parameters(self) -> str:
+        if self.is_ivf:
+            return f"nprobe={self.nprobe}"
+        if self.kind == "hnsw":
+            return f"efSearch={self.ef_search}"
+        return ""
+
+
+def read_manifest(folder: Path | str) -> Dict[str, Any] | None:
+    """Return the build manifest stored next to the index, if any."""
+    path = Path(folder) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def has_sqlite_docstore(folder: Path | str) -> bool:
+    folder = Path(folder)
+    return (folder / INDEX_FILE).exists() and (folder / DOCSTORE_FILE).exists()
+
+
+class InconsistentVectorStoreError(RuntimeError):
+    """The docstore and index on disk do not belong to the build the manifest describes."""
+
+
+def file_sha256(path: Path | str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_build_id(conn: sqlite3.Connection) -> Optional[str]:
+    """Return the build id stamped into a docstore by the builder, if any."""
+    try:
+        row = conn.execute("SELECT value FROM build_meta WHERE key = 'build_id'").fetchone()
+    except sqlite3.OperationalError:  # docstores written before build ids existed
+        return None
+    return row[0] if row else None
+
+
+def write_build_id(conn: sqlite3.Connection, build_id: str) -> None:
+    conn.execute("INSERT OR REPLACE INTO build_meta (key, value) VALUES ('build_id', ?)", (build_id,))
+    conn.commit()
+
+
+def index_stamp(path: Path | str) -> Dict[str, int]:
+    """Size and modification time of an index file: a cheap fingerprint of one build.
+
+    ``os.replace`` keeps the staged file's mtime, so the stamp recorded at build time
+    still matches once the index has been published.
+    """
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def store_matches_manifest(folder: Path | str, manifest: Dict[str, Any] | None, *, verify: bool = False) -> bool:
+    """Check that the docstore and index on disk are the pair ``manifest`` published.
+
+    The builder replaces the docstore, then the index, then the manifest; the manifest
+    is the commit record. Until it lands, the files on disk do not match it and readers
+    must not pair them. Manifests from builds that predate build ids are trusted.
+
+    The index is compared by its stamp, so loading never reads the whole file. Only
+    when the stamp differs (e.g. the folder was copied without timestamps), or with
+    ``verify=True``, is the index hashed against the manifest's ``index_sha256``.
+    """
+    folder = Path(folder)
+    if not manifest or "build_id" not in manifest:
+        return True
+    try:
+        conn = connect_docstore(folder / DOCSTORE_FILE, read_only=True)
+        try:
+            build_id = read_build_id(conn)
+        finally:
+            conn.close()
+        if build_id != manifest["build_id"]:
+            return False
+        index_path = folder / INDEX_FILE
+        if not verify and manifest.get("index_stamp") == index_stamp(index_path):
+            return True
+        return file_sha256(index_path) == manifest.get("index_sha256")
+    except (OSError, sqlite3.Error):
+        return False
+
+
+def read_index_mmap(path: Path | str) -> faiss.Index:
+    """Open a FAISS index memory-mapped when the installed FAISS supports it."""
+    flags = [
+        getattr(faiss, "IO_FLAG_MMAP_IFC", None),
+        getattr(faiss, "IO_FLAG_MMAP", None),
+    ]
+    for flag in flags:
+        if flag is None:
+            continue
+        try:
+            return faiss.read_index(str(path), flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            continue
+    _logger.warning("FAISS cannot memory-map %s; reading it into memory instead", path)
+    return faiss.read_index(str(path))
+
+
+# ---------------------------------------------------------------------------
+# Docstore helpers shared with rag/build_vector_db.py
+# ---------------------------------------------------------------------------
+
+def connect_docstore(path: Path | str, *, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(str(path))
+        conn.executescript(DOCSTORE_SCHEMA)
+    return conn
+
+
+def build_bm25_index(conn: sqlite3.Connection) -> bool:
+    """(Re)build the FTS5 BM25 index over the docstore; returns False if FTS5 is unavailable."""
+    try:
+        conn.executescript(BM25_SCHEMA)
+        conn.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')")
+        conn.commit()
+    except sqlite3.OperationalError as exc:
+        _logger.warning("SQLite FTS5 unavailable (%s); skipping the BM25 keyword index", exc)
+        return False
+    return True
+
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    return np.asarray(vector, dtype="float32").tobytes()
+
+
+def iter_docstore_vectors(
+    conn: sqlite3.Connection, *, page_size: int = 4096
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield ``(row_ids, vectors)`` pages from the docstore in row-id order."""
+    cursor = conn.execute("SELECT id, embedding FROM chunks ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(page_size)
+        if not rows:
+            return
+        ids = np.fromiter((row[0] for row in rows), dtype="int64", count=len(rows))
+        vectors = np.vstack([np.frombuffer(row[1], dtype="float32") for row in rows])
+        yield ids, vectors
+
+
+def build_flat_index(conn: sqlite3.Connection, dimension: int) -> faiss.Index:
+    """Build an exact L2 index over every vector in the docstore, keyed by row id."""
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+    for ids, vectors in iter_docstore_vectors(conn):
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def _training_sample(conn: sqlite3.Connection, size: int) -> np.ndarray:
+    rows = conn.execute(
+        "SELECT embedding FROM chunks ORDER BY RANDOM() LIMIT ?", (size,)
+    ).fetchall()
+    return np.vstack([np.frombuffer(row[0], dtype="float32") for row in rows])
+
+
+def build_index(
+    conn: sqlite3.Connection, dimension: int, spec: IndexSpec
+) -> Tuple[faiss.Index, IndexSpec]:
+    """Build the index described by ``spec`` over the docstore vectors.
+
+    Approximate indexes are trained on a random sample of at most ``spec.train_size``
+    vectors. If the corpus is too small to train the requested structure, an exact
+    flat index is built instead. Returns the index and the spec actually used.
+    """
+    ntotal = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+    spec = spec.resolve(ntotal)
+    if spec.min_training_points() > ntotal:
+        _logger.warning(
+            "Only %d vectors available; %s needs at least %d to train. Falling back to a flat index.",
+            ntotal,
+            spec.label,
+            spec.min_training_points(),
+        )
+        spec = IndexSpec(kind="flat")
+
+    if spec.kind == "flat" and spec.codec == "fp32":
+        return build_flat_index(conn, dimension), spec
+
+    index = faiss.index_factory(dimension, spec.factory_string())
+    if not index.is_trained:
+        index.train(_training_sample(conn, max(spec.train_size, spec.min_training_points())))
+    for ids, vectors in iter_docstore_vectors(conn):
+        index.add_with_ids(vectors, ids)
+    apply_search_parameters(index, spec)
+    return index, spec
+
+
+def apply_search_parameters(index: faiss.Index, spec: IndexSpec) -> None:
+    """Set query-time knobs (nprobe, efSearch) that FAISS does not persist reliably."""
+    parameters = spec.search_parameters()
+    if not parameters:
+        return
+    try:
+        faiss.ParameterSpace().set_index_parameters(index, parameters)
+    except RuntimeError:
+        _logger.warning("Could not apply search parameters '%s' to %s index", parameters, spec.kind)
+
+
+def index_size_bytes(index: faiss.Index) -> int:
+    return int(faiss.serialize_index(index).size)
+
+
+def full_precision_bytes(index: faiss.Index) -> int:
+    """Size the raw float32 vectors of ``index`` would take, for quantization reports."""
+    return int(index.ntotal) * int(index.d) * 4
+
+
+# ---------------------------------------------------------------------------
+# Read side
+# ---------------------------------------------------------------------------
+
+class SQLiteFAISSStore:
+    """Read-only vector store backed by a memory-mapped index and an SQLite docstore."""
+
+    def __init__(self, folder: Path | str, embeddings: Embeddings) -> None:
+        self.folder = Path(folder)
+        self.embedding_function = embeddings
+        manifest = read_manifest(self.folder) or {}
+        self.build_id: Optional[str] = manifest.get("build_id")
+        self.index = read_index_mmap(self.folder / INDEX_FILE)
+        # The builder records which index structure it produced in the manifest.
+        self.index_spec = IndexSpec.from_dict(manifest.get("index"))
+        apply_search_parameters(self.index, self.index_spec)
+        self._docstore_path = self.folder / DOCSTORE_FILE
+        self._local = threading.local()
+        self.has_keyword_index = self._detect_keyword_index()
+
+    def _detect_keyword_index(self) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        ).fetchone()
+        return row is not None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_docstore(self._docstore_path, read_only=True)
+            if self.build_id is not None and read_build_id(conn) != self.build_id:
+                # A rebuild replaced the docstore since this index was loaded; its row
+                # ids no longer match the vectors held here.
+                conn.close()
+                raise InconsistentVectorStoreError(
+                    f"Docstore at {self._docstore_path} was rebuilt after its index was loaded"
+                )
+            self._local.conn = conn
+        return conn
+
+    def fetch_documents(self, row_ids: Sequence[int], scores: Sequence[float]) -> List[Document]:
+        """Load the chunks for ``row_ids`` (in that order) from the docstore."""
+        if not row_ids:
+            return []
+        placeholders = ",".join("?" for _ in row_ids)
+        rows = self._connection().execute(
+            f"SELECT id, text, metadata FROM chunks WHERE id IN ({placeholders})",
+            list(row_ids),
+        ).fetchall()
+        by_id = {row[0]: row for row in rows}
+
+        docs: List[Document] = []
+        for row_id, score in zip(row_ids, scores):
+            row = by_id.get(row_id)
+            if row is None:
+                continue
+            metadata = json.loads(row[2])
+            metadata["score"] = float(score)
+            docs.append(Document(page_content=row[1], metadata=metadata))
+        return docs
+
+    def search_ids_by_vectors(
+        self, embeddings: Sequence[Sequence[float]] | np.ndarray, k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Search many query vectors with one matrix call; one hit list per query, best first."""
+        queries = np.asarray(embeddings, dtype="float32")
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        if len(queries) == 0:
+            return []
+        distances, ids = self.index.search(queries, k)
+        return [
+            [(int(row_id), float(dist)) for row_id, dist in zip(id_row, dist_row) if row_id != -1]
+            for id_row, dist_row in zip(ids, distances)
+        ]
+
+    def search_ids_by_vector(self, embedding: List[float], k: int) -> List[Tuple[int, float]]:
+        """Return ``(row_id, distance)`` pairs for the nearest vectors, best first."""
+        return self.search_ids_by_vectors([embedding], k)[0]
+
+    def search_ids_by_keywords(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return ``(row_id, bm25)`` pairs for the best keyword matches, best first."""
+        if not self.has_keyword_index:
+            return []
+        tokens = list(dict.fromkeys(_QUERY_TOKEN.findall(query.lower())))
+        if not tokens:
+            return []
+        # Quote every token so FTS5 operators in user input are treated as plain words.
+        match = " OR ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+        rows = self._connection().execute(
+            "SELECT rowid, bm25(chunks_fts) AS score FROM chunks_fts "
+            "WHERE chunks_fts MATCH ? ORDER BY score LIMIT ?",
+            (match, k),
+        ).fetchall()
+        return [(int(row[0]), float(row[1])) for row in rows]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        hits = self.search_ids_by_vector(embedding, k)
+        return self.fetch_documents([hit[0] for hit in hits], [hit[1] for hit in hits])
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k=k)
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal)
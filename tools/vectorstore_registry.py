@@ -0,0 +1,275 @@
+"""Process-wide registry that shares loaded vector stores and embedding models between tools."""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from .embeddings import create_embeddings, get_embedding_backend
+from .vector_store import (
+    InconsistentVectorStoreError,
+    SQLiteFAISSStore,
+    VectorStoreLike,
+    has_sqlite_docstore,
+    read_manifest,
+    store_matches_manifest,
+)
+
+_logger = logging.getLogger(__name__)
+
+RegistryKey = Tuple[str, str]
+INDEX_FILES = ("index.faiss", "manifest.json")
+# A build publishes its files within milliseconds; wait this long for it to finish.
+LOAD_RETRIES = 5
+LOAD_RETRY_DELAY_SECONDS = 0.2
+
+
+class SharedVectorStore(NamedTuple):
+    """A loaded store together with the on-disk index version it was loaded from."""
+
+    store: VectorStoreLike
+    index_version: str
+
+
+@dataclass(frozen=True)
+class VectorStoreLoadStats:
+    """Timing and memory figures captured while loading a shared vector store."""
+
+    vectorstore_path: str
+    embedding_model: str
+    load_seconds: float
+    rss_before_mb: Optional[float]
+    rss_after_mb: Optional[float]
+
+    @property
+    def rss_delta_mb(self) -> Optional[float]:
+        if self.rss_before_mb is None or self.rss_after_mb is None:
+            return None
+        return self.rss_after_mb - self.rss_before_mb
+
+
+def index_version(vectorstore_path: Path | str) -> str:
+    """Return a cheap token that changes whenever the index on disk is rebuilt."""
+    parts = []
+    for name in INDEX_FILES:
+        try:
+            stat = (Path(vectorstore_path) / name).stat()
+        except FileNotFoundError:
+            parts.append("-")
+            continue
+        parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+    return "/".join(parts)
+
+
+def _resident_memory_mb() -> Optional[float]:
+    """Return the current resident set size in MiB, or ``None`` when unavailable."""
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        try:
+            resident_pages = int(statm.read_text().split()[1])
+            return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, ValueError, IndexError):
+            pass
+
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows has no resource module
+        return None
+
+    # ru_maxrss is the peak RSS: kilobytes on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+class VectorStoreRegistry:
+    """Load each (vectorstore_path, embedding_model) pair at most once per process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key_locks: Dict[RegistryKey, threading.Lock] = {}
+        self._stores: Dict[RegistryKey, SharedVectorStore] = {}
+        self._embeddings: Dict[Tuple[str, str], Embeddings] = {}
+        self._stats: Dict[RegistryKey, VectorStoreLoadStats] = {}
+        # Versions whose files did not match their manifest, so they are not re-checked
+        # on every call while an older store is still being served.
+        self._rejected: Dict[RegistryKey, str] = {}
+
+    @staticmethod
+    def _make_key(vectorstore_path: Path | str, embedding_model: str) -> RegistryKey:
+        return (str(Path(vectorstore_path).resolve()), embedding_model)
+
+    def get_embeddings(self, embedding_model: str) -> Embeddings:
+        """Return the shared embedding backend for ``embedding_model``.
+
+        The backend (see ``tools.embeddings``) loads its model lazily on the first
+        embedding call, so opening a store does not pay for torch or onnxruntime.
+        """
+        key = (get_embedding_backend(), embedding_model)
+        with self._lock:
+            embeddings = self._embeddings.get(key)
+            if embeddings is None:
+                embeddings = create_embeddings(embedding_model, backend=key[0])
+                self._embeddings[key] = embeddings
+                _logger.info("Registered %s embedding backend for %s", key[0], embedding_model)
+            return embeddings
+
+    def get(self, vectorstore_path: Path | str, embedding_model: str) -> VectorStoreLike:
+        """Return the shared vector store for the given path and embedding model."""
+        return self.get_entry(vectorstore_path, embedding_model).store
+
+    def get_entry(self, vectorstore_path: Path | str, embedding_model: str) -> SharedVectorStore:
+        """Return the shared store and its index version, reloading it if the index was rebuilt."""
+        key = self._make_key(vectorstore_path, embedding_model)
+        current_version = index_version(key[0])
+        entry = self._stores.get(key)
+        if entry is not None and (
+            entry.index_version == current_version or self._rejected.get(key) == current_version
+        ):
+            return entry
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Loads for different keys may proceed in parallel; callers asking for the
+        # same key block here until the first loader has finished.
+        with key_lock:
+            entry = self._stores.get(key)
+            if entry is None or entry.index_version != current_version:
+                if entry is not None:
+                    _logger.info("Index at %s changed on disk; reloading", key[0])
+                try:
+                    entry = self._load_consistent(key, current_version, retries=1 if entry else LOAD_RETRIES)
+                except InconsistentVectorStoreError:
+                    if entry is None:
+                        raise
+                    self._rejected[key] = current_version
+                    _logger.warning(
+                        "Index at %s does not match its manifest (rebuild in progress or interrupted); "
+                        "serving the previously loaded index",
+                        key[0],
+                    )
+        return entry
+
+    def _load_consistent(self, key: RegistryKey, version: str, *, retries: int) -> SharedVectorStore:
+        """Load ``key`` only once its docstore and index match the published manifest."""
+        folder_path = key[0]
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(LOAD_RETRY_DELAY_SECONDS)
+            if not has_sqlite_docstore(folder_path):
+                return self._register(key, *self._load(key, version))
+            manifest = read_manifest(folder_path)
+            if not store_matches_manifest(folder_path, manifest):
+                continue
+            entry, stats = self._load(key, version)
+            # The store re-reads the manifest; a build published in between shows up here.
+            if getattr(entry.store, "build_id", None) == (manifest or {}).get("build_id"):
+                return self._register(key, entry, stats)
+        raise InconsistentVectorStoreError(
+            f"Vector store at {folder_path} does not match its manifest; "
+            "wait for the running build or rerun 'python rag/build_vector_db.py'"
+        )
+
+    def _load(self, key: RegistryKey, version: str) -> Tuple[SharedVectorStore, VectorStoreLoadStats]:
+        folder_path, embedding_model = key
+        rss_before = _resident_memory_mb()
+        started = time.perf_counter()
+
+        embeddings = self.get_embeddings(embedding_model)
+        store: VectorStoreLike
+        if has_sqlite_docstore(folder_path):
+            store = SQLiteFAISSStore(folder_path, embeddings)
+        else:
+            # Stores built before the SQLite docstore existed still use LangChain's pickle.
+            from langchain_community.vectorstores import FAISS
+
+            _logger.warning(
+                "Vector store at %s uses the legacy pickle docstore; rebuild it with "
+                "'python rag/build_vector_db.py --rebuild' to avoid unsafe deserialization",
+                folder_path,
+            )
+            store = FAISS.load_local(
+                folder_path=folder_path,
+                embeddings=embeddings,
+                allow_dangerous_deserialization=True,
+            )
+
+        stats = VectorStoreLoadStats(
+            vectorstore_path=folder_path,
+            embedding_model=embedding_model,
+            load_seconds=time.perf_counter() - started,
+            rss_before_mb=rss_before,
+            rss_after_mb=_resident_memory_mb(),
+        )
+        return SharedVectorStore(store=store, index_version=version), stats
+
+    def _register(self, key: RegistryKey, entry: SharedVectorStore, stats: VectorStoreLoadStats) -> SharedVectorStore:
+        folder_path, embedding_model = key
+        with self._lock:
+            self._stores[key] = entry
+            self._stats[key] = stats
+            self._rejected.pop(key, None)
+
+        _logger.info(
+            "Loaded shared vector store from %s (model=%s) in %.2fs, RSS %s MiB (delta %s MiB)",
+            folder_path,
+            embedding_model,
+            stats.load_seconds,
+            _format_mb(stats.rss_after_mb),
+            _format_mb(stats.rss_delta_mb),
+        )
+        return entry
+
+    def stats(self) -> list[VectorStoreLoadStats]:
+        """Return load statistics for every store loaded so far."""
+        with self._lock:
+            return list(self._stats.values())
+
+    def clear(self) -> None:
+        """Drop all cached stores and embedding models (mainly useful for tests)."""
+        with self._lock:
+            self._stores.clear()
+            self._embeddings.clear()
+            self._stats.clear()
+            self._key_locks.clear()
+            self._rejected.clear()
+
+
+def _format_mb(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.1f}"
+
+
+_REGISTRY = VectorStoreRegistry()
+
+
+def get_shared_vectorstore(vectorstore_path: Path | str, embedding_model: str) -> VectorStoreLike:
+    """Return the process-wide vector store for ``vectorstore_path`` and ``embedding_model``."""
+    return _REGISTRY.get(vectorstore_path, embedding_model)
+
+
+def get_shared_vectorstore_entry(vectorstore_path: Path | str, embedding_model: str) -> SharedVectorStore:
+    """Return the process-wide store along with the index version it was loaded from."""
+    return _REGISTRY.get_entry(vectorstore_path, embedding_model)
+
+
+def get_shared_embeddings(embedding_model: str) -> Embeddings:
+    """Return the process-wide embedding model instance for ``embedding_model``."""
+    return _REGISTRY.get_embeddings(embedding_model)
+
+
+def get_vectorstore_stats() -> list[VectorStoreLoadStats]:
+    """Return load time and memory figures for every shared vector store."""
+    return _REGISTRY.stats()
+
+
+def clear_vectorstore_registry() -> None:
+    """Forget all shared vector stores and embedding models."""
+    _REGISTRY.clear()
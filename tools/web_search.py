@@ -1,13 +1,32 @@
 from __future__ import annotations
 
 import logging
+import threading
 from typing import Any
 
 from crewai.tools import BaseTool
-# FIX 1: Change import from deprecated 'duckduckgo_search' to stable 'ddgs'
-from ddgs import DDGS 
 from pydantic import Field
 
+from .search_cache import SearchCache, get_search_cache
+from .search_backends import get_search_backend, get_search_backend_mode
+from .singleflight import SingleFlight
+
+# Keys currently being refreshed in the background (stale-while-revalidate).
+_REFRESHING: set[str] = set()
+_REFRESHING_LOCK = threading.Lock()
+_SEARCH_FLIGHTS: SingleFlight[list[dict[str, Any]]] = SingleFlight("web_search")
+
+
+def _live_search_cache() -> SearchCache | None:
+    """The persistent cache, used only for live searches.
+
+    Fixture and replay answers must not be served to later live runs, and in record
+    mode every query has to reach the backend so the cassette captures it.
+    """
+    if get_search_backend_mode() != "live":
+        return None
+    return get_search_cache()
+
 
 class DuckDuckGoSearchTool(BaseTool):
     """DuckDuckGo search tool that logs queries before returning results."""
@@ -49,15 +68,48 @@ class DuckDuckGoSearchTool(BaseTool):
         return serialized
 
     def _search(self, query: str) -> list[dict[str, Any]]:
+        key = SearchCache.make_key(self.backend, query, self.max_results)
+        cache = _live_search_cache()
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                if cached.is_stale:
+                    self._refresh_in_background(key, query)
+                self._logger.info(
+                    "DuckDuckGo cache %s for query: %s", "stale hit" if cached.is_stale else "hit", query
+                )
+                return cached.value
+
+        # Identical searches already in flight (other agents or sessions) share one request.
+        return _SEARCH_FLIGHTS.do(key, lambda: self._fetch_and_store(key, query))
+
+    def _fetch_and_store(self, key: str, query: str) -> list[dict[str, Any]]:
+        results = self._search_live(query)
+        cache = _live_search_cache()
+        if results and cache is not None:
+            cache.set(key, results)
+        return results
+
+    def _refresh_in_background(self, key: str, query: str) -> None:
+        with _REFRESHING_LOCK:
+            if key in _REFRESHING:
+                return
+            _REFRESHING.add(key)
+
+        def refresh() -> None:
+            try:
+                _SEARCH_FLIGHTS.do(key, lambda: self._fetch_and_store(key, query))
+            except Exception:  # pragma: no cover - background best effort
+                self._logger.warning("Background refresh failed for '%s'", query, exc_info=True)
+            finally:
+                with _REFRESHING_LOCK:
+                    _REFRESHING.discard(key)
+
+        threading.Thread(target=refresh, name="ddg-cache-refresh", daemon=True).start()
+
+    def _search_live(self, query: str) -> list[dict[str, Any]]:
         try:
-            with DDGS() as ddgs:
-                if self.backend == "news":
-                    iterator = ddgs.news(query, max_results=self.max_results)
-                elif self.backend == "images":
-                    iterator = ddgs.images(query, max_results=self.max_results)
-                else:
-                    iterator = ddgs.text(query, max_results=self.max_results)
-                return list(iterator)
+            return get_search_backend().search(self.backend, query, self.max_results)
         except Exception as exc:
             self._logger.exception("DuckDuckGo search failed for '%s'", query)
             raise ValueError(f"DuckDuckGo search failed: {exc}") from exc